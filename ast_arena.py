@@ -0,0 +1,488 @@
+# ast_arena.py
+"""
+Armazenamento compacto da AST (arena em arrays paralelos)
+
+Em vez de um objeto (com __dict__) por nó, a AstArena guarda cada nó como
+uma posição em arrays paralelos:
+- o tipo do nó como um inteiro pequeno (array 'B');
+- até três índices de filhos (a, b, c), com -1 para "nenhum";
+- o código do operador (ou do tipo declarado);
+- linha e coluna (apenas comandos; 0 nas expressões).
+
+Os filhos de um Block ficam contíguos em um array à parte (lists), e nomes,
+lexemas e cadeias são guardados uma única vez em uma tabela de strings. Os
+nós são numerados em pré-ordem: o pai vem antes dos filhos e um percurso
+completo lê os arrays do início ao fim, sem saltos.
+
+NodeView é a visão fina sobre um nó: expõe os mesmos campos das classes de
+parser.py (node.left, block.commands...), passa em isinstance(view,
+BinaryOp) e em dataclasses.fields(view), de modo que percursos escritos
+para a AST de objetos funcionam sobre a arena. As visões são somente
+leitura; to_ast() reconstrói a AST de objetos (por exemplo, para a análise
+semântica, que anota os nós).
+
+write() grava a arena em formato binário (cabeçalho ARENA_HEADER, os
+arrays em little-endian, a tabela de strings e as constantes) e read() a
+carrega de volta.
+"""
+
+from __future__ import annotations
+
+import struct
+import sys
+from array import array
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from gcutil import paused_gc
+from parser import (ASTNode, Program, Block, Declaration, Assignment, Read,
+                    Print, Conditional, While, BinaryOp, UnaryOp, Number,
+                    Identifier, RelationalOp, LogicalOp, LogicalNot)
+from token_file import (TokenFileError, decode_literal, encode_literal,
+                        little_endian)
+
+# Código inteiro de cada tipo de nó
+NODE_TYPES: List[type] = [Program, Block, Declaration, Assignment, Read,
+                          Print, Conditional, While, BinaryOp, UnaryOp,
+                          Number, Identifier, RelationalOp, LogicalOp,
+                          LogicalNot]
+NODE_CODES: Dict[type, int] = {t: i for i, t in enumerate(NODE_TYPES)}
+
+(PROGRAM, BLOCK, DECLARATION, ASSIGNMENT, READ, PRINT, CONDITIONAL, WHILE,
+ BINARY_OP, UNARY_OP, NUMBER, IDENTIFIER, RELATIONAL_OP, LOGICAL_OP,
+ LOGICAL_NOT) = range(len(NODE_TYPES))
+
+# Operadores e tipos declarados, guardados no array `ops`
+OPERATORS: List[str] = ["+", "-", "*", "/", "%", "<", ">", "<=", ">=", "==",
+                        "!=", "&&", "||", "i32", "f64"]
+OPERATOR_CODES: Dict[str, int] = {op: i for i, op in enumerate(OPERATORS)}
+
+NONE = -1
+
+# Formato binário: mágica, versão, número de nós, de entradas em `lists`,
+# de strings e de constantes
+ARENA_MAGIC = b"CAST"
+ARENA_VERSION = 1
+ARENA_HEADER = struct.Struct("<4sH2xQQQQ")
+_LENGTH = struct.Struct("<I")
+_LITTLE = sys.byteorder == "little"
+
+# Campos de cada tipo de nó e de onde vem cada um:
+#   ("node", slot)   filho no array a/b/c (ou None se -1)
+#   ("list", None)   filhos de um Block (lists[a:a + b])
+#   ("string", slot) string da tabela, índice no array a/b/c
+#   ("value", slot)  constante da tabela, índice no array a/b/c
+#   ("flag", slot)   booleano no array a/b/c
+#   ("op", None)     operador (ou tipo declarado) no array ops
+#   ("line", None), ("column", None)
+FIELDS: Dict[int, Dict[str, Tuple[str, Optional[int]]]] = {
+    PROGRAM: {"block": ("node", 0)},
+    BLOCK: {"commands": ("list", None)},
+    DECLARATION: {"is_mutable": ("flag", 1), "identifier": ("string", 0),
+                  "type_name": ("op", None), "line": ("line", None),
+                  "column": ("column", None)},
+    ASSIGNMENT: {"identifier": ("string", 0), "expression": ("node", 1),
+                 "line": ("line", None), "column": ("column", None)},
+    READ: {"identifier": ("string", 0), "line": ("line", None),
+           "column": ("column", None)},
+    PRINT: {"value": ("string", 0), "is_identifier": ("flag", 1),
+            "line": ("line", None), "column": ("column", None)},
+    CONDITIONAL: {"condition": ("node", 0), "then_block": ("node", 1),
+                  "else_block": ("node", 2), "line": ("line", None),
+                  "column": ("column", None)},
+    WHILE: {"condition": ("node", 0), "block": ("node", 1),
+            "line": ("line", None), "column": ("column", None)},
+    BINARY_OP: {"left": ("node", 0), "operator": ("op", None),
+                "right": ("node", 1)},
+    UNARY_OP: {"operator": ("op", None), "operand": ("node", 0)},
+    NUMBER: {"value": ("value", 1), "lexeme": ("string", 0)},
+    IDENTIFIER: {"name": ("string", 0)},
+    RELATIONAL_OP: {"left": ("node", 0), "operator": ("op", None),
+                    "right": ("node", 1)},
+    LOGICAL_OP: {"left": ("node", 0), "operator": ("op", None),
+                 "right": ("node", 1)},
+    LOGICAL_NOT: {"operand": ("node", 0)},
+}
+
+
+class AstArena:
+    """AST em arrays paralelos, com os nós numerados em pré-ordem"""
+
+    def __init__(self) -> None:
+        self.kinds = array("B")
+        self.a = array("i")
+        self.b = array("i")
+        self.c = array("i")
+        self.ops = array("B")
+        self.lines = array("I")
+        self.columns = array("I")
+        self.lists = array("i")
+        self.strings: List[str] = []
+        self.constants: List[Any] = []
+        self._string_ids: Dict[str, int] = {}
+        self._constant_ids: Dict[Tuple[type, Any], int] = {}
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # As tabelas de internação são refeitas sob demanda
+        state = self.__dict__.copy()
+        state["_string_ids"] = {}
+        state["_constant_ids"] = {}
+        return state
+
+    # -----------------------
+    # Construção
+    # -----------------------
+
+    @classmethod
+    def from_ast(cls, program: ASTNode) -> AstArena:
+        """Copia uma AST de objetos para a arena (percurso iterativo)"""
+        arena = cls()
+        with paused_gc():
+            arena._fill(program)
+        return arena
+
+    def _fill(self, program: ASTNode) -> None:
+        kinds, a, b, c, ops = self.kinds, self.a, self.b, self.c, self.ops
+        lines, columns, lists = self.lines, self.columns, self.lists
+        intern, constant = self._intern, self._constant
+        # (nó, array do pai a preencher, posição nesse array); os filhos são
+        # empilhados ao contrário para que o primeiro saia primeiro
+        stack: List[Tuple[ASTNode, Optional[array], int]] = [(program, None, 0)]
+        push = stack.append
+        while stack:
+            node, target, position = stack.pop()
+            index = len(kinds)
+            if target is not None:
+                target[position] = index
+            kind = NODE_CODES[type(node)]
+            x = y = z = NONE
+            op = line = column = 0
+
+            if kind == BINARY_OP or kind == RELATIONAL_OP or kind == LOGICAL_OP:
+                op = OPERATOR_CODES[node.operator]
+                push((node.right, b, index))
+                push((node.left, a, index))
+            elif kind == IDENTIFIER:
+                x = intern(node.name)
+            elif kind == NUMBER:
+                x = intern(node.lexeme)
+                y = constant(node.value)
+            elif kind == LOGICAL_NOT:
+                push((node.operand, a, index))
+            elif kind == UNARY_OP:
+                op = OPERATOR_CODES[node.operator]
+                push((node.operand, a, index))
+            elif kind == BLOCK:
+                commands = node.commands
+                x, y = len(lists), len(commands)
+                lists.extend([NONE] * y)
+                for k in range(y - 1, -1, -1):
+                    push((commands[k], lists, x + k))
+            elif kind == PROGRAM:
+                push((node.block, a, index))
+            else:
+                line, column = node.line, node.column
+                if kind == ASSIGNMENT:
+                    x = intern(node.identifier)
+                    push((node.expression, b, index))
+                elif kind == DECLARATION:
+                    x = intern(node.identifier)
+                    y = int(node.is_mutable)
+                    op = OPERATOR_CODES[node.type_name]
+                elif kind == READ:
+                    x = intern(node.identifier)
+                elif kind == PRINT:
+                    x = intern(node.value)
+                    y = int(node.is_identifier)
+                elif kind == CONDITIONAL:
+                    if node.else_block is not None:
+                        push((node.else_block, c, index))
+                    push((node.then_block, b, index))
+                    push((node.condition, a, index))
+                else:
+                    push((node.block, b, index))
+                    push((node.condition, a, index))
+
+            kinds.append(kind)
+            a.append(x)
+            b.append(y)
+            c.append(z)
+            ops.append(op)
+            lines.append(line)
+            columns.append(column)
+
+    def _intern(self, text: str) -> int:
+        ids = self._string_ids
+        if not ids and self.strings:
+            ids.update((s, i) for i, s in enumerate(self.strings))
+        index = ids.get(text)
+        if index is None:
+            index = ids[text] = len(self.strings)
+            self.strings.append(text)
+        return index
+
+    def _constant(self, value: Any) -> int:
+        # O tipo entra na chave: 1 e 1.0 são constantes diferentes
+        ids = self._constant_ids
+        if not ids and self.constants:
+            ids.update(((type(v), v), i) for i, v in enumerate(self.constants))
+        key = (type(value), value)
+        index = ids.get(key)
+        if index is None:
+            index = ids[key] = len(self.constants)
+            self.constants.append(value)
+        return index
+
+    # -----------------------
+    # Acesso
+    # -----------------------
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    @property
+    def root(self) -> NodeView:
+        return NodeView(self, 0)
+
+    def view(self, index: int) -> NodeView:
+        return NodeView(self, index)
+
+    def type_at(self, index: int) -> type:
+        return NODE_TYPES[self.kinds[index]]
+
+    def field(self, index: int, name: str) -> Any:
+        """Valor do campo `name` do nó (filhos como NodeView)"""
+        try:
+            source, slot = FIELDS[self.kinds[index]][name]
+        except KeyError:
+            raise AttributeError(name) from None
+        if source == "node":
+            child = (self.a, self.b, self.c)[slot][index]
+            return None if child == NONE else NodeView(self, child)
+        if source == "list":
+            start = self.a[index]
+            return [NodeView(self, child)
+                    for child in self.lists[start:start + self.b[index]]]
+        if source == "string":
+            return self.strings[(self.a, self.b, self.c)[slot][index]]
+        if source == "value":
+            return self.constants[(self.a, self.b, self.c)[slot][index]]
+        if source == "flag":
+            return bool((self.a, self.b, self.c)[slot][index])
+        if source == "op":
+            return OPERATORS[self.ops[index]]
+        if source == "line":
+            return self.lines[index]
+        return self.columns[index]
+
+    def walk(self) -> Iterator[NodeView]:
+        """Todos os nós em pré-ordem (a ordem dos arrays)"""
+        for index in range(len(self.kinds)):
+            yield NodeView(self, index)
+
+    # -----------------------
+    # Derivados
+    # -----------------------
+
+    def children(self, index: int) -> List[int]:
+        """Índices dos filhos do nó, na ordem dos campos"""
+        result = []
+        for source, slot in FIELDS[self.kinds[index]].values():
+            if source == "node":
+                child = (self.a, self.b, self.c)[slot][index]
+                if child != NONE:
+                    result.append(child)
+            elif source == "list":
+                start = self.a[index]
+                result.extend(self.lists[start:start + self.b[index]])
+        return result
+
+    def subtree_end(self, index: int) -> int:
+        """Fim (exclusivo) da sub-árvore do nó: em pré-ordem ela é o
+        intervalo contíguo [index, subtree_end(index))"""
+        while True:
+            children = self.children(index)
+            if not children:
+                return index + 1
+            index = children[-1]
+
+    def to_ast(self, index: int = 0) -> ASTNode:
+        """Reconstrói a (sub-)árvore de objetos a partir do nó `index`"""
+        with paused_gc():
+            return self._build(index)
+
+    def _build(self, index: int) -> ASTNode:
+        kinds, a, b, c, ops = self.kinds, self.a, self.b, self.c, self.ops
+        lines, columns, lists = self.lines, self.columns, self.lists
+        strings, constants = self.strings, self.constants
+        nodes: Dict[int, Any] = {}
+        take = nodes.pop
+        # Em pré-ordem os filhos têm índices maiores: de trás para a frente,
+        # cada nó é criado depois dos seus filhos (e sai de `nodes` ao ser
+        # usado pelo pai)
+        for i in range(self.subtree_end(index) - 1, index - 1, -1):
+            kind = kinds[i]
+            if kind == BINARY_OP:
+                node = BinaryOp(take(a[i]), OPERATORS[ops[i]], take(b[i]))
+            elif kind == IDENTIFIER:
+                node = Identifier(strings[a[i]])
+            elif kind == NUMBER:
+                node = Number(constants[b[i]], strings[a[i]])
+            elif kind == RELATIONAL_OP:
+                node = RelationalOp(take(a[i]), OPERATORS[ops[i]], take(b[i]))
+            elif kind == LOGICAL_OP:
+                node = LogicalOp(take(a[i]), OPERATORS[ops[i]], take(b[i]))
+            elif kind == LOGICAL_NOT:
+                node = LogicalNot(take(a[i]))
+            elif kind == UNARY_OP:
+                node = UnaryOp(OPERATORS[ops[i]], take(a[i]))
+            elif kind == BLOCK:
+                start = a[i]
+                node = Block([take(child) for child in
+                              lists[start:start + b[i]]])
+            elif kind == ASSIGNMENT:
+                node = Assignment(strings[a[i]], take(b[i]), lines[i],
+                                  columns[i])
+            elif kind == DECLARATION:
+                node = Declaration(bool(b[i]), strings[a[i]],
+                                   OPERATORS[ops[i]], lines[i], columns[i])
+            elif kind == READ:
+                node = Read(strings[a[i]], lines[i], columns[i])
+            elif kind == PRINT:
+                node = Print(strings[a[i]], bool(b[i]), lines[i], columns[i])
+            elif kind == CONDITIONAL:
+                node = Conditional(take(a[i]), take(b[i]),
+                                   None if c[i] == NONE else take(c[i]),
+                                   lines[i], columns[i])
+            elif kind == WHILE:
+                node = While(take(a[i]), take(b[i]), lines[i], columns[i])
+            else:
+                node = Program(take(a[i]))
+            nodes[i] = node
+        return nodes[index]
+
+    # -----------------------
+    # Formato binário
+    # -----------------------
+
+    def _columns(self) -> List[array]:
+        return [self.kinds, self.a, self.b, self.c, self.ops, self.lines,
+                self.columns]
+
+    def write(self, out: BinaryIO) -> int:
+        """Grava a arena no arquivo binário aberto; devolve os bytes escritos"""
+        out.write(ARENA_HEADER.pack(ARENA_MAGIC, ARENA_VERSION, len(self),
+                                    len(self.lists), len(self.strings),
+                                    len(self.constants)))
+        written = ARENA_HEADER.size
+        for arr in self._columns() + [self.lists]:
+            data = little_endian(arr)
+            out.write(data)
+            written += len(data) * data.itemsize
+        for text in self.strings:
+            data = text.encode("utf-8", "surrogatepass")
+            out.write(_LENGTH.pack(len(data)))
+            out.write(data)
+            written += _LENGTH.size + len(data)
+        for value in self.constants:
+            data = encode_literal(value)
+            out.write(data)
+            written += len(data)
+        return written
+
+    @classmethod
+    def read(cls, data: Any) -> AstArena:
+        """Carrega uma arena gravada por write() (bytes, mmap...)"""
+        data = memoryview(data)
+        if len(data) < ARENA_HEADER.size:
+            raise TokenFileError("AST binária: cabeçalho truncado")
+        magic, version, nodes, entries, n_strings, n_constants = (
+            ARENA_HEADER.unpack_from(data, 0))
+        if magic != ARENA_MAGIC or version != ARENA_VERSION:
+            raise TokenFileError("AST binária: formato ou versão inválidos")
+
+        arena = cls()
+        offset = ARENA_HEADER.size
+        try:
+            for arr in arena._columns() + [arena.lists]:
+                count = entries if arr is arena.lists else nodes
+                end = offset + count * arr.itemsize
+                if end > len(data):
+                    raise TokenFileError("AST binária: arquivo truncado")
+                arr.frombytes(data[offset:end])
+                if not _LITTLE:
+                    arr.byteswap()
+                offset = end
+            for _ in range(n_strings):
+                length = _LENGTH.unpack_from(data, offset)[0]
+                offset += _LENGTH.size
+                arena.strings.append(str(data[offset:offset + length], "utf-8",
+                                         "surrogatepass"))
+                offset += length
+            for _ in range(n_constants):
+                value, offset = decode_literal(data, offset)
+                arena.constants.append(value)
+            if offset > len(data):
+                raise TokenFileError("AST binária: arquivo truncado")
+        except struct.error:
+            raise TokenFileError("AST binária: arquivo truncado") from None
+        return arena
+
+    def nbytes(self) -> int:
+        """Memória aproximada dos arrays (sem as tabelas de strings)"""
+        return sum(arr.itemsize * len(arr)
+                   for arr in (self.kinds, self.a, self.b, self.c, self.ops,
+                               self.lines, self.columns, self.lists))
+
+
+class NodeView:
+    """
+    Visão somente leitura de um nó da arena, com os campos da classe
+    correspondente de parser.py. isinstance() e dataclasses.fields()
+    enxergam a classe do nó (via __class__ e __dataclass_fields__).
+    """
+
+    __slots__ = ("arena", "index")
+
+    def __init__(self, arena: AstArena, index: int) -> None:
+        object.__setattr__(self, "arena", arena)
+        object.__setattr__(self, "index", index)
+
+    @property
+    def __class__(self) -> type:
+        return self.arena.type_at(self.index)
+
+    @property
+    def __dataclass_fields__(self) -> Dict[str, Any]:
+        return self.arena.type_at(self.index).__dataclass_fields__
+
+    def __getattr__(self, name: str) -> Any:
+        try:
+            return self.arena.field(self.index, name)
+        except AttributeError:
+            # Anotações da análise semântica (slot, type_name...) não são
+            # guardadas na arena
+            if name in self.__dataclass_fields__:
+                return None
+            raise
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError("NodeView é somente leitura (use AstArena.to_ast())")
+
+    def __eq__(self, other: object) -> bool:
+        return (type(other) is NodeView and other.arena is self.arena
+                and other.index == self.index)
+
+    def __hash__(self) -> int:
+        return hash((id(self.arena), self.index))
+
+    def __repr__(self) -> str:
+        name = self.__class__.__name__
+        fields = ", ".join(f"{key}={self.arena.field(self.index, key)!r}"
+                           for key, (source, _) in
+                           FIELDS[self.arena.kinds[self.index]].items()
+                           if source not in ("node", "list"))
+        return f"{name}View#{self.index}({fields})"
+
+    def to_node(self) -> ASTNode:
+        """Sub-árvore deste nó como objetos de parser.py"""
+        return self.arena.to_ast(self.index)
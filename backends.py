@@ -0,0 +1,50 @@
+# backends.py
+"""
+Registro dos back-ends de execução
+
+Cada back-end expõe load(program) -> run(stdin, stdout): a preparação
+(compilação, validação de nomes) acontece em load e pode levantar
+CompileError; run executa e pode levantar ExecutionError. Os back-ends
+que geram código reaproveitável também recebem o cache em disco.
+"""
+
+from __future__ import annotations
+
+from typing import Callable, Dict, Optional, Set, TextIO
+
+import cgen
+import closures
+import interpreter
+import pygen
+import vm
+from cache import CompileCache
+from parser import Program
+
+Runner = Callable[[TextIO, TextIO], None]
+
+BACKENDS: Dict[str, Callable[[Program], Runner]] = {
+    "vm": vm.load,
+    "closure": closures.load,
+    "tree": interpreter.load,
+    "python": pygen.load,
+    "c": cgen.load,
+}
+
+# Back-ends cujo load aceita o cache em disco
+_CACHED = {"python", "c"}
+
+# Back-ends em que a redução de força de laços é aplicada (loops.py): em
+# código nativo ela não custa nada a mais. Nos interpretados, '*' e '%' custam
+# um despacho, como a soma que os substitui, e manter as variáveis reduzidas
+# só acrescenta trabalho a cada iteração.
+STRENGTH_REDUCTION: Set[str] = {"c"}
+
+DEFAULT_BACKEND = "vm"
+
+
+def load(program: Program, backend: str = DEFAULT_BACKEND,
+         cache: Optional[CompileCache] = None) -> Runner:
+    """Prepara o programa para execução no back-end escolhido"""
+    if backend in _CACHED:
+        return BACKENDS[backend](program, cache)
+    return BACKENDS[backend](program)
@@ -0,0 +1,149 @@
+# batch.py
+"""
+Compilação em lote
+
+Expande caminhos, globs e arquivos de manifesto em uma lista ordenada de
+arquivos e os distribui em um pool de processos. Os resultados são
+devolvidos na mesma ordem da entrada, independentemente de qual processo
+terminou primeiro.
+"""
+
+from __future__ import annotations
+
+import glob
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Iterable, Iterator, List, Optional
+
+# Situação final de cada arquivo
+PASSED = "passed"
+LEXICAL_ERRORS = "lexical_errors"
+SYNTAX_ERRORS = "syntax_errors"
+SEMANTIC_ERRORS = "semantic_errors"
+RUNTIME_ERRORS = "runtime_errors"
+TOO_DEEP = "too_deep"  # aninhamento além do limite de uma fase recursiva
+NOT_FOUND = "not_found"
+FAILED = "failed"
+
+# Código de saída de cada situação (o lote sai com o maior deles)
+EXIT_CODES = {
+    PASSED: 0,
+    LEXICAL_ERRORS: 1,
+    SYNTAX_ERRORS: 1,
+    SEMANTIC_ERRORS: 1,
+    RUNTIME_ERRORS: 1,
+    TOO_DEEP: 1,
+    NOT_FOUND: 2,
+    FAILED: 5,
+}
+
+
+@dataclass
+class FileResult:
+    """Resultado da análise de um arquivo do lote"""
+    path: str
+    status: str
+    output: str
+    seconds: float
+
+
+def _has_magic(pattern: str) -> bool:
+    return any(ch in pattern for ch in "*?[")
+
+
+def read_manifest(path: str) -> List[str]:
+    """
+    Lê um manifesto: um caminho ou glob por linha, '#' inicia comentário.
+    Caminhos relativos são resolvidos a partir do diretório do manifesto.
+    """
+    base = os.path.dirname(path)
+    entries = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            if not os.path.isabs(line):
+                line = os.path.join(base, line)
+            entries.append(line)
+    return entries
+
+
+def expand_inputs(patterns: Iterable[str],
+                  manifests: Iterable[str] = ()) -> List[str]:
+    """Expande caminhos/globs na ordem dada, sem repetir arquivos"""
+    entries = list(patterns)
+    for manifest in manifests:
+        entries.extend(read_manifest(manifest))
+
+    paths: List[str] = []
+    seen = set()
+    for entry in entries:
+        if _has_magic(entry):
+            matches = sorted(glob.glob(entry, recursive=True))
+            matches = [m for m in matches if os.path.isfile(m)]
+        else:
+            # Caminho literal: mantido mesmo se não existir, para o relatório
+            matches = [entry]
+        for path in matches:
+            key = os.path.normpath(path)
+            if key not in seen:
+                seen.add(key)
+                paths.append(path)
+    return paths
+
+
+def run_batch(paths: List[str], worker: Callable[[str], FileResult],
+              jobs: Optional[int] = None) -> Iterator[FileResult]:
+    """
+    Executa `worker` em cada caminho, com `jobs` processos (None: um por
+    CPU). Os resultados são gerados na ordem de `paths`.
+    """
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    jobs = max(1, min(jobs, len(paths)))
+
+    if jobs == 1:
+        for path in paths:
+            yield worker(path)
+        return
+
+    # Lotes pequenos por tarefa reduzem a comunicação entre processos
+    chunksize = max(1, len(paths) // (jobs * 8))
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        yield from executor.map(worker, paths, chunksize=chunksize)
+
+
+def exit_code(results: Iterable[FileResult]) -> int:
+    """Combina as situações dos arquivos em um único código de saída"""
+    return max((EXIT_CODES[r.status] for r in results), default=0)
+
+
+def summarize(results: List[FileResult], elapsed: float) -> str:
+    """Resumo agregado do lote"""
+    counts = {status: 0 for status in EXIT_CODES}
+    for r in results:
+        counts[r.status] += 1
+
+    lines = [
+        "=" * 60,
+        "RESUMO DO LOTE",
+        "=" * 60,
+        f"Arquivos analisados: {len(results)}",
+        f"  Aprovados: {counts[PASSED]}",
+        f"  Com erros lexicos: {counts[LEXICAL_ERRORS]}",
+        f"  Com erros sintaticos: {counts[SYNTAX_ERRORS]}",
+    ]
+    if counts[SEMANTIC_ERRORS]:
+        lines.append(f"  Com erros semanticos: {counts[SEMANTIC_ERRORS]}")
+    if counts[RUNTIME_ERRORS]:
+        lines.append(f"  Com erros de execucao: {counts[RUNTIME_ERRORS]}")
+    if counts[TOO_DEEP]:
+        lines.append(f"  Com aninhamento profundo demais: {counts[TOO_DEEP]}")
+    if counts[NOT_FOUND]:
+        lines.append(f"  Nao encontrados: {counts[NOT_FOUND]}")
+    if counts[FAILED]:
+        lines.append(f"  Falhas inesperadas: {counts[FAILED]}")
+    lines.append(f"Tempo total: {elapsed:.3f}s")
+    return "\n".join(lines)
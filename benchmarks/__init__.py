@@ -0,0 +1,2 @@
+# benchmarks/__init__.py
+"""Medições de desempenho do compilador (executar a partir da raiz do projeto)"""
@@ -0,0 +1,106 @@
+# benchmarks/arena.py
+"""
+Memória e percurso da AST de objetos e da AstArena
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.arena
+    python -m benchmarks.arena --size 10M --expression-size 8
+
+Gera um programa, faz o parse e mede (com tracemalloc) a memória da AST de
+objetos e da mesma árvore na AstArena, os tempos de conversão (from_ast e
+to_ast) e o de um percurso completo: profiling.ast_stats sobre os objetos,
+o mesmo ast_stats sobre as visões NodeView e a contagem de nós por tipo
+lida direto do array de tipos da arena (impressa ao final).
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+from typing import List
+
+from ast_arena import NODE_TYPES, AstArena
+from benchmarks.generator import GeneratorConfig, generate_program
+from benchmarks.harness import parse_size
+from lexer import Lexer
+from profiling import ast_stats
+from stack_parser import StackParser
+
+
+def traced(action):
+    """Resultado de action() e a memória alocada que ele mantém viva"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = action()
+        gc.collect()
+        size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return result, size
+
+
+def timed(action):
+    start = time.perf_counter()
+    result = action()
+    return result, time.perf_counter() - start
+
+
+def count_kinds(arena: AstArena) -> List[int]:
+    """Nós de cada tipo, lidos direto do array de tipos"""
+    counts = [0] * len(NODE_TYPES)
+    for kind in arena.kinds:
+        counts[kind] += 1
+    return counts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size", type=parse_size, default=parse_size("8M"),
+                        help="Tamanho do programa gerado (padrão: 8M, "
+                             "cerca de um milhão de nós)")
+    parser.add_argument("--expression-size", type=int, default=6,
+                        help="Operadores por expressão, em média (padrão: 6)")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="Semente do gerador (padrão: 0)")
+    args = parser.parse_args()
+
+    config = GeneratorConfig(depth=4, expression_size=args.expression_size,
+                             comment_density=0.0, seed=args.seed)
+    tokens = Lexer(generate_program(args.size, config)).tokenize()
+    ast, ast_bytes = traced(StackParser(tokens).parse)
+    del tokens
+    if ast is None:
+        raise SystemExit("Programa de benchmark inválido")
+
+    arena, arena_bytes = traced(lambda: AstArena.from_ast(ast))
+    nodes = len(arena)
+    print(f"Nós: {nodes}")
+    print(f"{'representação':<16}{'memória':>12}{'bytes/nó':>10}")
+    print(f"{'objetos':<16}{ast_bytes / 1e6:>10.1f}MB{ast_bytes / nodes:>10.1f}")
+    print(f"{'arena':<16}{arena_bytes / 1e6:>10.1f}MB"
+          f"{arena_bytes / nodes:>10.1f}")
+
+    # Tempos fora do tracemalloc, que encarece cada alocação
+    _, from_time = timed(lambda: AstArena.from_ast(ast))
+    _, to_time = timed(arena.to_ast)
+    _, objects_time = timed(lambda: ast_stats(ast))
+    _, views_time = timed(lambda: ast_stats(arena.root))
+    counts, kinds_time = timed(lambda: count_kinds(arena))
+    print(f"\n{'operação':<28}{'tempo':>10}{'ns/nó':>10}")
+    for name, seconds in [("from_ast", from_time), ("to_ast", to_time),
+                          ("ast_stats (objetos)", objects_time),
+                          ("ast_stats (NodeView)", views_time),
+                          ("varredura de kinds", kinds_time)]:
+        print(f"{name:<28}{seconds * 1000:>8.1f}ms"
+              f"{seconds / nodes * 1e9:>10.0f}")
+
+    # O resultado da varredura: a mesma contagem que ast_stats faz com objetos
+    print(f"\n{'tipo de nó':<16}{'nós':>10}")
+    for node_type, count in zip(NODE_TYPES, counts):
+        if count:
+            print(f"{node_type.__name__:<16}{count:>10}")
+
+
+if __name__ == "__main__":
+    main()
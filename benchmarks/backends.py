@@ -0,0 +1,161 @@
+# benchmarks/backends.py
+"""
+Comparação dos back-ends de execução em programas dominados por laços
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.backends
+    python -m benchmarks.backends --scale 10 --repeat 5 --backend vm closure
+"""
+
+import argparse
+import io
+import time
+from typing import Dict, List
+
+from backends import BACKENDS, load
+from lexer import Lexer
+from parser import Parser
+
+# Cada programa recebe o número de iterações via read(n)
+PROGRAMS: Dict[str, str] = {
+    "soma_multiplos": """
+fn main() {
+    let mut n:i32;
+    let mut i:i32;
+    let mut s:i32;
+    read(n);
+    i = 0;
+    s = 0;
+    while i < n {
+        if i % 3 == 0 || i % 5 == 0 {
+            s = s + i * 2;
+        }
+        i = i + 1;
+    }
+    print!(s);
+}
+""",
+    "lacos_aninhados": """
+fn main() {
+    let mut n:i32;
+    let mut i:i32;
+    let mut j:i32;
+    let mut t:i32;
+    read(n);
+    i = 0;
+    t = 0;
+    while i < n / 100 {
+        j = 0;
+        while j < 100 {
+            t = t + (i * j) % 7 - j / 3;
+            j = j + 1;
+        }
+        i = i + 1;
+    }
+    print!(t);
+}
+""",
+    "ponto_flutuante": """
+fn main() {
+    let mut n:i32;
+    let mut i:i32;
+    let mut x:f64;
+    let mut acc:f64;
+    read(n);
+    i = 1;
+    acc = 0.0;
+    while i <= n {
+        x = i;
+        acc = acc + 1.0 / (x * x);
+        i = i + 1;
+    }
+    print!(acc);
+}
+""",
+    "collatz": """
+fn main() {
+    let mut n:i32;
+    let mut k:i32;
+    let mut x:i32;
+    let mut passos:i32;
+    read(n);
+    k = 1;
+    passos = 0;
+    while k < n / 50 {
+        x = k;
+        while x != 1 {
+            if x % 2 == 0 {
+                x = x / 2;
+            } else {
+                x = 3 * x + 1;
+            }
+            passos = passos + 1;
+        }
+        k = k + 1;
+    }
+    print!(passos);
+}
+""",
+}
+
+
+def parse_program(source: str):
+    parser = Parser(Lexer(source).tokenize())
+    ast = parser.parse()
+    if parser.errors or ast is None:
+        raise SystemExit(f"Programa de benchmark inválido: {parser.errors}")
+    return ast
+
+
+def measure(ast, backend: str, iterations: int, repeat: int) -> Dict[str, float]:
+    """Melhor tempo de preparação e de execução em `repeat` rodadas"""
+    best_load = best_run = float("inf")
+    output = ""
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run = load(ast, backend)
+        loaded = time.perf_counter()
+        out = io.StringIO()
+        run(io.StringIO(str(iterations)), out)
+        finished = time.perf_counter()
+        best_load = min(best_load, loaded - start)
+        best_run = min(best_run, finished - loaded)
+        output = out.getvalue()
+    return {"load": best_load, "run": best_run, "output": output}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="Multiplicador do número de iterações (padrão: 1)")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Rodadas por medição; vale a melhor (padrão: 3)")
+    parser.add_argument("--backend", nargs="+", choices=list(BACKENDS),
+                        default=["tree", "vm", "closure", "python"],
+                        help="Back-ends comparados (o primeiro é a referência)")
+    parser.add_argument("--program", nargs="+", choices=list(PROGRAMS),
+                        default=list(PROGRAMS), help="Programas medidos")
+    args = parser.parse_args()
+
+    iterations = int(100_000 * args.scale)
+    reference = args.backend[0]
+    print(f"Iterações: {iterations}  (referência: {reference})")
+    print(f"{'programa':<18}{'back-end':<10}{'preparo':>10}{'execução':>11}"
+          f"{'ganho':>8}")
+
+    for name in args.program:
+        ast = parse_program(PROGRAMS[name])
+        results: Dict[str, Dict[str, float]] = {}
+        for backend in args.backend:
+            results[backend] = measure(ast, backend, iterations, args.repeat)
+        outputs: List[str] = [r["output"] for r in results.values()]
+        base = results[reference]["run"]
+        for backend, r in results.items():
+            print(f"{name:<18}{backend:<10}{r['load'] * 1000:>8.2f}ms"
+                  f"{r['run']:>10.3f}s{base / r['run']:>7.2f}x")
+        if any(o != outputs[0] for o in outputs):
+            print(f"  AVISO: saídas diferentes entre back-ends em {name}")
+
+
+if __name__ == "__main__":
+    main()
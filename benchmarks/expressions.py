@@ -0,0 +1,65 @@
+# benchmarks/expressions.py
+"""
+Microbenchmark do parser em código dominado por expressões
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.expressions
+    python -m benchmarks.expressions --size 200K --expression-size 20
+
+Gera um programa com poucos blocos e expressões longas (aritméticas e
+condições com '&&', '||' e '!') e mede, para cada parser, o melhor tempo de
+parse, a vazão em tokens/s e o número de chamadas de função Python por
+token (contadas com cProfile, em uma rodada separada).
+"""
+
+import argparse
+import cProfile
+import pstats
+import time
+
+from benchmarks.generator import GeneratorConfig, generate_program
+from benchmarks.harness import parse_size
+from lexer import Lexer
+from stack_parser import PARSERS
+
+
+def count_calls(parser_class, tokens) -> int:
+    profiler = cProfile.Profile()
+    profiler.enable()
+    parser_class(tokens).parse()
+    profiler.disable()
+    return pstats.Stats(profiler).total_calls
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size", type=parse_size, default=parse_size("100K"),
+                        help="Tamanho do programa gerado (padrão: 100K)")
+    parser.add_argument("--expression-size", type=int, default=12,
+                        help="Operadores por expressão, em média (padrão: 12)")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="Rodadas por medição; vale a melhor (padrão: 5)")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="Semente do gerador (padrão: 0)")
+    args = parser.parse_args()
+
+    config = GeneratorConfig(depth=1, expression_size=args.expression_size,
+                             comment_density=0.0, string_density=0.0,
+                             seed=args.seed)
+    tokens = Lexer(generate_program(args.size, config)).tokenize()
+    print(f"Tokens: {len(tokens)}")
+    print(f"{'parser':<12}{'parse':>10}{'tokens/s':>12}{'chamadas/token':>16}")
+
+    for name, parser_class in PARSERS.items():
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            parser_class(tokens).parse()
+            best = min(best, time.perf_counter() - start)
+        calls = count_calls(parser_class, tokens)
+        print(f"{name:<12}{best * 1000:>8.1f}ms{len(tokens) / best:>12.0f}"
+              f"{calls / len(tokens):>16.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+# benchmarks/generator.py
+"""
+Gerador de programas sintéticos válidos, de qualquer tamanho
+
+Os programas seguem a gramática (gramática_ckp2_ter_noite.txt) e passam
+pelas análises léxica, sintática e semântica; também executam sem erros e
+terminam: laços têm contador próprio com limite pequeno, divisões usam
+divisores constantes não nulos e não há read (a execução não precisa de
+entrada).
+
+Parâmetros ajustáveis (GeneratorConfig):
+- depth: aninhamento máximo de blocos (if / while / bloco);
+- expression_size: número médio de operadores por expressão;
+- comment_density: fração de comandos precedidos por um comentário;
+- string_density: fração de print! que escrevem cadeias;
+- identifier_length: comprimento dos nomes das variáveis.
+
+Condições evitam as formas que o parser rejeita: um operando relacional só
+começa com '(' na forma (expr) op expr, e um grupo entre parênteses começa
+com uma comparação simples.
+"""
+
+from __future__ import annotations
+
+import random
+from dataclasses import dataclass
+from typing import List
+
+RELATIONAL = ["<", ">", "<=", ">=", "==", "!="]
+WORDS = ["valor", "soma", "total", "ok", "linha", "resultado", "teste",
+         "contagem", "média", "fim"]
+
+
+@dataclass
+class GeneratorConfig:
+    """Forma dos programas gerados"""
+    depth: int = 4
+    expression_size: int = 3
+    comment_density: float = 0.1
+    string_density: float = 0.3
+    identifier_length: int = 6
+    variables: int = 8
+    seed: int = 0
+
+
+class ProgramGenerator:
+    """Gera o texto de um programa com aproximadamente o tamanho pedido"""
+
+    def __init__(self, config: GeneratorConfig) -> None:
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.parts: List[str] = []
+        self.size = 0
+        self.loops = 0
+        length = max(1, config.identifier_length)
+        self.ints = [self.name("i", n, length) for n in range(config.variables)]
+        self.floats = [self.name("f", n, length)
+                       for n in range(max(1, config.variables // 2))]
+
+    @staticmethod
+    def name(prefix: str, number: int, length: int) -> str:
+        base = f"{prefix}{number}"
+        return base + "_" * max(0, length - len(base))
+
+    def emit(self, text: str) -> None:
+        self.parts.append(text)
+        self.size += len(text)
+
+    def generate(self, size: int) -> str:
+        self.emit("fn main() {\n")
+        for name in self.ints:
+            self.emit(f"    let mut {name}:i32;\n")
+        for name in self.floats:
+            self.emit(f"    let mut {name}:f64;\n")
+        while self.size < size:
+            self.command(1)
+        self.emit("}\n")
+        return "".join(self.parts)
+
+    # -----------------------
+    # Comandos
+    # -----------------------
+
+    def command(self, level: int) -> None:
+        rng = self.rng
+        indent = "    " * level
+        if rng.random() < self.config.comment_density:
+            self.comment(indent)
+        k = rng.random()
+        nested = level <= self.config.depth
+        if not nested or k < 0.55:
+            self.simple(indent)
+        elif k < 0.75:
+            self.emit(f"{indent}if {self.condition()} {{\n")
+            self.block(level + 1)
+            if rng.random() < 0.5:
+                self.emit(f"{indent}}} else {{\n")
+                self.block(level + 1)
+            self.emit(f"{indent}}}\n")
+        elif k < 0.9:
+            # Laço limitado por um contador próprio
+            self.loops += 1
+            counter = f"w{self.loops}"
+            self.emit(f"{indent}let mut {counter}:i32;\n")
+            self.emit(f"{indent}{counter} = 0;\n")
+            condition = f"{counter} < {rng.randint(1, 2)}"
+            if rng.random() < 0.5:
+                # Entre parênteses: um '||' não pode escapar do limite
+                condition += f" && ({self.condition()})"
+            self.emit(f"{indent}while {condition} {{\n")
+            self.emit(f"{indent}    {counter} = {counter} + 1;\n")
+            self.block(level + 1)
+            self.emit(f"{indent}}}\n")
+        else:
+            self.emit(f"{indent}{{\n")
+            self.block(level + 1)
+            self.emit(f"{indent}}}\n")
+
+    def block(self, level: int) -> None:
+        for _ in range(self.rng.randint(1, 3)):
+            self.command(level)
+
+    def simple(self, indent: str) -> None:
+        rng = self.rng
+        k = rng.random()
+        if k < 0.7:
+            if rng.random() < 0.7:
+                target, is_float = rng.choice(self.ints), False
+            else:
+                target, is_float = rng.choice(self.floats), True
+            self.emit(f"{indent}{target} = {self.expression(is_float)};\n")
+        elif rng.random() < self.config.string_density:
+            self.emit(f"{indent}print!({self.string()});\n")
+        else:
+            self.emit(f"{indent}print!({rng.choice(self.ints + self.floats)});\n")
+
+    def comment(self, indent: str) -> None:
+        words = " ".join(self.rng.choice(WORDS)
+                         for _ in range(self.rng.randint(2, 10)))
+        if self.rng.random() < 0.5:
+            self.emit(f"{indent}// {words}\n")
+        else:
+            self.emit(f"{indent}/* {words}\n{indent}   {words} */\n")
+
+    def string(self) -> str:
+        words = " ".join(self.rng.choice(WORDS)
+                         for _ in range(self.rng.randint(1, 6)))
+        if self.rng.random() < 0.2:
+            words += "\\n\\t\\\"fim\\\""
+        return f'"{words}"'
+
+    # -----------------------
+    # Expressões
+    # -----------------------
+
+    def operand(self, is_float: bool) -> str:
+        rng = self.rng
+        k = rng.random()
+        if k < 0.5:
+            pool = self.ints + self.floats if is_float else self.ints
+            return rng.choice(pool)
+        if is_float and k < 0.75:
+            return f"{rng.randint(0, 99)}.{rng.randint(0, 99)}"
+        return str(rng.randint(0, 1000))
+
+    def expression(self, is_float: bool = False, size: int = -1) -> str:
+        """Expressão com cerca de expression_size operadores; começa sempre
+        com um operando simples (não com '(')"""
+        rng = self.rng
+        if size < 0:
+            size = rng.randint(0, 2 * self.config.expression_size)
+        text = self.operand(is_float)
+        for _ in range(size):
+            k = rng.random()
+            if k < 0.15:
+                # Divisor constante não nulo: nunca falha
+                text += f" {rng.choice('/%')} {rng.randint(1, 9)}"
+            elif k < 0.3 and size > 1:
+                inner = self.expression(is_float, rng.randint(1, 2))
+                text += f" {rng.choice('+-*')} ({inner})"
+            else:
+                text += f" {rng.choice('+-*')} {self.operand(is_float)}"
+        return text
+
+    def comparison(self) -> str:
+        is_float = self.rng.random() < 0.2
+        return (f"{self.expression(is_float, self.rng.randint(0, 2))} "
+                f"{self.rng.choice(RELATIONAL)} "
+                f"{self.expression(is_float, self.rng.randint(0, 2))}")
+
+    def condition(self, level: int = 0) -> str:
+        rng = self.rng
+        text = self.comparison()
+        while rng.random() < 0.35:
+            operator = rng.choice(["&&", "||"])
+            k = rng.random()
+            if k < 0.25 and level < 2:
+                text += f" {operator} ({self.condition(level + 1)})"
+            elif k < 0.4:
+                text += f" {operator} !{self.comparison()}"
+            else:
+                text += f" {operator} {self.comparison()}"
+        return text
+
+
+def generate_program(size: int, config: GeneratorConfig = GeneratorConfig()
+                     ) -> str:
+    """Programa válido com pelo menos `size` caracteres"""
+    return ProgramGenerator(config).generate(size)
+
+
+# -----------------------
+# Entradas patológicas
+# -----------------------
+
+def nested_parentheses(depth: int) -> str:
+    """Atribuição com `depth` parênteses aninhados"""
+    return ("fn main() {\n    let mut a:i32;\n    a = " + "(" * depth + "1"
+            + ")" * depth + ";\n    print!(a);\n}\n")
+
+
+def huge_comment(size: int) -> str:
+    """Programa mínimo precedido de um comentário de bloco de `size` bytes"""
+    line = "comentario comprido " * 4 + "\n"
+    body = line * max(1, size // len(line))
+    return ("/*\n" + body + "*/\nfn main() {\n    let mut a:i32;\n"
+            "    a = 1;\n    print!(a);\n}\n")
+
+
+def long_identifiers(length: int, count: int = 4) -> str:
+    """Variáveis com nomes de `length` caracteres, usadas algumas vezes"""
+    names = [f"v{n}" + "x" * max(0, length - 2) for n in range(count)]
+    lines = ["fn main() {"]
+    lines += [f"    let mut {name}:i32;" for name in names]
+    for i, name in enumerate(names):
+        lines.append(f"    {name} = {names[i - 1]} + {i};")
+    lines += [f"    print!({name});" for name in names]
+    return "\n".join(lines) + "\n}\n"
@@ -0,0 +1,311 @@
+# benchmarks/harness.py
+"""
+Vazão do analisador léxico e do sintático em programas sintéticos
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.harness
+    python -m benchmarks.harness --sizes 1K 10M 100M --repeat 5
+    python -m benchmarks.harness --save base.json
+    python -m benchmarks.harness --baseline base.json --threshold 0.2
+
+Para cada tamanho, gera um programa (benchmarks/generator.py) e mede o
+melhor tempo de Lexer.tokenize, do parse (Parser ou StackParser, com
+--parser) e, até --run-limit, da execução na VM. Os casos patológicos (parênteses profundamente aninhados,
+comentário de bloco enorme, identificadores muito longos) entram na mesma
+tabela; uma falha neles (RecursionError, por exemplo) vira o status do
+caso em vez de interromper a medição.
+
+O resultado é um JSON com o ambiente e as medições. --save grava esse JSON
+como referência; --baseline compara a vazão (bytes/s) de cada caso com a
+referência e termina com código 1 se alguma fase ficar mais lenta que o
+limite (--threshold, fração da vazão de referência).
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import semantic
+from backends import load
+from benchmarks.generator import (GeneratorConfig, generate_program,
+                                  huge_comment, long_identifiers,
+                                  nested_parentheses)
+from lexer import Lexer, TokenType
+from stack_parser import PARSERS
+
+DEFAULT_SIZES = ["1K", "10K", "100K", "1M"]
+UNITS = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+
+# Fases comparadas com a referência
+PHASES = ["lexico", "sintatico", "execucao"]
+
+
+def parse_size(text: str) -> int:
+    """'100K', '10MB', '1M', '4096' -> número de bytes"""
+    value = text.strip().upper()
+    if value.endswith("B"):
+        value = value[:-1]
+    unit = value[-1] if value and value[-1] in "KMG" else ""
+    number = value[:-1] if unit else value
+    try:
+        return int(float(number) * UNITS[unit])
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"tamanho inválido: {text}")
+
+
+def format_size(size: int) -> str:
+    for unit in ("G", "M", "K"):
+        if size >= UNITS[unit] and size % UNITS[unit] == 0:
+            return f"{size // UNITS[unit]}{unit}"
+    return str(size)
+
+
+def best_of(repeat: int, action: Callable[[], Any]) -> Dict[str, Any]:
+    """Melhor tempo de `repeat` execuções e o resultado da última"""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = action()
+        best = min(best, time.perf_counter() - start)
+    return {"time": best, "result": result}
+
+
+def repeats_for(size: int, repeat: int) -> int:
+    """Entradas grandes são medidas menos vezes"""
+    if size >= 10 * UNITS["M"]:
+        return 1
+    if size >= UNITS["M"]:
+        return min(repeat, 2)
+    return repeat
+
+
+# -----------------------
+# Medição
+# -----------------------
+
+def measure_case(name: str, text: str, repeat: int, execute: bool,
+                 parser_name: str = "recursive") -> Dict[str, Any]:
+    """Tempos e vazões de um programa; falhas ficam em 'status'"""
+    size = len(text.encode("utf-8"))
+    case: Dict[str, Any] = {"name": name, "bytes": size, "status": "ok",
+                            "phases": {}}
+    phases = case["phases"]
+
+    def record(phase: str, seconds: float) -> None:
+        phases[phase] = {
+            "time": seconds,
+            "bytes_per_second": size / seconds if seconds > 0 else None,
+        }
+        if "tokens" in case and seconds > 0:
+            phases[phase]["tokens_per_second"] = case["tokens"] / seconds
+
+    try:
+        lexed = best_of(repeat, lambda: Lexer(text).tokenize())
+        tokens = lexed["result"]
+        case["tokens"] = len(tokens)
+        record("lexico", lexed["time"])
+        if any(tok.type == TokenType.LEXICAL_ERROR for tok in tokens):
+            case["status"] = "erro lexico"
+            return case
+
+        def parse():
+            parser = PARSERS[parser_name](tokens)
+            return parser, parser.parse()
+
+        parsed = best_of(repeat, parse)
+        record("sintatico", parsed["time"])
+        parser, ast = parsed["result"]
+        if parser.errors or ast is None:
+            case["status"] = "erro sintatico"
+            return case
+        if semantic.analyze(ast):
+            case["status"] = "erro semantico"
+            return case
+        if execute:
+            run = load(ast)
+
+            def execution():
+                out = io.StringIO()
+                run(io.StringIO(""), out)
+                return out
+
+            record("execucao", best_of(repeat, execution)["time"])
+    except RecursionError:
+        case["status"] = "RecursionError"
+    except MemoryError:
+        case["status"] = "MemoryError"
+    except Exception as e:
+        case["status"] = f"{type(e).__name__}: {e}"
+    return case
+
+
+def pathological_cases(scale: int) -> Dict[str, str]:
+    return {
+        "parenteses_1000": nested_parentheses(1000),
+        "parenteses_100": nested_parentheses(100),
+        "comentario_enorme": huge_comment(scale),
+        "identificadores_longos": long_identifiers(scale // 8),
+    }
+
+
+def environment() -> Dict[str, Any]:
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpus": os.cpu_count(),
+        "recursion_limit": sys.getrecursionlimit(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def run_suite(sizes: List[int], repeat: int, run_limit: int,
+              config: GeneratorConfig, pathological: bool,
+              parser_name: str = "recursive") -> Dict[str, Any]:
+    cases = []
+    for size in sizes:
+        text = generate_program(size, config)
+        name = f"sintetico_{format_size(size)}"
+        case = measure_case(name, text, repeats_for(size, repeat),
+                            size <= run_limit, parser_name)
+        del text
+        cases.append(case)
+        print_case(case)
+    if pathological:
+        for name, text in pathological_cases(UNITS["M"]).items():
+            case = measure_case(name, text, repeat, True, parser_name)
+            cases.append(case)
+            print_case(case)
+    return {
+        "environment": environment(),
+        "parser": parser_name,
+        "config": vars(config),
+        "cases": cases,
+    }
+
+
+# -----------------------
+# Comparação com a referência
+# -----------------------
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any],
+            threshold: float) -> List[str]:
+    """Casos e fases cuja vazão caiu mais que `threshold`"""
+    previous = {case["name"]: case for case in baseline.get("cases", [])}
+    regressions = []
+    for case in results["cases"]:
+        before = previous.get(case["name"])
+        if before is None:
+            continue
+        if before["status"] == "ok" and case["status"] != "ok":
+            regressions.append(f"{case['name']}: {case['status']} "
+                               f"(referência: ok)")
+            continue
+        for phase in PHASES:
+            old = before["phases"].get(phase, {}).get("bytes_per_second")
+            new = case["phases"].get(phase, {}).get("bytes_per_second")
+            if not old or not new:
+                continue
+            if new < old * (1 - threshold):
+                regressions.append(
+                    f"{case['name']} / {phase}: {new / 1e6:.2f} MB/s "
+                    f"(referência {old / 1e6:.2f} MB/s, "
+                    f"{(new / old - 1) * 100:+.1f}%)")
+    return regressions
+
+
+def print_case(case: Dict[str, Any]) -> None:
+    columns = []
+    for phase in PHASES:
+        data = case["phases"].get(phase)
+        if data and data["bytes_per_second"]:
+            columns.append(f"{data['bytes_per_second'] / 1e6:>10.2f}")
+        else:
+            columns.append(f"{'-':>10}")
+    print(f"{case['name']:<26}{format_size(case['bytes']):>8}"
+          f"{''.join(columns)}  {case['status']}", file=sys.stderr)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", nargs="+", type=parse_size,
+                        default=[parse_size(s) for s in DEFAULT_SIZES],
+                        help="Tamanhos dos programas: 1K, 10M, 100MB... "
+                             "(padrão: 1K 10K 100K 1M)")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Rodadas por medição; vale a melhor (padrão: 3)")
+    parser.add_argument("--run-limit", type=parse_size, default=parse_size("1M"),
+                        help="Maior tamanho também executado na VM "
+                             "(padrão: 1M)")
+    parser.add_argument("--depth", type=int, default=4,
+                        help="Aninhamento máximo de blocos (padrão: 4)")
+    parser.add_argument("--expression-size", type=int, default=3,
+                        help="Operadores por expressão, em média (padrão: 3)")
+    parser.add_argument("--comment-density", type=float, default=0.1,
+                        help="Fração de comandos com comentário (padrão: 0.1)")
+    parser.add_argument("--string-density", type=float, default=0.3,
+                        help="Fração de print! com cadeias (padrão: 0.3)")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="Semente do gerador (padrão: 0)")
+    parser.add_argument("--parser", choices=list(PARSERS),
+                        default="recursive",
+                        help="Parser medido (padrão: recursive)")
+    parser.add_argument("--no-pathological", action="store_true",
+                        help="Não mede os casos patológicos")
+    parser.add_argument("--output", metavar="ARQUIVO",
+                        help="Grava o JSON do resultado (padrão: stdout)")
+    parser.add_argument("--save", metavar="ARQUIVO",
+                        help="Grava o resultado como referência")
+    parser.add_argument("--baseline", metavar="ARQUIVO",
+                        help="Compara com uma referência gravada por --save")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Queda de vazão tolerada em relação à referência "
+                             "(padrão: 0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    config = GeneratorConfig(depth=args.depth,
+                             expression_size=args.expression_size,
+                             comment_density=args.comment_density,
+                             string_density=args.string_density,
+                             seed=args.seed)
+    print(f"{'caso':<26}{'tamanho':>8}{'lex MB/s':>10}{'sint MB/s':>10}"
+          f"{'exec MB/s':>10}  status", file=sys.stderr)
+    results = run_suite(args.sizes, args.repeat, args.run_limit, config,
+                        not args.no_pathological, args.parser)
+
+    text = json.dumps(results, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    elif not args.save:
+        print(text)
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        print(f"Referência gravada em {args.save}", file=sys.stderr)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\nREGRESSÕES (limite {args.threshold:.0%}):",
+                  file=sys.stderr)
+            for line in regressions:
+                print(f"  {line}", file=sys.stderr)
+            return 1
+        print(f"\nSem regressões em relação a {args.baseline}",
+              file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+# benchmarks/nesting.py
+"""
+Tempo de parse em função da profundidade de aninhamento
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.nesting
+    python -m benchmarks.nesting --depths 1 10 100 1000 10000 --parser stack
+
+Para cada forma de aninhamento (grupos de condições, grupos que começam com
+parênteses aritméticos, negações, parênteses aritméticos, blocos if) e cada
+profundidade, gera um programa e mede o melhor tempo de parse e o tempo por
+token. Com o parse linear, o tempo por token fica constante quando a
+profundidade cresce. O parser recursivo roda com o limite de recursão
+elevado conforme a profundidade; se mesmo assim faltar pilha, o caso
+aparece como RecursionError.
+"""
+
+import argparse
+import sys
+import time
+from typing import Callable, Dict
+
+from lexer import Lexer
+from stack_parser import PARSERS
+
+# Forma de aninhamento -> programa com a profundidade pedida
+SHAPES: Dict[str, Callable[[int], str]] = {
+    "grupos": lambda d: (
+        "fn main() { if " + "(a + 1 > b * 2 && " * d + "c > d" + ")" * d
+        + " { } }"),
+    "grupos_parenteses": lambda d: (
+        "fn main() { if " + "((a + 1) > b * 2 && " * d + "c > d" + ")" * d
+        + " { } }"),
+    "negacoes": lambda d: (
+        "fn main() { if " + "!(a > b || " * d + "c > d" + ")" * d + " { } }"),
+    "parenteses": lambda d: (
+        "fn main() { x = " + "(a + " * d + "1" + ")" * d + "; }"),
+    "blocos_if": lambda d: (
+        "fn main() { " + "if (a) > b { " * d + "x = 1; " + "} else { } " * d
+        + "}"),
+}
+
+
+def measure(parser_class, tokens, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parser = parser_class(tokens)
+        parser.parse()
+        best = min(best, time.perf_counter() - start)
+    if parser.errors:
+        raise SystemExit(f"Programa de benchmark inválido: {parser.errors[0]}")
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--depths", nargs="+", type=int,
+                        default=[1, 10, 100, 1000],
+                        help="Profundidades medidas (padrão: 1 10 100 1000)")
+    parser.add_argument("--parser", nargs="+", choices=list(PARSERS),
+                        default=list(PARSERS), help="Parsers medidos")
+    parser.add_argument("--shape", nargs="+", choices=list(SHAPES),
+                        default=list(SHAPES), help="Formas de aninhamento")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="Rodadas por medição; vale a melhor (padrão: 5)")
+    args = parser.parse_args()
+
+    print(f"{'forma':<20}{'parser':<12}{'profund.':>9}{'tokens':>9}"
+          f"{'parse':>11}{'us/token':>10}")
+    limit = sys.getrecursionlimit()
+    for shape in args.shape:
+        for name in args.parser:
+            for depth in args.depths:
+                tokens = Lexer(SHAPES[shape](depth)).tokenize()
+                # Alguns quadros por nível (bloco, comando, expressão, prefixo)
+                sys.setrecursionlimit(max(limit, 10 * depth + 1000))
+                try:
+                    seconds = measure(PARSERS[name], tokens, args.repeat)
+                except RecursionError:
+                    print(f"{shape:<20}{name:<12}{depth:>9}{len(tokens):>9}"
+                          f"{'RecursionError':>21}")
+                    continue
+                finally:
+                    sys.setrecursionlimit(limit)
+                print(f"{shape:<20}{name:<12}{depth:>9}{len(tokens):>9}"
+                      f"{seconds * 1000:>9.2f}ms"
+                      f"{seconds / len(tokens) * 1e6:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+# cache.py
+"""
+Cache persistente de resultados da compilação
+
+Os resultados (tokens, AST e erros) são gravados em disco sob uma chave
+derivada do hash do código-fonte mais uma impressão digital do compilador
+(conteúdo dos módulos do front-end e versão do Python). Assim, qualquer
+mudança no lexer/parser invalida o cache automaticamente.
+
+- Escritas atômicas: arquivo temporário no mesmo diretório + os.replace(),
+  de modo que processos concorrentes (modo lote) nunca leem um arquivo pela
+  metade.
+- Limite de tamanho com descarte LRU: cada acerto atualiza o mtime do
+  arquivo, e os mais antigos são removidos quando o limite é ultrapassado.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import pickle
+import sys
+import tempfile
+from typing import Any, Dict, Optional, Tuple
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache",
+                                 "compilador")
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+_fingerprint: Optional[str] = None
+
+
+def compiler_fingerprint() -> str:
+    """Hash dos módulos que determinam o resultado da análise"""
+    global _fingerprint
+    if _fingerprint is None:
+        import lexer
+        import parser
+        import stack_parser
+        import token_buffer
+
+        h = hashlib.sha256(sys.version.encode())
+        for module in (lexer, parser, stack_parser, token_buffer):
+            with open(module.__file__, "rb") as f:
+                h.update(f.read())
+        _fingerprint = h.hexdigest()
+    return _fingerprint
+
+
+class CompileCache:
+    """Cache em disco endereçado pelo conteúdo"""
+
+    def __init__(self, directory: str = DEFAULT_CACHE_DIR,
+                 max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._size: Optional[int] = None  # estimativa local do tamanho total
+
+    def key(self, text: str) -> str:
+        """Chave de um código-fonte para esta versão do compilador"""
+        h = hashlib.sha256(compiler_fingerprint().encode())
+        h.update(text.encode("utf-8", "surrogatepass"))
+        return h.hexdigest()
+
+    def _path(self, key: str, kind: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.{kind}.pickle")
+
+    def load(self, key: str, kind: str) -> Optional[Any]:
+        """Devolve o valor guardado ou None (ausente ou ilegível)"""
+        path = self._path(key, kind)
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # Arquivo corrompido ou de formato antigo: trata como ausente
+            return None
+        try:
+            os.utime(path)  # marca como usado recentemente (LRU)
+        except OSError:
+            pass
+        return value
+
+    def store(self, key: str, kind: str, value: Any) -> None:
+        """Grava o valor atomicamente; falhas de escrita são ignoradas"""
+        path = self._path(key, kind)
+        folder = os.path.dirname(path)
+        try:
+            os.makedirs(folder, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=folder, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+                size = os.path.getsize(tmp)
+                os.replace(tmp, path)
+            except BaseException:
+                os.unlink(tmp)
+                raise
+        except (OSError, pickle.PicklingError, RecursionError):
+            return
+
+        if self._size is None:
+            self._size = self._scan()[0]
+        else:
+            self._size += size
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def _scan(self) -> Tuple[int, Dict[str, Tuple[float, int]]]:
+        """Tamanho total e (mtime, tamanho) de cada entrada"""
+        entries: Dict[str, Tuple[float, int]] = {}
+        total = 0
+        try:
+            folders = list(os.scandir(self.directory))
+        except FileNotFoundError:
+            return 0, entries
+        for folder in folders:
+            if not folder.is_dir():
+                continue
+            for entry in os.scandir(folder.path):
+                if not entry.name.endswith(".pickle"):
+                    continue
+                try:
+                    st = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries[entry.path] = (st.st_mtime, st.st_size)
+                total += st.st_size
+        return total, entries
+
+    def evict(self) -> None:
+        """Remove as entradas menos usadas até respeitar o limite"""
+        total, entries = self._scan()
+        for path, (_, size) in sorted(entries.items(),
+                                      key=lambda item: item[1][0]):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        self._size = total
+
+    def clear(self) -> None:
+        """Remove todas as entradas"""
+        for path in self._scan()[1]:
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+        self._size = 0
+
+
+_instances: Dict[Tuple[str, int], CompileCache] = {}
+
+
+def get_cache(directory: str = DEFAULT_CACHE_DIR,
+              max_bytes: int = DEFAULT_MAX_BYTES) -> CompileCache:
+    """Instância compartilhada por processo (evita reescanear o diretório)"""
+    key = (directory, max_bytes)
+    cache = _instances.get(key)
+    if cache is None:
+        cache = _instances[key] = CompileCache(directory, max_bytes)
+    return cache
@@ -0,0 +1,532 @@
+# cgen.py
+"""
+Back-end de execução por tradução para C
+
+Gera um programa C autônomo equivalente ao programa e o compila com o
+compilador C do sistema (cc, ou o indicado em $CC):
+- i32 vira int32_t e f64 vira double; cada variável é uma variável local
+  de main, zerada na declaração;
+- somas, subtrações e multiplicações de i32 são feitas em uint32_t (volta
+  em 32 bits sem comportamento indefinido); '/' e '%' chamam funções que
+  detectam a divisão por zero e tratam INT32_MIN / -1 como a linguagem;
+- f64 segue IEEE 754 (sem -ffast-math): '/' nativo, '%' com fmod;
+- read e print! usam leitor e escritor bufferizados próprios, com as mesmas
+  mensagens de erro e o mesmo formato de saída ("%.15g", NaN, inf, -inf)
+  de runtime.py.
+
+Operandos que podem falhar são avaliados da esquerda para a direita (a
+ordem de avaliação de C não é definida), para que o primeiro erro seja o
+mesmo dos outros back-ends. Um erro de execução descarrega a saída já
+escrita e termina o processo com ERROR_STATUS, escrevendo "linha:mensagem"
+na saída de erro; o lado Python o transforma em ExecutionError.
+
+O executável é guardado em memória e, se houver cache em disco, sob o hash
+do código C gerado (e do compilador usado). Sem compilador C, ou se a
+compilação falhar, o programa é executado pela VM.
+"""
+
+from __future__ import annotations
+
+import atexit
+import math
+import os
+import shutil
+import subprocess
+import tempfile
+from typing import Any, Callable, Dict, List, Optional, TextIO, Tuple
+
+import vm
+from cache import CompileCache
+from optimizer import can_fail
+from parser import (Program, Block, Declaration, Assignment, Read, Print,
+                    Conditional, While, BinaryOp, UnaryOp, Number, Identifier,
+                    RelationalOp, LogicalOp, LogicalNot)
+from runtime import (CompileError, ExecutionError, TYPE_I32, TYPE_F64,
+                     literal_value, unescape_string)
+from semantic import resolve
+
+CFLAGS = ["-O2", "-std=c99"]
+ERROR_STATUS = 70
+
+# Funções de suporte incluídas em todo programa gerado
+PRELUDE = r"""#include <math.h>
+#include <stdint.h>
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+
+static unsigned char rt_out[1 << 16];
+static size_t rt_out_len;
+
+static void rt_flush(void) {
+    fwrite(rt_out, 1, rt_out_len, stdout);
+    rt_out_len = 0;
+    fflush(stdout);
+}
+
+static void rt_write(const char *text, size_t n) {
+    if (n > sizeof rt_out - rt_out_len) {
+        rt_flush();
+        if (n > sizeof rt_out) {
+            fwrite(text, 1, n, stdout);
+            return;
+        }
+    }
+    memcpy(rt_out + rt_out_len, text, n);
+    rt_out_len += n;
+}
+
+static void rt_fail(int line, const char *message, const char *word) {
+    rt_flush();
+    if (word != NULL)
+        fprintf(stderr, "%d:%s: '%s'\n", line, message, word);
+    else
+        fprintf(stderr, "%d:%s\n", line, message);
+    exit(ERROR_STATUS);
+}
+
+static void rt_print_i32(int32_t value) {
+    char text[16];
+    rt_write(text, (size_t)sprintf(text, "%ld\n", (long)value));
+}
+
+static void rt_print_f64(double value) {
+    char text[40];
+    if (isnan(value))
+        rt_write("NaN\n", 4);
+    else if (isinf(value))
+        rt_write(value > 0 ? "inf\n" : "-inf\n", value > 0 ? 4 : 5);
+    else
+        rt_write(text, (size_t)sprintf(text, "%.15g\n", value));
+}
+
+static unsigned char rt_in[1 << 16];
+static size_t rt_in_pos, rt_in_len;
+static char *rt_word;
+static size_t rt_word_cap;
+
+static int rt_getc(void) {
+    if (rt_in_pos == rt_in_len) {
+        rt_in_len = fread(rt_in, 1, sizeof rt_in, stdin);
+        rt_in_pos = 0;
+        if (rt_in_len == 0)
+            return EOF;
+    }
+    return rt_in[rt_in_pos++];
+}
+
+static int rt_is_space(int c) {
+    return c == ' ' || (c >= '\t' && c <= '\r') || (c >= 0x1c && c <= 0x1f);
+}
+
+static const char *rt_next_word(int line) {
+    size_t n = 0;
+    int c;
+    do
+        c = rt_getc();
+    while (c != EOF && rt_is_space(c));
+    if (c == EOF)
+        rt_fail(line, "fim da entrada durante read", NULL);
+    while (c != EOF && !rt_is_space(c)) {
+        if (n + 1 >= rt_word_cap) {
+            rt_word_cap = rt_word_cap ? rt_word_cap * 2 : 64;
+            rt_word = realloc(rt_word, rt_word_cap);
+            if (rt_word == NULL)
+                rt_fail(line, "memória insuficiente durante read", NULL);
+        }
+        rt_word[n++] = (char)c;
+        c = rt_getc();
+    }
+    rt_word[n] = '\0';
+    return rt_word;
+}
+
+static int32_t rt_read_i32(int line) {
+    const char *word = rt_next_word(line);
+    const char *digits = word + (*word == '+' || *word == '-');
+    char *end;
+    long long value;
+    if (*digits < '0' || *digits > '9')
+        rt_fail(line, "entrada inválida para i32", word);
+    value = strtoll(word, &end, 10);
+    if (*end != '\0')
+        rt_fail(line, "entrada inválida para i32", word);
+    if (value < INT32_MIN || value > INT32_MAX)
+        rt_fail(line, "entrada fora do intervalo de i32", word);
+    return (int32_t)value;
+}
+
+static double rt_read_f64(int line) {
+    const char *word = rt_next_word(line);
+    char *end;
+    double value;
+    /* strtod aceita formas que float() de Python não aceita */
+    if (strpbrk(word, "xX(") != NULL)
+        rt_fail(line, "entrada inválida para f64", word);
+    value = strtod(word, &end);
+    if (end == word || *end != '\0')
+        rt_fail(line, "entrada inválida para f64", word);
+    return value;
+}
+
+static int32_t rt_div(int32_t a, int32_t b, int line) {
+    if (b == 0)
+        rt_fail(line, "divisão inteira por zero", NULL);
+    if (b == -1)
+        return (int32_t)(0u - (uint32_t)a);
+    return a / b;
+}
+
+static int32_t rt_rem(int32_t a, int32_t b, int line) {
+    if (b == 0)
+        rt_fail(line, "resto de divisão inteira por zero", NULL);
+    if (b == -1)
+        return 0;
+    return a % b;
+}
+
+static int32_t rt_to_i32(double value) {
+    if (value != value)
+        return 0;
+    if (value >= 2147483647.0)
+        return INT32_MAX;
+    if (value <= -2147483648.0)
+        return INT32_MIN;
+    return (int32_t)value;
+}
+"""
+
+_ESCAPES = {"\n": "\\n", "\t": "\\t", '"': '\\"', "\\": "\\\\"}
+
+# Tradução de uma expressão: (código C, tipo)
+Operand = Tuple[str, str]
+
+
+def _literal(value: Any) -> str:
+    if isinstance(value, float):
+        if math.isnan(value):
+            return "NAN"
+        if math.isinf(value):
+            return "INFINITY" if value > 0 else "(-INFINITY)"
+        text = repr(value)
+    elif value == -2 ** 31:
+        return "INT32_MIN"
+    else:
+        text = str(value)
+    return f"({text})" if text.startswith("-") else text
+
+
+def _string(text: str) -> Tuple[str, int]:
+    """Literal C (bytes UTF-8) de uma cadeia e o seu tamanho em bytes"""
+    data = text.encode("utf-8", "surrogateescape")
+    out = []
+    for byte in data:
+        ch = chr(byte)
+        if 32 <= byte < 127 and ch not in '"\\?':
+            out.append(ch)
+        elif ch in _ESCAPES:
+            out.append(_ESCAPES[ch])
+        else:
+            out.append(f"\\{byte:03o}")
+    return '"' + "".join(out) + '"', len(data)
+
+
+class CGenerator:
+    """Traduz a AST em código-fonte C"""
+
+    INDENT = "    "
+
+    def __init__(self) -> None:
+        self.names: List[str] = []
+        self.types: List[str] = []
+        self.out: List[str] = []
+        self.depth = 1
+        self.line = 0
+        self.column = 0
+        self.temps: List[str] = []   # temporários que fixam a ordem de avaliação
+
+    def generate(self, program: Program) -> str:
+        symbols = resolve(program)
+        self.names = [symbol.name if symbol.name.isascii() else "v"
+                      for symbol in symbols]
+        self.types = [symbol.type_name for symbol in symbols]
+        self.emit_block(program.block)
+        body, self.out = self.out, []
+        for slot, type_name in enumerate(self.types):
+            self.emit(f"{self.c_type(type_name)} {self.variable(slot)} = 0;")
+        for temp in self.temps:
+            self.emit(f"{temp};")
+        head = self.out
+        return (PRELUDE.replace("ERROR_STATUS", str(ERROR_STATUS))
+                + "\nint main(void) {\n" + "\n".join(head + body)
+                + "\n    rt_flush();\n    return 0;\n}\n")
+
+    @staticmethod
+    def c_type(type_name: str) -> str:
+        return "double" if type_name == TYPE_F64 else "int32_t"
+
+    def emit(self, text: str) -> None:
+        self.out.append(self.INDENT * self.depth + text)
+
+    def variable(self, slot: int) -> str:
+        return f"{self.names[slot]}_{slot}"
+
+    def temp(self, type_name: str) -> str:
+        name = f"rt_t{len(self.temps)}"
+        self.temps.append(f"{self.c_type(type_name)} {name}")
+        return name
+
+    # -----------------------
+    # Comandos
+    # -----------------------
+
+    def emit_block(self, block: Block) -> None:
+        for cmd in block.commands:
+            self.emit_command(cmd)
+
+    def emit_nested(self, block: Block) -> None:
+        self.depth += 1
+        self.emit_block(block)
+        self.depth -= 1
+
+    def emit_command(self, cmd) -> None:
+        if isinstance(cmd, Block):
+            self.emit_block(cmd)
+            return
+        self.line, self.column = cmd.line, cmd.column
+
+        if isinstance(cmd, Declaration):
+            self.emit(f"{self.variable(cmd.slot)} = 0;")
+
+        elif isinstance(cmd, Assignment):
+            value = self.store_value(self.expression(cmd.expression),
+                                     cmd.type_name)
+            self.emit(f"{self.variable(cmd.slot)} = {value};")
+
+        elif isinstance(cmd, Read):
+            reader = "rt_read_f64" if cmd.type_name == TYPE_F64 else "rt_read_i32"
+            self.emit(f"{self.variable(cmd.slot)} = {reader}({cmd.line});")
+
+        elif isinstance(cmd, Print):
+            if cmd.is_identifier:
+                writer = ("rt_print_f64" if cmd.type_name == TYPE_F64
+                          else "rt_print_i32")
+                self.emit(f"{writer}({self.variable(cmd.slot)});")
+            else:
+                literal, size = _string(unescape_string(cmd.value) + "\n")
+                self.emit(f"rt_write({literal}, {size});")
+
+        elif isinstance(cmd, Conditional):
+            self.emit(f"if ({self.condition(cmd.condition)}) {{")
+            self.emit_nested(cmd.then_block)
+            if cmd.else_block is not None:
+                self.emit("} else {")
+                self.emit_nested(cmd.else_block)
+            self.emit("}")
+
+        elif isinstance(cmd, While):
+            self.emit(f"while ({self.condition(cmd.condition)}) {{")
+            self.emit_nested(cmd.block)
+            self.emit("}")
+
+        else:
+            raise CompileError(f"Comando não suportado: {type(cmd).__name__}",
+                               self.line, self.column)
+
+    @staticmethod
+    def store_value(operand: Operand, target: str) -> str:
+        code, type_name = operand
+        if target == type_name:
+            return code
+        if target == TYPE_F64:
+            return f"(double){code}"
+        return f"rt_to_i32({code})"
+
+    # -----------------------
+    # Condições
+    # -----------------------
+
+    def condition(self, cond) -> str:
+        if isinstance(cond, RelationalOp):
+            left, right, prefix = self.operands(cond.left, cond.right)
+            return f"({prefix}{left[0]} {cond.operator} {right[0]})"
+        if isinstance(cond, LogicalOp):
+            return (f"({self.condition(cond.left)} {cond.operator} "
+                    f"{self.condition(cond.right)})")
+        if isinstance(cond, LogicalNot):
+            return f"!{self.condition(cond.operand)}"
+        raise CompileError(f"Condição não suportada: {type(cond).__name__}",
+                           self.line, self.column)
+
+    # -----------------------
+    # Expressões
+    # -----------------------
+
+    def expression(self, expr) -> Operand:
+        if isinstance(expr, Identifier):
+            return self.variable(expr.slot), expr.type_name
+
+        if isinstance(expr, Number):
+            value = literal_value(expr.value)
+            type_name = TYPE_F64 if isinstance(value, float) else TYPE_I32
+            return _literal(value), type_name
+
+        if isinstance(expr, UnaryOp):
+            code, type_name = self.expression(expr.operand)
+            if expr.operator != "-":
+                return code, type_name
+            if type_name == TYPE_F64:
+                return f"(-{code})", type_name
+            return f"(int32_t)(0u - (uint32_t){code})", type_name
+
+        if isinstance(expr, BinaryOp):
+            return self.binary(expr)
+
+        raise CompileError(f"Expressão não suportada: {type(expr).__name__}",
+                           self.line, self.column)
+
+    def operands(self, left_expr, right_expr
+                 ) -> Tuple[Operand, Operand, str]:
+        """Os dois operandos no mesmo tipo e um prefixo de sequência: se
+        ambos podem falhar, o da esquerda é calculado antes, em um
+        temporário, e o uso fica depois de um operador vírgula"""
+        left = self.expression(left_expr)
+        right = self.expression(right_expr)
+        if TYPE_F64 in (left[1], right[1]):
+            left = (self.store_value(left, TYPE_F64), TYPE_F64)
+            right = (self.store_value(right, TYPE_F64), TYPE_F64)
+        if can_fail(left_expr) and can_fail(right_expr):
+            temp = self.temp(left[1])
+            return (temp, left[1]), right, f"{temp} = {left[0]}, "
+        return left, right, ""
+
+    def binary(self, expr: BinaryOp) -> Operand:
+        left, right, prefix = self.operands(expr.left, expr.right)
+        op = expr.operator
+        a, b = left[0], right[0]
+        if left[1] == TYPE_F64:
+            code = f"fmod({a}, {b})" if op == "%" else f"({a} {op} {b})"
+            type_name = TYPE_F64
+        elif op in ("+", "-", "*"):
+            code = f"(int32_t)((uint32_t){a} {op} (uint32_t){b})"
+            type_name = TYPE_I32
+        else:
+            helper = "rt_div" if op == "/" else "rt_rem"
+            code = f"{helper}({a}, {b}, {self.line})"
+            type_name = TYPE_I32
+        return (f"({prefix}{code})" if prefix else code), type_name
+
+
+def generate(program: Program) -> str:
+    """Código-fonte C do programa"""
+    return CGenerator().generate(program)
+
+
+# -----------------------
+# Compilação e execução
+# -----------------------
+
+_built: Dict[str, str] = {}     # chave -> caminho do executável
+_workdir: Optional[str] = None
+
+
+def compiler() -> Optional[str]:
+    """Caminho do compilador C ($CC ou cc), ou None se não houver"""
+    return shutil.which(os.environ.get("CC", "cc"))
+
+
+def _directory() -> str:
+    """Diretório temporário do processo para fontes e executáveis"""
+    global _workdir
+    if _workdir is None:
+        _workdir = tempfile.mkdtemp(prefix="cgen-")
+        atexit.register(shutil.rmtree, _workdir, True)
+    return _workdir
+
+
+def build(source: str, cache: Optional[CompileCache] = None) -> str:
+    """
+    Caminho de um executável do código C (memória, depois disco, depois
+    compilação). Levanta CompileError se não houver compilador ou se a
+    compilação falhar.
+    """
+    cc = compiler()
+    if cc is None:
+        raise CompileError("compilador C não encontrado")
+    text = "\0".join([cc] + CFLAGS + [source])
+    key = cache.key(text) if cache is not None else text
+    path = _built.get(key)
+    if path is not None:
+        return path
+
+    path = os.path.join(_directory(), f"{len(_built)}.bin")
+    data = cache.load(key, "native") if cache is not None else None
+    if data is not None:
+        with open(path, "wb") as f:
+            f.write(data)
+    else:
+        c_file = path[:-len(".bin")] + ".c"
+        with open(c_file, "w", encoding="utf-8") as f:
+            f.write(source)
+        result = subprocess.run([cc] + CFLAGS + ["-o", path, c_file, "-lm"],
+                                capture_output=True, text=True)
+        if result.returncode != 0:
+            raise CompileError(f"falha ao compilar o código C: "
+                               f"{result.stderr.strip()[:500]}")
+        if cache is not None:
+            with open(path, "rb") as f:
+                cache.store(key, "native", f.read())
+    os.chmod(path, 0o755)
+    _built[key] = path
+    return path
+
+
+def _fileno(stream: TextIO) -> Optional[int]:
+    try:
+        return stream.fileno()
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+class NativeProgram:
+    """Executável gerado, executado como processo filho a cada run"""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+    def run(self, stdin: TextIO, stdout: TextIO) -> None:
+        # Arquivos reais são repassados ao processo; os demais (StringIO,
+        # saída capturada no modo lote) passam por pipes
+        stdin_fd = _fileno(stdin)
+        stdout_fd = _fileno(stdout)
+        data = None
+        if stdin_fd is None:
+            data = stdin.read().encode("utf-8", "surrogateescape")
+        stdout.flush()
+        result = subprocess.run(
+            [self.path], input=data,
+            stdin=stdin_fd if stdin_fd is not None else None,
+            stdout=stdout_fd if stdout_fd is not None else subprocess.PIPE,
+            stderr=subprocess.PIPE)
+        if stdout_fd is None:
+            stdout.write(result.stdout.decode("utf-8", "surrogateescape"))
+            stdout.flush()
+        if result.returncode == ERROR_STATUS:
+            line, _, message = result.stderr.decode(
+                "utf-8", "replace").rstrip("\n").partition(":")
+            raise ExecutionError(message, int(line))
+        if result.returncode != 0:
+            raise ExecutionError(f"programa nativo terminou com código "
+                                 f"{result.returncode}")
+
+
+def load(program: Program, cache: Optional[CompileCache] = None
+         ) -> Callable[[TextIO, TextIO], None]:
+    """Traduz e compila o programa e devolve uma função run(stdin, stdout)"""
+    source = generate(program)
+    try:
+        path = build(source, cache)
+    except (CompileError, OSError):
+        # Sem compilador C utilizável: o programa roda na VM
+        return vm.load(program)
+    return NativeProgram(path).run
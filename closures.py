@@ -0,0 +1,435 @@
+# closures.py
+"""
+Back-end de execução por compilação em closures
+
+Cada nó da AST é transformado uma única vez em uma função Python aninhada
+(closure) que já sabe o que fazer: não há despacho pelo tipo do nó durante
+a execução.
+- As variáveis usam os slots da análise semântica: índices de um vetor
+  capturado pelas closures.
+- As operações são escolhidas pelo tipo estático (i32/f64) e pelo formato
+  dos operandos (variável, constante, subexpressão), de modo que os casos
+  mais comuns (x + 1, i < n) não fazem chamadas intermediárias.
+- While e Conditional viram laços e ifs nativos sobre closures prontas.
+"""
+
+from __future__ import annotations
+
+import operator
+from typing import Any, Callable, List, Optional, TextIO, Tuple
+
+from parser import (Program, Block, Declaration, Assignment, Read, Print,
+                    Conditional, While, BinaryOp, UnaryOp, Number, Identifier,
+                    RelationalOp, LogicalOp, LogicalNot)
+from runtime import (CompileError, ExecutionError, InputReader, OutputWriter,
+                     TYPE_I32, TYPE_F64, wrap_i32, i32_div, i32_rem, f64_div,
+                     f64_rem, to_i32, literal_value, format_value,
+                     unescape_string)
+from semantic import resolve
+
+Thunk = Callable[[], Any]
+
+_COMPARE = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+_F64_OPS = {
+    "+": operator.add,
+    "-": operator.sub,
+    "*": operator.mul,
+    "/": f64_div,
+    "%": f64_rem,
+}
+
+_I32_CHECKED = {"/": i32_div, "%": i32_rem}
+_I32_WRAPPED = {"+": operator.add, "-": operator.sub, "*": operator.mul}
+
+# Formatos de operando usados na especialização
+_SLOT, _CONST, _EXPR = range(3)
+
+
+class _State:
+    """Entrada e saída da execução corrente (trocadas a cada run)"""
+    __slots__ = ("input", "output")
+
+    def __init__(self) -> None:
+        self.input: Optional[InputReader] = None
+        self.output: Optional[OutputWriter] = None
+
+
+def _tag_line(fn: Thunk, line: int) -> Thunk:
+    """Anota a linha do comando nos erros de execução"""
+    def tagged():
+        try:
+            fn()
+        except ExecutionError as e:
+            if not e.line:
+                e.line = line
+            raise
+    return tagged
+
+
+def _sequence(fns: List[Thunk]) -> Thunk:
+    """Executa uma lista de closures em ordem"""
+    if not fns:
+        return lambda: None
+    if len(fns) == 1:
+        return fns[0]
+    if len(fns) == 2:
+        first, second = fns
+
+        def run2():
+            first()
+            second()
+        return run2
+    fns = tuple(fns)
+
+    def run():
+        for fn in fns:
+            fn()
+    return run
+
+
+class ClosureCompiler:
+    """Transforma a AST em uma árvore de closures"""
+
+    def __init__(self) -> None:
+        self.slots: List[Any] = []
+        self.state = _State()
+        # Indica se a última expressão compilada pode falhar (/ e % em i32)
+        self._may_fail = False
+        self.line = 0
+        self.column = 0
+
+    def compile(self, program: Program) -> Thunk:
+        self.slots.extend([0] * len(resolve(program)))
+        return self.compile_block(program.block)
+
+    # -----------------------
+    # Comandos
+    # -----------------------
+
+    def compile_block(self, block: Block) -> Thunk:
+        return _sequence([self.compile_command(cmd) for cmd in block.commands])
+
+    def compile_command(self, cmd) -> Thunk:
+        if isinstance(cmd, Block):
+            return self.compile_block(cmd)
+        self.line, self.column = cmd.line, cmd.column
+        if isinstance(cmd, Declaration):
+            return self.compile_declaration(cmd)
+        if isinstance(cmd, Assignment):
+            return self.compile_assignment(cmd)
+        if isinstance(cmd, Read):
+            return _tag_line(self.compile_read(cmd), cmd.line)
+        if isinstance(cmd, Print):
+            return self.compile_print(cmd)
+        if isinstance(cmd, (Conditional, While)):
+            # Erros dentro do bloco já vêm anotados; aqui valem os da condição
+            self._may_fail = False
+            if isinstance(cmd, Conditional):
+                fn = self.compile_conditional(cmd)
+            else:
+                fn = self.compile_while(cmd)
+            return _tag_line(fn, cmd.line) if self._may_fail else fn
+        raise CompileError(f"Comando não suportado: {type(cmd).__name__}",
+                           self.line, self.column)
+
+    def compile_declaration(self, cmd: Declaration) -> Thunk:
+        slot = cmd.slot
+        slots = self.slots
+        zero = 0.0 if cmd.type_name == TYPE_F64 else 0
+
+        def declare():
+            slots[slot] = zero
+        return declare
+
+    def compile_assignment(self, cmd: Assignment) -> Thunk:
+        target = cmd.slot
+        slots = self.slots
+        self._may_fail = False
+        expr, expr_type = self.compile_expression(cmd.expression)
+        target_type = cmd.type_name
+
+        if expr_type != target_type:
+            convert = float if target_type == TYPE_F64 else to_i32
+
+            def assign():
+                slots[target] = convert(expr())
+        else:
+            fused = self._fused_increment(target, cmd.expression, expr_type)
+            if fused is not None:
+                return fused
+
+            def assign():
+                slots[target] = expr()
+
+        if self._may_fail:
+            return _tag_line(assign, cmd.line)
+        return assign
+
+    def _fused_increment(self, target: int, expr,
+                         expr_type: str) -> Optional[Thunk]:
+        """x = x + k e x = x - k (i32) em uma única closure"""
+        if (expr_type != TYPE_I32 or not isinstance(expr, BinaryOp)
+                or expr.operator not in ("+", "-")
+                or not isinstance(expr.left, Identifier)
+                or not isinstance(expr.right, Number)
+                or expr.left.slot != target):
+            return None
+        slots = self.slots
+        k = literal_value(expr.right.value)
+        if expr.operator == "-":
+            k = -k
+
+        def increment():
+            r = slots[target] + k
+            if -2147483648 <= r <= 2147483647:
+                slots[target] = r
+            else:
+                slots[target] = wrap_i32(r)
+        return increment
+
+    def compile_read(self, cmd: Read) -> Thunk:
+        slot = cmd.slot
+        slots = self.slots
+        state = self.state
+        f64 = cmd.type_name == TYPE_F64
+
+        def read():
+            slots[slot] = (state.input.read_f64() if f64
+                           else state.input.read_i32())
+        return read
+
+    def compile_print(self, cmd: Print) -> Thunk:
+        state = self.state
+        if not cmd.is_identifier:
+            text = unescape_string(cmd.value)
+
+            def print_text():
+                state.output.write_line(text)
+            return print_text
+
+        slot = cmd.slot
+        slots = self.slots
+
+        def print_value():
+            state.output.write_line(format_value(slots[slot]))
+        return print_value
+
+    def compile_conditional(self, cmd: Conditional) -> Thunk:
+        cond = self.compile_condition(cmd.condition)
+        may_fail = self._may_fail
+        then_block = self.compile_block(cmd.then_block)
+        self._may_fail = may_fail
+        if cmd.else_block is None:
+            def if_then():
+                if cond():
+                    then_block()
+            return if_then
+
+        else_block = self.compile_block(cmd.else_block)
+        self._may_fail = may_fail
+
+        def if_else():
+            if cond():
+                then_block()
+            else:
+                else_block()
+        return if_else
+
+    def compile_while(self, cmd: While) -> Thunk:
+        cond = self.compile_condition(cmd.condition)
+        may_fail = self._may_fail
+        fns = [self.compile_command(c) for c in cmd.block.commands]
+        self._may_fail = may_fail
+
+        if len(fns) == 1:
+            body = fns[0]
+
+            def loop1():
+                while cond():
+                    body()
+            return loop1
+
+        if len(fns) == 2:
+            first, second = fns
+
+            def loop2():
+                while cond():
+                    first()
+                    second()
+            return loop2
+
+        body_fns = tuple(fns)
+
+        def loop():
+            while cond():
+                for fn in body_fns:
+                    fn()
+        return loop
+
+    # -----------------------
+    # Condições
+    # -----------------------
+
+    def compile_condition(self, cond) -> Callable[[], bool]:
+        if isinstance(cond, RelationalOp):
+            compare = _COMPARE[cond.operator]
+            (lkind, left), _ = self._operand(cond.left)
+            (rkind, right), _ = self._operand(cond.right)
+            slots = self.slots
+            if lkind == _SLOT and rkind == _CONST:
+                return lambda: compare(slots[left], right)
+            if lkind == _SLOT and rkind == _SLOT:
+                return lambda: compare(slots[left], slots[right])
+            lfn = self._thunk(lkind, left)
+            if rkind == _CONST:
+                return lambda: compare(lfn(), right)
+            rfn = self._thunk(rkind, right)
+            return lambda: compare(lfn(), rfn())
+
+        if isinstance(cond, LogicalOp):
+            left = self.compile_condition(cond.left)
+            right = self.compile_condition(cond.right)
+            if cond.operator == "&&":
+                return lambda: left() and right()
+            return lambda: left() or right()
+
+        if isinstance(cond, LogicalNot):
+            operand = self.compile_condition(cond.operand)
+            return lambda: not operand()
+
+        raise CompileError(f"Condição não suportada: {type(cond).__name__}",
+                           self.line, self.column)
+
+    # -----------------------
+    # Expressões
+    # -----------------------
+
+    def _operand(self, expr) -> Tuple[Tuple[int, Any], str]:
+        """Classifica um operando: ((formato, valor), tipo)"""
+        if isinstance(expr, Identifier):
+            return (_SLOT, expr.slot), expr.type_name
+        if isinstance(expr, Number):
+            value = literal_value(expr.value)
+            return (_CONST, value), (TYPE_F64 if isinstance(value, float)
+                                     else TYPE_I32)
+        fn, type_name = self.compile_expression(expr)
+        return (_EXPR, fn), type_name
+
+    def _thunk(self, kind: int, value: Any) -> Thunk:
+        if kind == _EXPR:
+            return value
+        if kind == _CONST:
+            return lambda: value
+        slots = self.slots
+        return lambda: slots[value]
+
+    def compile_expression(self, expr) -> Tuple[Thunk, str]:
+        """Closure que calcula a expressão, e o tipo do resultado"""
+        if isinstance(expr, (Identifier, Number)):
+            (kind, value), type_name = self._operand(expr)
+            return self._thunk(kind, value), type_name
+
+        if isinstance(expr, UnaryOp):
+            operand, type_name = self.compile_expression(expr.operand)
+            if expr.operator != "-":
+                return operand, type_name
+            if type_name == TYPE_F64:
+                return (lambda: -operand()), type_name
+            return (lambda: wrap_i32(-operand())), type_name
+
+        if isinstance(expr, BinaryOp):
+            return self.compile_binary(expr)
+
+        raise CompileError(f"Expressão não suportada: {type(expr).__name__}",
+                           self.line, self.column)
+
+    def compile_binary(self, expr: BinaryOp) -> Tuple[Thunk, str]:
+        (lkind, left), ltype = self._operand(expr.left)
+        (rkind, right), rtype = self._operand(expr.right)
+        slots = self.slots
+
+        if TYPE_F64 in (ltype, rtype):
+            op = _F64_OPS[expr.operator]
+            if lkind == _SLOT and rkind == _CONST:
+                return (lambda: op(slots[left], right)), TYPE_F64
+            lfn = self._thunk(lkind, left)
+            rfn = self._thunk(rkind, right)
+            return (lambda: op(lfn(), rfn())), TYPE_F64
+
+        if expr.operator in _I32_CHECKED:
+            self._may_fail = True
+            op = _I32_CHECKED[expr.operator]
+            if lkind == _SLOT and rkind == _CONST and right > 0:
+                # Caso comum (n % 3, n / 2): rápido quando n >= 0
+                if expr.operator == "%":
+                    def rem_const():
+                        a = slots[left]
+                        return a % right if a >= 0 else i32_rem(a, right)
+                    return rem_const, TYPE_I32
+
+                def div_const():
+                    a = slots[left]
+                    return a // right if a >= 0 else i32_div(a, right)
+                return div_const, TYPE_I32
+            lfn = self._thunk(lkind, left)
+            rfn = self._thunk(rkind, right)
+            return (lambda: op(lfn(), rfn())), TYPE_I32
+
+        op = _I32_WRAPPED[expr.operator]
+        if lkind == _SLOT and rkind == _CONST:
+            def slot_const():
+                r = op(slots[left], right)
+                if -2147483648 <= r <= 2147483647:
+                    return r
+                return wrap_i32(r)
+            return slot_const, TYPE_I32
+
+        if lkind == _SLOT and rkind == _SLOT:
+            def slot_slot():
+                r = op(slots[left], slots[right])
+                if -2147483648 <= r <= 2147483647:
+                    return r
+                return wrap_i32(r)
+            return slot_slot, TYPE_I32
+
+        lfn = self._thunk(lkind, left)
+        rfn = self._thunk(rkind, right)
+
+        def generic():
+            r = op(lfn(), rfn())
+            if -2147483648 <= r <= 2147483647:
+                return r
+            return wrap_i32(r)
+        return generic, TYPE_I32
+
+
+class ClosureProgram:
+    """Programa compilado em closures, executável várias vezes"""
+
+    def __init__(self, program: Program) -> None:
+        self._compiler = ClosureCompiler()
+        self._body = self._compiler.compile(program)
+
+    def run(self, stdin: TextIO, stdout: TextIO) -> None:
+        compiler = self._compiler
+        compiler.slots[:] = [0] * len(compiler.slots)
+        state = compiler.state
+        state.input = InputReader(stdin)
+        state.output = OutputWriter(stdout)
+        try:
+            self._body()
+        finally:
+            state.output.flush()
+
+
+def load(program: Program) -> Callable[[TextIO, TextIO], None]:
+    """Compila o programa e devolve uma função run(stdin, stdout)"""
+    return ClosureProgram(program).run
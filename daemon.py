@@ -0,0 +1,266 @@
+# daemon.py
+"""
+Daemon de compilação
+
+Um processo de longa duração escuta um socket Unix e analisa os programas
+enviados pelos clientes. Iniciar o interpretador e importar o compilador
+custa uma vez só: os processos do pool continuam aquecidos entre as
+requisições (com os módulos carregados e o cache de get_cache aberto).
+
+Protocolo: cada conexão envia uma requisição JSON (terminada por '\\n' ou
+pelo fim da escrita), recebe uma resposta JSON e é fechada.
+
+Requisição:
+    {"id": 1, "path": "/abs/programa.txt", "options": {"lex_only": true},
+     "tokens": true, "ast": true}
+    {"source": "fn main() { ... }", "input": "3\\n"}
+    {"command": "ping"}        {"command": "shutdown"}
+
+- source ou path: o programa (path é lido pelo daemon; use caminhos
+  absolutos);
+- options: opções da linha de comando com os nomes de main.py (lex_only,
+  verbose, parser, backend, run, format, ...);
+- input: entrada padrão do programa executado com run;
+- tokens / ast: inclui na resposta os tokens e a AST em JSON, no formato
+  json de dump.py.
+
+Resposta:
+    {"id": 1, "status": "syntax_errors", "exit_code": 1, "output": "...",
+     "errors": "", "diagnostics": [{"phase": "sintatico", "line": 3,
+     "column": 5, "message": "..."}], "seconds": 0.002,
+     "tokens": [...], "ast": {...}}
+
+output e errors são o que a linha de comando escreveria na saída padrão e
+na de erros. As conexões são atendidas em threads, e as análises em um pool
+de processos: a saída de cada uma é capturada redirecionando sys.stdout, o
+que não é seguro entre threads. SIGTERM, SIGINT ou o comando shutdown param
+de aceitar conexões, esperam as requisições em andamento e removem o
+arquivo do socket.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import signal
+import socket
+import socketserver
+import stat
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from batch import EXIT_CODES, FAILED
+
+DEFAULT_SOCKET = os.path.join(tempfile.gettempdir(),
+                              f"compilador-{os.getuid()}.sock")
+
+# Tamanho máximo de uma requisição (o código-fonte vai dentro dela)
+MAX_REQUEST = 64 << 20
+
+Handler = Callable[[Dict[str, Any]], bytes]
+
+
+class DaemonError(Exception):
+    """Requisição inválida ou daemon inacessível"""
+
+
+@dataclass
+class Collected:
+    """Tokens, AST e erros de uma análise, guardados para a resposta"""
+    tokens: Any = None
+    ast: Any = None
+    diagnostics: List[Dict[str, Any]] = field(default_factory=list)
+
+    def error(self, phase: str, message: str, line: int = 0,
+              column: int = 0) -> None:
+        self.diagnostics.append({"phase": phase, "line": line,
+                                 "column": column, "message": message})
+
+
+def encode_response(fields: Dict[str, Any],
+                    raw: Optional[Dict[str, str]] = None) -> bytes:
+    """
+    Resposta em uma linha JSON. `raw` traz valores já em JSON (os tokens e a
+    AST escritos por dump.py), inseridos sem decodificar e codificar de novo.
+    """
+    text = json.dumps(fields, ensure_ascii=False)
+    if raw:
+        extra = "".join(f",{json.dumps(name)}:{value}"
+                        for name, value in raw.items())
+        text = text[:-1] + (extra if fields else extra[1:]) + "}"
+    return (text + "\n").encode("utf-8")
+
+
+def failure(request_id: Any, message: str) -> bytes:
+    """Resposta de uma requisição que não chegou a ser analisada"""
+    return encode_response({"id": request_id, "status": FAILED,
+                            "exit_code": EXIT_CODES[FAILED], "output": "",
+                            "errors": f"Erro: {message}\n", "diagnostics": []})
+
+
+# -----------------------
+# Servidor
+# -----------------------
+
+def _ignore_interrupts() -> None:
+    # O Ctrl-C do terminal chega a todo o grupo de processos: só o servidor
+    # trata, e as análises em andamento terminam
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def _claim_socket(path: str) -> None:
+    """Remove um socket abandonado; recusa se outro daemon estiver ativo"""
+    try:
+        mode = os.stat(path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise DaemonError(f"{path} existe e não é um socket")
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(path)
+        except OSError:
+            os.unlink(path)
+            return
+    raise DaemonError(f"já existe um daemon em {path}")
+
+
+class _Connection(socketserver.StreamRequestHandler):
+    """Uma conexão: lê a requisição, responde e fecha"""
+
+    def handle(self) -> None:
+        server: CompileServer = self.server
+        data = self.rfile.readline(MAX_REQUEST + 1)
+        request_id = None
+        try:
+            if len(data) > MAX_REQUEST:
+                raise DaemonError("requisição muito grande")
+            try:
+                request = json.loads(data)
+            except ValueError as e:
+                raise DaemonError(f"requisição não é JSON válido: {e}")
+            if not isinstance(request, dict):
+                raise DaemonError("a requisição deve ser um objeto JSON")
+            request_id = request.get("id")
+            response = server.dispatch(request)
+        except DaemonError as e:
+            response = failure(request_id, str(e))
+        except Exception as e:
+            response = failure(request_id, f"falha no daemon: {e!r}")
+        try:
+            self.wfile.write(response)
+        except OSError:
+            pass  # o cliente desistiu da resposta
+
+
+class CompileServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Daemon: uma thread por conexão e as análises em `jobs` processos (None:
+    um por CPU). `handler` recebe a requisição e devolve a resposta já
+    codificada; roda nos processos do pool, e `warmup` uma vez em cada um.
+    """
+    # server_close espera as threads das requisições em andamento
+    daemon_threads = False
+    block_on_close = True
+
+    def __init__(self, path: str, handler: Handler, jobs: Optional[int] = None,
+                 warmup: Optional[Callable[[], Any]] = None) -> None:
+        _claim_socket(path)
+        self.path = path
+        self.handler = handler
+        self.jobs = max(1, jobs or os.cpu_count() or 1)
+        self.started = time.time()
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self.executor = ProcessPoolExecutor(max_workers=self.jobs,
+                                            initializer=_ignore_interrupts)
+        try:
+            # Cria os processos antes de aceitar conexões
+            for future in [self.executor.submit(warmup or int)
+                           for _ in range(self.jobs)]:
+                future.result()
+            super().__init__(path, _Connection)
+        except BaseException:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            raise
+
+    def dispatch(self, request: Dict[str, Any]) -> bytes:
+        command = request.get("command", "compile")
+        if command == "compile":
+            with self._lock:
+                self.requests += 1
+            return self.executor.submit(self.handler, request).result()
+        if command == "ping":
+            return encode_response({"id": request.get("id"), "status": "ok",
+                                    "pid": os.getpid(), "jobs": self.jobs,
+                                    "uptime": time.time() - self.started,
+                                    "requests": self.requests})
+        if command == "shutdown":
+            self.stop()
+            return encode_response({"id": request.get("id"), "status": "ok"})
+        raise DaemonError(f"comando desconhecido: {command}")
+
+    def stop(self) -> None:
+        """Pede o encerramento; pode ser chamado por um tratador de sinal"""
+        if not self._stopping.is_set():
+            self._stopping.set()
+            # shutdown() espera serve_forever(): não pode rodar na thread dele
+            threading.Thread(target=self.shutdown).start()
+
+    def server_close(self) -> None:
+        try:
+            super().server_close()
+        finally:
+            self.executor.shutdown(wait=True)
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+
+
+def serve(path: str, handler: Handler, jobs: Optional[int] = None,
+          warmup: Optional[Callable[[], Any]] = None) -> None:
+    """Executa o daemon até SIGTERM, SIGINT ou o comando shutdown"""
+    server = CompileServer(path, handler, jobs, warmup)
+    previous = {sig: signal.signal(sig, lambda *_: server.stop())
+                for sig in (signal.SIGTERM, signal.SIGINT)}
+    try:
+        print(f"Daemon escutando em {path} (pid {os.getpid()}, "
+              f"{server.jobs} processos)", file=sys.stderr, flush=True)
+        server.serve_forever()
+    finally:
+        server.server_close()
+        for sig, action in previous.items():
+            signal.signal(sig, action)
+    print("Daemon encerrado", file=sys.stderr)
+
+
+# -----------------------
+# Cliente
+# -----------------------
+
+def send_request(path: str, request: Dict[str, Any],
+                 timeout: Optional[float] = None) -> Dict[str, Any]:
+    """Envia uma requisição ao daemon e devolve a resposta decodificada"""
+    data = json.dumps(request, ensure_ascii=False).encode("utf-8") + b"\n"
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(path)
+            sock.sendall(data)
+            sock.shutdown(socket.SHUT_WR)
+            with sock.makefile("rb") as f:
+                reply = f.read()
+    except (FileNotFoundError, ConnectionRefusedError):
+        raise DaemonError(f"nenhum daemon em {path} (inicie com --daemon)")
+    except OSError as e:
+        raise DaemonError(f"falha na comunicação com o daemon: {e}")
+    if not reply:
+        raise DaemonError("o daemon fechou a conexão sem responder")
+    return json.loads(reply)
@@ -0,0 +1,551 @@
+# dataflow.py
+"""
+Otimizações guiadas por análise de fluxo de dados
+
+O programa é rebaixado para o IR (ir.py) e analisado sobre o CFG com
+algoritmos de lista de trabalho:
+- definições que alcançam (conjuntos de bits por bloco): usadas na
+  propagação de cópias;
+- vivacidade forte: uma variável está viva se for lida por uma instrução
+  que é necessária (escrita, leitura, desvio, operação que pode falhar ou
+  definição de algo vivo), de modo que cadeias de atribuições inúteis são
+  mortas de uma só vez;
+- propagação de constantes condicional esparsa (SCCP, Wegman e Zadeck),
+  sobre a forma SSA: calcula o valor constante de cada versão e quais
+  arestas do CFG podem ser percorridas.
+
+Os resultados são levados de volta para a AST, que continua sendo a
+entrada dos back-ends, pelo nó de origem de cada instrução:
+- atribuições cujo valor nunca é lido (e que não podem falhar) são
+  removidas;
+- leituras de variáveis com valor constante viram números, e leituras de
+  uma cópia (y = x) passam a ler a origem quando x não mudou no caminho;
+- comparações com resultado conhecido viram verdadeiro/falso, e o
+  dobramento de constantes (optimizer.py) remove os ramos mortos.
+
+Cada análise percorre o CFG um número pequeno de vezes (na ordem de
+dominância), com custo proporcional ao tamanho do programa vezes o número
+de variáveis ou definições / 64 (operações com inteiros como conjuntos).
+"""
+
+from __future__ import annotations
+
+import heapq
+import math
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from gcutil import paused_gc
+from ir import (IRProgram, Instruction, Reg, Const, Move, Unary, Binary,
+                Convert, Input, Output, Phi, Jump, Branch, lower, to_ssa)
+from optimizer import ConstantFolder, can_fail, evaluate, make_number
+from parser import (Program, Block, Declaration, Assignment, Identifier,
+                    RelationalOp)
+from runtime import TYPE_I32, convert, wrap_i32
+from semantic import resolve
+
+# Número máximo de rodadas: a segunda remove as atribuições que ficaram
+# mortas com a propagação feita na primeira
+MAX_ROUNDS = 2
+
+_COMPARE = {
+    "==": lambda a, b: a == b,
+    "!=": lambda a, b: a != b,
+    "<": lambda a, b: a < b,
+    "<=": lambda a, b: a <= b,
+    ">": lambda a, b: a > b,
+    ">=": lambda a, b: a >= b,
+}
+
+
+def _is_essential(instr: Instruction) -> bool:
+    """Instruções que não podem ser removidas mesmo sem uso do resultado"""
+    if isinstance(instr, (Input, Output, Branch)):
+        return True
+    return (isinstance(instr, Binary) and instr.operator in ("/", "%")
+            and instr.dest.type_name == TYPE_I32)
+
+
+class Worklist:
+    """
+    Blocos pendentes, retirados na ordem dada (pós-ordem reversa para
+    análises para a frente). Processar sempre o bloco mais cedo na ordem
+    estabiliza cada laço antes de seguir adiante, de modo que o trabalho
+    não é repetido para o resto do programa a cada volta de um laço.
+    """
+
+    def __init__(self, order: List[int]) -> None:
+        self.position = {block_id: i for i, block_id in enumerate(order)}
+        self.heap = list(range(len(order)))
+        self.order = order
+        self.queued = set(order)
+
+    def __bool__(self) -> bool:
+        return bool(self.heap)
+
+    def pop(self) -> int:
+        block_id = self.order[heapq.heappop(self.heap)]
+        self.queued.discard(block_id)
+        return block_id
+
+    def push(self, block_id: int) -> None:
+        if block_id not in self.queued and block_id in self.position:
+            self.queued.add(block_id)
+            heapq.heappush(self.heap, self.position[block_id])
+
+
+# -----------------------
+# Definições que alcançam
+# -----------------------
+
+class ReachingDefinitions:
+    """
+    Definições de variáveis que alcançam o início de cada bloco. Cada
+    definição é um bit (bits[instrução]); of_variable[slot] tem os bits das
+    definições da variável. Só as variáveis em slots são acompanhadas.
+    """
+
+    def __init__(self, ir: IRProgram, slots: Set[int]) -> None:
+        self.ir = ir
+        self.definitions: List[Instruction] = []
+        self.bits: Dict[Instruction, int] = {}
+        self.of_variable = [0] * len(ir.variables)
+        for block in ir.blocks:
+            for instr in block.instructions:
+                if instr.dest is not None and instr.dest.index in slots:
+                    bit = 1 << len(self.definitions)
+                    self.bits[instr] = bit
+                    self.definitions.append(instr)
+                    self.of_variable[instr.dest.index] |= bit
+
+        gen = [0] * len(ir.blocks)
+        kill = [0] * len(ir.blocks)
+        for block in ir.blocks:
+            g = k = 0
+            for instr in block.instructions:
+                bit = self.bits.get(instr)
+                if bit:
+                    mask = self.of_variable[instr.dest.index]
+                    g = (g & ~mask) | bit
+                    k |= mask
+            gen[block.id], kill[block.id] = g, k
+
+        # Lista de trabalho na pós-ordem reversa, que é a ordem dos blocos
+        # (predecessores primeiro)
+        self.reach_in = [0] * len(ir.blocks)
+        out = [0] * len(ir.blocks)
+        work = Worklist(list(range(len(ir.blocks))))
+        while work:
+            block_id = work.pop()
+            block = ir.blocks[block_id]
+            reach = 0
+            for pred in block.preds:
+                reach |= out[pred]
+            self.reach_in[block_id] = reach
+            new_out = gen[block_id] | (reach & ~kill[block_id])
+            if new_out != out[block_id]:
+                out[block_id] = new_out
+                for succ in block.succs:
+                    work.push(succ)
+
+    def walk(self, block_id: int) -> Iterator[Tuple[Instruction, int]]:
+        """Cada instrução do bloco com as definições que a alcançam"""
+        reach = self.reach_in[block_id]
+        block = self.ir.blocks[block_id]
+        for instr in block.all_instructions():
+            yield instr, reach
+            bit = self.bits.get(instr)
+            if bit:
+                reach = (reach & ~self.of_variable[instr.dest.index]) | bit
+
+
+# -----------------------
+# Vivacidade
+# -----------------------
+
+class Liveness:
+    """
+    Vivacidade forte das variáveis na saída de cada bloco (conjunto de
+    bits por slot). Temporários nunca atravessam blocos e são tratados
+    localmente.
+    """
+
+    def __init__(self, ir: IRProgram) -> None:
+        self.ir = ir
+        self.n_vars = len(ir.variables)
+        self.live_out = [0] * len(ir.blocks)
+        live_in = [0] * len(ir.blocks)
+        # Análise para trás: sucessores primeiro (pós-ordem)
+        work = Worklist(list(range(len(ir.blocks) - 1, -1, -1)))
+        while work:
+            block_id = work.pop()
+            block = ir.blocks[block_id]
+            out = 0
+            for succ in block.succs:
+                out |= live_in[succ]
+            self.live_out[block_id] = out
+            new_in = self._transfer(block_id, out)
+            if new_in != live_in[block_id]:
+                live_in[block_id] = new_in
+                for pred in block.preds:
+                    work.push(pred)
+
+    def _transfer(self, block_id: int, live: int) -> int:
+        for _instr, live, _needed in self.walk_backward(block_id, live):
+            pass
+        return live
+
+    def walk_backward(self, block_id: int, live: Optional[int] = None
+                      ) -> Iterator[Tuple[Instruction, int, bool]]:
+        """
+        Instruções do bloco, da última para a primeira, com as variáveis
+        vivas logo antes de cada uma e se ela é necessária.
+        """
+        if live is None:
+            live = self.live_out[block_id]
+        temps: Set[Reg] = set()
+        n_vars = self.n_vars
+        for instr in reversed(list(self.ir.blocks[block_id].all_instructions())):
+            dest = instr.dest
+            needed = _is_essential(instr)
+            if dest is not None:
+                if dest.index < n_vars:
+                    bit = 1 << dest.index
+                    needed = needed or bool(live & bit)
+                    live &= ~bit
+                else:
+                    needed = needed or dest in temps
+                    temps.discard(dest)
+            if needed:
+                for value in instr.uses():
+                    if isinstance(value, Reg):
+                        if value.index < n_vars:
+                            live |= 1 << value.index
+                        else:
+                            temps.add(value)
+            yield instr, live, needed
+
+
+# -----------------------
+# Propagação de constantes condicional esparsa
+# -----------------------
+
+# Valor variável (não constante) no reticulado
+VARYING = object()
+
+
+class ConstantPropagation:
+    """
+    SCCP sobre o IR em forma SSA. values[reg] é um valor constante ou
+    VARYING (ausente: ainda sem definição executável); executable guarda
+    as arestas (origem, destino) que podem ser percorridas.
+    """
+
+    def __init__(self, ir: IRProgram) -> None:
+        self.ir = ir
+        self.values: Dict[Reg, Any] = {}
+        self.executable: Set[Tuple[int, int]] = set()
+        self.reached: Set[int] = set()
+
+        # Usos de cada registrador: (bloco, instrução)
+        self.users: Dict[Reg, List[Tuple[int, Instruction]]] = {}
+        for block in ir.blocks:
+            for instr in block.all_instructions():
+                for value in instr.uses():
+                    if isinstance(value, Reg):
+                        self.users.setdefault(value, []).append(
+                            (block.id, instr))
+
+        self.flow_work: List[Tuple[int, int]] = [(-1, 0)]
+        self.ssa_work: List[Reg] = []
+        while self.flow_work or self.ssa_work:
+            while self.flow_work:
+                self.visit_edge(*self.flow_work.pop())
+            while self.ssa_work:
+                reg = self.ssa_work.pop()
+                for block_id, instr in self.users.get(reg, ()):
+                    if block_id in self.reached:
+                        self.visit(block_id, instr)
+
+    def value(self, operand) -> Any:
+        if isinstance(operand, Const):
+            return operand.value
+        return self.values.get(operand)
+
+    def lower_to(self, reg: Reg, value: Any) -> None:
+        """Desce o valor de reg no reticulado (indefinido > constante > VARYING)"""
+        old = self.values.get(reg)
+        if old is VARYING or value is None:
+            return
+        if old is not None and value is not VARYING and _same(old, value):
+            return
+        new = value if old is None else VARYING
+        self.values[reg] = new
+        self.ssa_work.append(reg)
+
+    def visit_edge(self, source: int, target: int) -> None:
+        if (source, target) in self.executable:
+            return
+        self.executable.add((source, target))
+        block = self.ir.blocks[target]
+        if target in self.reached:
+            # Só as phis dependem da nova aresta
+            for instr in block.instructions:
+                if isinstance(instr, Phi):
+                    self.visit(target, instr)
+            return
+        self.reached.add(target)
+        for instr in block.all_instructions():
+            self.visit(target, instr)
+
+    def visit(self, block_id: int, instr: Instruction) -> None:
+        if isinstance(instr, Phi):
+            for pred, source in instr.sources.items():
+                if (pred, block_id) in self.executable:
+                    self.lower_to(instr.dest, self.value(source))
+        elif isinstance(instr, (Move, Unary, Binary, Convert)):
+            self.lower_to(instr.dest, self.evaluate(instr))
+        elif isinstance(instr, Input):
+            self.lower_to(instr.dest, VARYING)
+        elif isinstance(instr, Jump):
+            self.flow_work.append((block_id, instr.target))
+        elif isinstance(instr, Branch):
+            left, right = self.value(instr.left), self.value(instr.right)
+            if left is None or right is None:
+                return
+            if left is VARYING or right is VARYING:
+                self.flow_work.append((block_id, instr.if_true))
+                self.flow_work.append((block_id, instr.if_false))
+            elif _COMPARE[instr.operator](left, right):
+                self.flow_work.append((block_id, instr.if_true))
+            else:
+                self.flow_work.append((block_id, instr.if_false))
+
+    def evaluate(self, instr: Instruction) -> Any:
+        """Valor da instrução no reticulado (None: ainda indefinido)"""
+        operands = [self.value(value) for value in instr.uses()]
+        if any(value is None for value in operands):
+            return None
+        if any(value is VARYING for value in operands):
+            return VARYING
+        if isinstance(instr, Move):
+            result = operands[0]
+        elif isinstance(instr, Convert):
+            result = convert(operands[0], instr.dest.type_name)
+        elif isinstance(instr, Unary):
+            value = operands[0]
+            result = -value if isinstance(value, float) else wrap_i32(-value)
+        else:
+            result = evaluate(instr.operator, operands[0], operands[1])
+        if result is None or (isinstance(result, float)
+                              and not math.isfinite(result)):
+            # Erro em execução ou valor sem literal: não é propagado
+            return VARYING
+        return result
+
+    def decision(self, block_id: int) -> Optional[bool]:
+        """Resultado conhecido do desvio que termina o bloco, se houver"""
+        branch = self.ir.blocks[block_id].terminator
+        if not isinstance(branch, Branch) or block_id not in self.reached:
+            return None
+        taken = (block_id, branch.if_true) in self.executable
+        skipped = (block_id, branch.if_false) in self.executable
+        if taken == skipped:
+            return None
+        return taken
+
+
+def _same(a: Any, b: Any) -> bool:
+    # 0.0 e -0.0 são diferentes para a propagação (1/x difere)
+    return type(a) is type(b) and a == b and math.copysign(
+        1, a) == math.copysign(1, b)
+
+
+# -----------------------
+# Fatos para a AST
+# -----------------------
+
+@dataclass
+class Facts:
+    """Resultados das análises, indexados pelos nós da AST"""
+    # (id do comando ou comparação, slot) -> valor constante lido
+    constants: Dict[Tuple[int, int], Any] = field(default_factory=dict)
+    # (id do comando ou comparação, slot) -> slot da origem da cópia
+    copies: Dict[Tuple[int, int], int] = field(default_factory=dict)
+    # id da comparação -> resultado conhecido
+    decisions: Dict[int, bool] = field(default_factory=dict)
+    # ids das atribuições cujo valor nunca é lido
+    dead: Set[int] = field(default_factory=set)
+
+
+def collect_facts(program: Program) -> Facts:
+    """Rebaixa o programa, roda as análises e relaciona os resultados à AST"""
+    facts = Facts()
+    ir = lower(program)
+    n_vars = len(ir.variables)
+
+    # Atribuições mortas
+    liveness = Liveness(ir)
+    for block in ir.blocks:
+        for instr, _live, needed in liveness.walk_backward(block.id):
+            node = instr.node
+            if (not needed and isinstance(node, Assignment)
+                    and instr.dest is not None
+                    and instr.dest.index == node.slot):
+                facts.dead.add(id(node))
+
+    # Cópias: y = x, com x inalterado entre a cópia e o uso de y (as
+    # definições acompanhadas são só as das variáveis envolvidas em cópias)
+    copy_slots: Set[int] = set()
+    for block in ir.blocks:
+        for instr in block.instructions:
+            if _is_copy(instr, n_vars):
+                copy_slots.add(instr.dest.index)
+                copy_slots.add(instr.source.index)
+    if copy_slots:
+        reaching = ReachingDefinitions(ir, copy_slots)
+        at_copy: Dict[int, int] = {}
+        for block in ir.blocks:
+            for instr, reach in reaching.walk(block.id):
+                if _is_copy(instr, n_vars):
+                    at_copy[reaching.bits[instr]] = (
+                        reach & reaching.of_variable[instr.source.index])
+        for block in ir.blocks:
+            for instr, reach in reaching.walk(block.id):
+                if instr.node is None:
+                    continue
+                for value in instr.uses():
+                    if not isinstance(value, Reg) or value.index >= n_vars:
+                        continue
+                    defs = reach & reaching.of_variable[value.index]
+                    if defs not in at_copy:
+                        continue
+                    source = reaching.definitions[defs.bit_length() - 1].source
+                    if (reach & reaching.of_variable[source.index]
+                            == at_copy[defs]):
+                        facts.copies[(id(instr.node), value.index)] = source.index
+
+    # Constantes e desvios decididos
+    to_ssa(ir)
+    sccp = ConstantPropagation(ir)
+    for block in ir.blocks:
+        if block.id not in sccp.reached:
+            continue
+        for instr in block.all_instructions():
+            if instr.node is None:
+                continue
+            for value in instr.uses():
+                if isinstance(value, Reg) and value.index < n_vars:
+                    constant = sccp.values.get(value)
+                    if constant is not None and constant is not VARYING:
+                        facts.constants[(id(instr.node), value.index)] = constant
+        decided = sccp.decision(block.id)
+        if decided is not None:
+            facts.decisions[id(block.terminator.node)] = decided
+    return facts
+
+
+def _is_copy(instr: Instruction, n_vars: int) -> bool:
+    return (isinstance(instr, Move) and isinstance(instr.source, Reg)
+            and instr.source.index < n_vars
+            and instr.source.index != instr.dest.index)
+
+
+# -----------------------
+# Reescrita da AST
+# -----------------------
+
+class DataflowOptimizer(ConstantFolder):
+    """
+    Aplica os fatos das análises durante uma passada de dobramento de
+    constantes (as expressões que ficam constantes são dobradas e os ramos
+    decididos, removidos, pela própria passada).
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.stats.update({
+            "constants_propagated": 0,
+            "copies_propagated": 0,
+            "dead_stores": 0,
+            "branches_decided": 0,
+        })
+        self.facts = Facts()
+        self.symbols: List[Any] = []
+        # Nó (comando ou comparação) cujas leituras estão sendo reescritas
+        self.node: Any = None
+        # Slots visíveis por nome no ponto atual (para cópias)
+        self.visible: Dict[str, List[int]] = {}
+        self.declared: List[List[str]] = []
+
+    def optimize(self, program: Program) -> Program:
+        self.symbols = resolve(program)
+        self.facts = collect_facts(program)
+        return super().optimize(program)
+
+    def fold_block(self, block: Block) -> Block:
+        self.declared.append([])
+        try:
+            return super().fold_block(block)
+        finally:
+            for name in self.declared.pop():
+                self.visible[name].pop()
+
+    def fold_command(self, cmd):
+        if isinstance(cmd, Declaration):
+            self.visible.setdefault(cmd.identifier, []).append(cmd.slot)
+            self.declared[-1].append(cmd.identifier)
+        elif isinstance(cmd, Assignment):
+            if id(cmd) in self.facts.dead and not can_fail(cmd.expression):
+                self.stats["dead_stores"] += 1
+                return None
+        self.node = cmd
+        return super().fold_command(cmd)
+
+    def fold_condition(self, cond):
+        if isinstance(cond, RelationalOp):
+            decided = self.facts.decisions.get(id(cond))
+            if decided is not None:
+                self.stats["branches_decided"] += 1
+                return decided
+            self.node = cond
+        return super().fold_condition(cond)
+
+    def fold_typed(self, expr):
+        if isinstance(expr, Identifier):
+            key = (id(self.node), expr.slot)
+            value = self.facts.constants.get(key)
+            if value is not None:
+                self.stats["constants_propagated"] += 1
+                return make_number(value), expr.type_name
+            source = self.facts.copies.get(key)
+            if source is not None and self.is_visible(source):
+                self.stats["copies_propagated"] += 1
+                symbol = self.symbols[source]
+                return (Identifier(symbol.name, symbol.slot, symbol.type_name),
+                        expr.type_name)
+        return super().fold_typed(expr)
+
+    def is_visible(self, slot: int) -> bool:
+        """Verdadeiro se o nome da variável do slot a alcança neste ponto"""
+        slots = self.visible.get(self.symbols[slot].name)
+        return bool(slots) and slots[-1] == slot
+
+
+def optimize_dataflow(program: Program, stats: Optional[Dict[str, int]] = None
+                      ) -> Program:
+    """
+    Aplica as otimizações de fluxo de dados até não haver mudança (no
+    máximo MAX_ROUNDS rodadas); os contadores são somados em stats.
+    """
+    with paused_gc():
+        for _ in range(MAX_ROUNDS):
+            optimizer = DataflowOptimizer()
+            optimized = optimizer.optimize(program)
+            if stats is not None:
+                for key, count in optimizer.stats.items():
+                    stats[key] = stats.get(key, 0) + count
+            if optimized is program:
+                break
+            program = optimized
+    return program
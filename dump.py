@@ -0,0 +1,269 @@
+# dump.py
+"""
+Saída de tokens e da AST em texto, JSON Lines, JSON ou binário
+
+Toda a escrita passa por um único DumpWriter, que junta os pedaços de texto
+e chama write() uma vez a cada BUFFER_SIZE caracteres; a AST é percorrida
+com uma pilha explícita e escrita enquanto é percorrida. Nada disso monta o
+dump inteiro na memória: a saída pode ser encadeada (pipe) com outros
+programas.
+
+Formatos:
+- text: o formato legível de sempre (format_token e a AST indentada);
+- jsonl: um objeto JSON por linha (por token; por nó da AST, com o id do
+  nó pai);
+- json: um único documento (lista de tokens; a AST como objetos aninhados);
+- binary: o arquivo de tokens de token_file.py, ou a AstArena gravada por
+  AstArena.write().
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import json
+import math
+from itertools import islice
+from json.encoder import encode_basestring
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from ast_arena import AstArena
+from lexer import Token, TokenType
+from parser import ASTNode
+from token_buffer import TokenBuffer
+from token_file import write_tokens as write_token_file
+
+FORMATS = ["text", "jsonl", "json", "binary"]
+
+# Caracteres acumulados antes de cada write()
+BUFFER_SIZE = 1 << 16
+# Tokens formatados e juntados de uma vez
+TOKEN_BATCH = 1024
+
+_COMMENTS = (TokenType.LINE_COMMENT, TokenType.BLOCK_COMMENT)
+_SCALARS = (type(None), bool, int, float, str)
+# Infinity e NaN não são JSON válido: sem allow_nan, escaparia um erro
+_encode_value = json.JSONEncoder(ensure_ascii=False, allow_nan=False).encode
+
+
+class DumpWriter:
+    """Junta pedaços de texto e os escreve em lotes no fluxo de saída"""
+
+    def __init__(self, out: TextIO, buffer_size: int = BUFFER_SIZE) -> None:
+        self.out = out
+        self.buffer_size = buffer_size
+        self._parts: List[str] = []
+        self._size = 0
+
+    def write(self, text: str) -> None:
+        self._parts.append(text)
+        self._size += len(text)
+        if self._size >= self.buffer_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._parts:
+            self.out.write("".join(self._parts))
+            self._parts.clear()
+            self._size = 0
+
+    def __enter__(self) -> DumpWriter:
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.flush()
+
+
+def json_value(value: Any) -> str:
+    """Escalar (None, bool, número ou str) em JSON
+
+    Floats não finitos (um literal grande demais para f64 vira infinito)
+    são escritos como as strings "inf", "-inf" e "nan".
+    """
+    if type(value) is str:
+        return encode_basestring(value)
+    if type(value) is float and not math.isfinite(value):
+        return f'"{value!r}"'
+    return _encode_value(value)
+
+
+# -----------------------
+# Tokens
+# -----------------------
+
+def format_token(t: Token) -> str:
+    """Formata um token para exibição"""
+    lexeme_display = t.lexeme if t.lexeme != "" else "''"
+    return f"{t.line}:{t.column} {t.type.name} {lexeme_display} {t.literal}"
+
+
+def token_json(t: Token) -> str:
+    literal = "null" if t.literal is None else json_value(t.literal)
+    return (f'{{"line":{t.line},"column":{t.column},"type":"{t.type.name}",'
+            f'"lexeme":{encode_basestring(t.lexeme)},"literal":{literal}}}')
+
+
+def write_tokens(out: TextIO, tokens: Iterable[Token], fmt: str = "text",
+                 keep_comments: bool = False) -> None:
+    """Escreve os tokens no formato `fmt` (binary exige um TokenBuffer)"""
+    if fmt == "binary":
+        if not isinstance(tokens, TokenBuffer):
+            raise ValueError("o formato binary exige um TokenBuffer")
+        if not keep_comments:
+            tokens = tokens.without_comments()
+        out.flush()
+        write_token_file(out.buffer, tokens)
+        out.buffer.flush()
+        return
+
+    if fmt == "text":
+        line, first, separator, last = format_token, "", "\n", "\n"
+    elif fmt == "jsonl":
+        line, first, separator, last = token_json, "", "\n", "\n"
+    elif fmt == "json":
+        line, first, separator, last = token_json, "[\n", ",\n", "\n]\n"
+    else:
+        raise ValueError(f"formato desconhecido: {fmt}")
+
+    if not keep_comments:
+        tokens = (t for t in tokens if t.type not in _COMMENTS)
+    lines = map(line, tokens)
+    with DumpWriter(out) as writer:
+        write = writer.write
+        write(first)
+        # Junta as linhas em lotes: uma chamada de write por lote
+        batch = list(islice(lines, TOKEN_BATCH))
+        if batch:
+            write(separator.join(batch))
+            while True:
+                batch = list(islice(lines, TOKEN_BATCH))
+                if not batch:
+                    break
+                write(separator)
+                write(separator.join(batch))
+            write(last)
+        elif fmt == "json":
+            write(last)
+
+
+# -----------------------
+# AST
+# -----------------------
+
+# Campos exibidos de cada classe de nó (sem as anotações da análise)
+_FIELDS: Dict[type, List[str]] = {}
+
+
+def ast_fields(node: Any) -> List[str]:
+    kind = node.__class__
+    names = _FIELDS.get(kind)
+    if names is None:
+        names = _FIELDS[kind] = [f.name for f in dataclasses.fields(node)
+                                 if f.repr]
+    return names
+
+
+def walk_ast(ast: ASTNode) -> Iterator[Tuple[int, Any, int, Optional[int],
+                                             Optional[str], Optional[int]]]:
+    """
+    Nós em pré-ordem, sem recursão: (id, nó, profundidade, id do pai,
+    campo do pai, posição na lista do campo). Funciona também sobre as
+    visões NodeView da AstArena.
+    """
+    stack: List[Tuple[Any, int, Optional[int], Optional[str],
+                      Optional[int]]] = [(ast, 0, None, None, None)]
+    next_id = 0
+    while stack:
+        node, depth, parent, field, index = stack.pop()
+        node_id = next_id
+        next_id += 1
+        yield node_id, node, depth, parent, field, index
+
+        children = []
+        for name in ast_fields(node):
+            value = getattr(node, name)
+            if isinstance(value, list):
+                children.extend((item, depth + 1, node_id, name, k)
+                                for k, item in enumerate(value)
+                                if isinstance(item, ASTNode))
+            elif isinstance(value, ASTNode):
+                children.append((value, depth + 1, node_id, name, None))
+        stack.extend(reversed(children))
+
+
+def _text_line(node: Any, depth: int) -> str:
+    attrs = []
+    for name in ast_fields(node):
+        value = getattr(node, name)
+        if isinstance(value, list):
+            attrs.append(f"{name}=[{len(value)} items]")
+        elif not isinstance(value, _SCALARS):
+            attrs.append(f"{name}=<{value.__class__.__name__}>")
+        else:
+            attrs.append(f"{name}={value!r}")
+    return f"{'  ' * depth}{node.__class__.__name__}({', '.join(attrs)})\n"
+
+
+def _jsonl_line(node_id: int, node: Any, parent: Optional[int],
+                field: Optional[str], index: Optional[int]) -> str:
+    parts = [f'{{"id":{node_id},"parent":{"null" if parent is None else parent}',
+             f',"field":{"null" if field is None else json_value(field)}']
+    if index is not None:
+        parts.append(f',"index":{index}')
+    parts.append(f',"type":"{node.__class__.__name__}"')
+    for name in ast_fields(node):
+        value = getattr(node, name)
+        if isinstance(value, _SCALARS):
+            parts.append(f',"{name}":{json_value(value)}')
+    parts.append("}\n")
+    return "".join(parts)
+
+
+def _write_ast_json(write, ast: ASTNode) -> None:
+    """AST como objetos JSON aninhados, escrita com uma pilha explícita"""
+    # A pilha guarda nós a abrir e trechos de texto (fechamentos, chaves)
+    stack: List[Any] = ["\n", ast]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            write(item)
+            continue
+        write(f'{{"type":"{item.__class__.__name__}"')
+        pending: List[Any] = []
+        for name in ast_fields(item):
+            value = getattr(item, name)
+            if isinstance(value, list):
+                pending.append(f',"{name}":[')
+                for k, child in enumerate(value):
+                    if k:
+                        pending.append(",")
+                    pending.append(child)
+                pending.append("]")
+            elif isinstance(value, ASTNode):
+                pending.append(f',"{name}":')
+                pending.append(value)
+            else:
+                write(f',"{name}":{json_value(value)}')
+        pending.append("}")
+        stack.extend(reversed(pending))
+
+
+def write_ast(out: TextIO, ast: ASTNode, fmt: str = "text") -> None:
+    """Escreve a AST no formato `fmt`"""
+    if fmt == "binary":
+        out.flush()
+        AstArena.from_ast(ast).write(out.buffer)
+        out.buffer.flush()
+        return
+
+    with DumpWriter(out) as writer:
+        write = writer.write
+        if fmt == "text":
+            for _, node, depth, _, _, _ in walk_ast(ast):
+                write(_text_line(node, depth))
+        elif fmt == "jsonl":
+            for node_id, node, _, parent, field, index in walk_ast(ast):
+                write(_jsonl_line(node_id, node, parent, field, index))
+        elif fmt == "json":
+            _write_ast_json(write, ast)
+        else:
+            raise ValueError(f"formato desconhecido: {fmt}")
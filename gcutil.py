@@ -0,0 +1,26 @@
+# gcutil.py
+"""
+Controle do coletor de ciclos do Python
+
+Passadas que criam centenas de milhares de objetos sem ciclos (a AST, o IR)
+disparam coletas repetidas da geração mais velha, que percorrem tudo o que
+já foi criado e tornam a passada superlinear. paused_gc() suspende o
+coletor durante a passada; a contagem de referências continua liberando os
+objetos normalmente.
+"""
+
+import gc
+from contextlib import contextmanager
+from typing import Iterator
+
+
+@contextmanager
+def paused_gc() -> Iterator[None]:
+    """Suspende o coletor de ciclos no bloco (e o reativa se estava ativo)"""
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
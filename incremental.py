@@ -0,0 +1,945 @@
+# incremental.py
+"""
+Re-análise léxica e sintática incremental
+
+Após uma edição de texto (offset inicial, offset final, texto novo), apenas
+o trecho afetado é varrido novamente:
+
+- A varredura recomeça no fim do último token que termina antes da edição.
+  Entre dois tokens o lexer não guarda estado algum além da posição, então
+  esse é sempre um ponto seguro, mesmo com comentários de bloco ou strings
+  não finalizados (eles viram um único token que vai até onde terminam).
+- A varredura para assim que o lexer, já depois da edição, termina um token
+  exatamente na posição (deslocada) em que algum token antigo terminava:
+  a partir dali o fluxo é idêntico ao anterior.
+- O buffer é alterado no lugar. Os tokens ficam em pedaços (ChunkedTable)
+  com offsets relativos ao início de cada pedaço, e o texto também
+  (ChunkedText): só os pedaços que contêm o trecho editado são reescritos,
+  e os tokens seguintes não são deslocados um a um. O lexer varre apenas
+  uma janela do texto novo em torno da edição.
+
+Na parte sintática, o IncrementalParser registra a faixa de tokens de cada
+Block e Command. Após uma edição, apenas o menor Block que contém a faixa de
+tokens alterada é re-analisado; comandos antigos cuja faixa não foi tocada
+são reaproveitados como estão e reinseridos na árvore. As faixas ficam
+relativas ao nó pai, e as posições (linha/coluna) dos nós seguintes à
+edição são recalculadas só quando a AST é lida: uma edição mexe apenas nos
+nós do caminho até a raiz e nos irmãos que vêm depois deles.
+"""
+
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from itertools import repeat
+from operator import add, sub
+from typing import (Any, Dict, Iterable, Iterator, List, NamedTuple,
+                    Optional, Sequence, Tuple)
+
+from lexer import Lexer, LexerError, Token, TokenType
+from parser import (Parser, ParserError, ASTNode, Program, Block, Command,
+                    Conditional, While)
+from token_buffer import (TokenBuffer, TOKEN_CODES, TOKEN_TYPES,
+                          offset_typecode)
+
+# Faixa de tokens de um nó: (nó, índice inicial, índice final exclusivo)
+Span = Tuple[ASTNode, int, int]
+
+
+class TokenEdit(NamedTuple):
+    """Faixa de tokens trocada: antigos [start, old_end) -> novos [start, new_end)"""
+    start: int
+    old_end: int
+    new_end: int
+
+
+# Número de linhas por pedaço de um ChunkedTable
+CHUNK = 128
+
+# Caracteres por pedaço de um ChunkedText
+TEXT_CHUNK = 4096
+
+# Caracteres além da edição na primeira janela que relex() varre
+WINDOW = 1024
+
+
+class ChunkedText:
+    """
+    Texto em pedaços de até ~TEXT_CHUNK caracteres, com o offset inicial de
+    cada um em `starts`: uma edição reescreve só os pedaços que toca. O
+    texto inteiro é montado (e guardado) só quando é pedido por str().
+    """
+
+    def __init__(self, text: str) -> None:
+        self.pieces = [text[i:i + TEXT_CHUNK]
+                       for i in range(0, len(text), TEXT_CHUNK)] or [""]
+        self.starts = list(range(0, len(text), TEXT_CHUNK)) or [0]
+        self.length = len(text)
+        self._joined: Optional[str] = text
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __str__(self) -> str:
+        if self._joined is None:
+            self._joined = "".join(self.pieces)
+        return self._joined
+
+    def slice(self, start: int, stop: int) -> str:
+        """O mesmo que str(self)[start:stop], para 0 <= start <= stop"""
+        if self._joined is not None:
+            return self._joined[start:stop]
+        stop = min(stop, self.length)
+        if start >= stop:
+            return ""
+        starts, pieces = self.starts, self.pieces
+        a = bisect_right(starts, start) - 1
+        b = bisect_right(starts, stop - 1) - 1
+        if a == b:
+            return pieces[a][start - starts[a]:stop - starts[a]]
+        return "".join([pieces[a][start - starts[a]:], *pieces[a + 1:b],
+                        pieces[b][:stop - starts[b]]])
+
+    def replace(self, start: int, end: int, new_text: str) -> None:
+        """Aplica a edição self[start:end] = new_text"""
+        starts, pieces = self.starts, self.pieces
+        delta = len(new_text) - (end - start)
+        a = bisect_right(starts, start) - 1
+        b = max(bisect_right(starts, end - 1) - 1, a)
+        # Um pedaço pequeno demais é juntado ao seguinte
+        stop = starts[b + 1] if b + 1 < len(starts) else self.length
+        if stop - starts[a] + delta < TEXT_CHUNK // 2 and b + 1 < len(starts):
+            b += 1
+        lo = starts[a]
+        merged = "".join(pieces[a:b + 1])
+        merged = merged[:start - lo] + new_text + merged[end - lo:]
+        count = max(-(-len(merged) // TEXT_CHUNK), 1)
+        bounds = [len(merged) * k // count for k in range(count + 1)]
+        if not merged and len(pieces) > b - a + 1:
+            count, bounds = 0, [0]  # o pedaço some; o texto não fica vazio
+        pieces[a:b + 1] = [merged[i:j] for i, j in zip(bounds, bounds[1:])]
+        starts[a:b + 1] = [lo + i for i in bounds[:-1]]
+        if delta:
+            after = a + count
+            starts[after:] = map(add, starts[after:], repeat(delta))
+        self.length += delta
+        self._joined = None
+
+
+class ChunkedTable:
+    """
+    Colunas paralelas de inteiros divididas em pedaços de até ~CHUNK linhas,
+    como as peças de uma tabela de peças. `firsts` guarda o índice da
+    primeira linha de cada pedaço. As `offsets` primeiras colunas são
+    offsets no texto, guardados relativos a `bases`: o valor da coluna 0 na
+    primeira linha do pedaço.
+
+    Trocar uma faixa de linhas reescreve só os pedaços que ela toca; nos
+    seguintes, os valores ficam como estão e basta somar os deslocamentos a
+    `firsts` e `bases`. Cada pedaço tem ainda um dicionário esparso de extras
+    (os literais dos tokens), indexado pela posição dentro do pedaço.
+    """
+
+    def __init__(self, columns: Sequence[array], offsets: int,
+                 extras: Optional[Dict[int, Any]] = None) -> None:
+        self.typecodes = [col.typecode for col in columns]
+        self.offsets = offsets
+        self.size = len(columns[0])
+        self.firsts, self.bases, self.chunks = self._pieces(0, columns,
+                                                            extras or {})
+
+    def _pieces(self, first: int, columns: Sequence[Sequence[int]],
+                extras: Dict[int, Any]) -> Tuple[List[int], List[int],
+                                                 List[list]]:
+        """Divide linhas com valores reais (extras a partir de 0) em pedaços"""
+        size = len(columns[0])
+        count = -(-size // CHUNK)
+        if not count:
+            return [], [], []
+        bounds = [size * k // count for k in range(count + 1)]
+        firsts, bases, chunks = [], [], []
+        for lo, hi in zip(bounds, bounds[1:]):
+            base = columns[0][lo] if self.offsets else 0
+            chunk: list = []
+            for j, col in enumerate(columns):
+                if j < self.offsets:
+                    chunk.append(array(offset_typecode(col[hi - 1] - base),
+                                       map(sub, col[lo:hi], repeat(base))))
+                else:
+                    chunk.append(array(self.typecodes[j], col[lo:hi]))
+            chunk.append({})
+            firsts.append(first + lo)
+            bases.append(base)
+            chunks.append(chunk)
+        for i, value in extras.items():
+            k = bisect_right(bounds, i) - 1
+            chunks[k][-1][i - bounds[k]] = value
+        return firsts, bases, chunks
+
+    def locate(self, index: int) -> Tuple[int, int]:
+        """(pedaço, posição no pedaço) da linha `index`"""
+        if not 0 <= index < self.size:
+            raise IndexError("índice fora da tabela")
+        k = bisect_right(self.firsts, index) - 1
+        return k, index - self.firsts[k]
+
+    def replace(self, start: int, stop: int, columns: Sequence[Sequence[int]],
+                extras: Dict[int, Any], delta: int) -> None:
+        """
+        Troca as linhas [start, stop) pelas de `columns` (valores já no texto
+        novo; `extras` indexados a partir de `start`). Os offsets das linhas
+        seguintes são deslocados por `delta`.
+        """
+        firsts, bases, chunks = self.firsts, self.bases, self.chunks
+        shift = len(columns[0]) - (stop - start)
+        if chunks:
+            a = max(bisect_right(firsts, start) - 1, 0)
+            b = max(bisect_right(firsts, stop - 1) - 1, a)
+            # Um pedaço pequeno demais é juntado ao seguinte
+            end = firsts[b + 1] if b + 1 < len(chunks) else self.size
+            if end - firsts[a] + shift < CHUNK // 2 and b + 1 < len(chunks):
+                b += 1
+            lo = firsts[a]
+        else:
+            a, b, lo = 0, -1, 0
+
+        # Valores reais das linhas dos pedaços a..b, já com a troca
+        merged = []
+        for j in range(len(self.typecodes)):
+            old: List[int] = []
+            for k in range(a, b + 1):
+                col = chunks[k][j]
+                if j < self.offsets:
+                    old.extend(map(add, col, repeat(bases[k])))
+                else:
+                    old.extend(col)
+            tail = old[stop - lo:]
+            if j < self.offsets and delta:
+                tail = list(map(add, tail, repeat(delta)))
+            merged.append(old[:start - lo] + list(columns[j]) + tail)
+        merged_extras = {start - lo + i: value for i, value in extras.items()}
+        for k in range(a, b + 1):
+            for i, value in chunks[k][-1].items():
+                i += firsts[k] - lo
+                if i < start - lo:
+                    merged_extras[i] = value
+                elif i >= stop - lo:
+                    merged_extras[i + shift] = value
+
+        new_firsts, new_bases, new_chunks = self._pieces(lo, merged,
+                                                         merged_extras)
+        firsts[a:b + 1] = new_firsts
+        bases[a:b + 1] = new_bases
+        chunks[a:b + 1] = new_chunks
+        after = a + len(new_chunks)
+        if shift:
+            firsts[after:] = map(add, firsts[after:], repeat(shift))
+        if delta and self.offsets:
+            bases[after:] = map(add, bases[after:], repeat(delta))
+        self.size += shift
+
+    def nbytes(self) -> int:
+        return sum(col.itemsize * len(col)
+                   for chunk in self.chunks for col in chunk[:-1])
+
+
+class ChunkedColumn:
+    """Uma coluna de um ChunkedTable, vista como sequência somente leitura"""
+
+    __slots__ = ("table", "column", "offset")
+
+    def __init__(self, table: ChunkedTable, column: int) -> None:
+        self.table = table
+        self.column = column
+        self.offset = column < table.offsets
+
+    def __len__(self) -> int:
+        return self.table.size
+
+    def __getitem__(self, index: int) -> int:
+        table = self.table
+        if index < 0:
+            index += table.size
+        k, i = table.locate(index)
+        value = table.chunks[k][self.column][i]
+        return value + table.bases[k] if self.offset else value
+
+    def __iter__(self) -> Iterator[int]:
+        column = self.column
+        for base, chunk in zip(self.table.bases, self.table.chunks):
+            if self.offset:
+                yield from map(add, chunk[column], repeat(base))
+            else:
+                yield from chunk[column]
+
+    def bisect_left(self, value: int, lo: int = 0,
+                    hi: Optional[int] = None) -> int:
+        return self._bisect(bisect_left, value, lo, hi)
+
+    def bisect_right(self, value: int, lo: int = 0,
+                     hi: Optional[int] = None) -> int:
+        return self._bisect(bisect_right, value, lo, hi)
+
+    def _bisect(self, find, value: int, lo: int, hi: Optional[int]) -> int:
+        """Busca binária em uma coluna de offsets (valores crescentes)"""
+        table = self.table
+        # Os pedaços a partir de k começam depois de `value`, e toda coluna
+        # de offsets é >= a coluna 0 na mesma linha: a resposta é a primeira
+        # linha do pedaço k ou está no pedaço anterior
+        k = find(table.bases, value)
+        index = table.firsts[k] if k < len(table.firsts) else table.size
+        if k > 0:
+            col = table.chunks[k - 1][self.column]
+            i = find(col, value - table.bases[k - 1])
+            if i < len(col):
+                index = table.firsts[k - 1] + i
+        if hi is None:
+            hi = table.size
+        return min(max(index, lo), hi)
+
+
+class ChunkedExtras:
+    """Os extras (literais) de um ChunkedTable, vistos como dicionário"""
+
+    __slots__ = ("table",)
+
+    def __init__(self, table: ChunkedTable) -> None:
+        self.table = table
+
+    def get(self, index: int, default: Any = None) -> Any:
+        if not 0 <= index < self.table.size:
+            return default
+        k, i = self.table.locate(index)
+        return self.table.chunks[k][-1].get(i, default)
+
+    def __getitem__(self, index: int) -> Any:
+        k, i = self.table.locate(index)
+        return self.table.chunks[k][-1][i]
+
+    def __contains__(self, index: int) -> bool:
+        if not 0 <= index < self.table.size:
+            return False
+        k, i = self.table.locate(index)
+        return i in self.table.chunks[k][-1]
+
+    def __len__(self) -> int:
+        return sum(len(chunk[-1]) for chunk in self.table.chunks)
+
+    def items(self) -> Iterator[Tuple[int, Any]]:
+        for first, chunk in zip(self.table.firsts, self.table.chunks):
+            for i, value in sorted(chunk[-1].items()):
+                yield first + i, value
+
+
+class EditableTokenBuffer(TokenBuffer):
+    """
+    TokenBuffer alterado no lugar por relex(): início, fim, tipo e literal
+    dos tokens ficam em um ChunkedTable, e os inícios de linha em outro.
+    """
+
+    def __init__(self, source: str, table: ChunkedTable, lines: ChunkedTable,
+                 keep_comments: bool = False) -> None:
+        super().__init__(source, ChunkedColumn(table, 2),
+                         ChunkedColumn(table, 0), ChunkedColumn(table, 1),
+                         ChunkedExtras(table), keep_comments,
+                         ChunkedColumn(lines, 0))
+        self.table = table
+        self.lines = lines
+
+    @property
+    def source(self) -> str:
+        return str(self.text)
+
+    @source.setter
+    def source(self, source: str) -> None:
+        self.text = ChunkedText(source)
+
+    @classmethod
+    def from_buffer(cls, buffer: TokenBuffer) -> EditableTokenBuffer:
+        table = ChunkedTable([buffer.starts, buffer.ends, buffer.types], 2,
+                             buffer.literals)
+        lines = ChunkedTable([buffer.line_starts], 1)
+        return cls(buffer.source, table, lines, buffer.keep_comments)
+
+    def _materialize(self, index: int) -> Token:
+        table = self.table
+        k, i = table.locate(index)
+        starts, ends, types, literals = table.chunks[k]
+        start = starts[i] + table.bases[k]
+        line, column = self.position_of(start)
+        return Token(TOKEN_TYPES[types[i]],
+                     self.text.slice(start, ends[i] + table.bases[k]),
+                     literals.get(i), line, column)
+
+    def lexeme_at(self, index: int) -> str:
+        return self.text.slice(self.starts[index], self.ends[index])
+
+    def position_of(self, offset: int) -> Tuple[int, int]:
+        line_starts = self._line_starts
+        line = line_starts.bisect_right(offset)
+        return line, offset - line_starts[line - 1] + 1
+
+    def positions(self, indices: Iterable[int]) -> Iterator[Tuple[int, int]]:
+        """
+        (linha, coluna) de vários tokens, em ordem crescente de índice: os
+        pedaços das duas tabelas são percorridos uma vez só
+        """
+        table, lines = self.table, self.lines
+        stop = line_stop = -1
+        for index in indices:
+            if index >= stop:
+                k = bisect_right(table.firsts, index) - 1
+                first, base = table.firsts[k], table.bases[k]
+                starts = table.chunks[k][0]
+                stop = first + len(starts)
+            offset = starts[index - first] + base
+            if offset >= line_stop:
+                j = bisect_right(lines.bases, offset) - 1
+                line, line_base = lines.firsts[j] + 1, lines.bases[j]
+                line_starts = lines.chunks[j][0]
+                line_stop = (lines.bases[j + 1] if j + 1 < len(lines.bases)
+                             else offset + 1)
+            i = bisect_right(line_starts, offset - line_base) - 1
+            yield line + i, offset - line_base - line_starts[i] + 1
+
+    def nbytes(self) -> int:
+        return self.table.nbytes()
+
+
+def relex(buffer: EditableTokenBuffer, start: int, end: int, new_text: str,
+          engine: str = "classic") -> TokenEdit:
+    """
+    Aplica a edição source[start:end] = new_text ao buffer, no lugar.
+
+    O resultado é idêntico a TokenBuffer.from_lexer() sobre o novo texto. O
+    lexer varre só uma janela do texto novo, do ponto de reinício até um
+    pouco além da edição (dobrada enquanto não basta), e só os pedaços com a
+    faixa de tokens re-analisada são reescritos.
+    """
+    text = buffer.text
+    length = len(text)
+    if not 0 <= start <= end <= length:
+        raise LexerError(f"edição fora do texto: [{start}, {end})")
+
+    delta = len(new_text) - (end - start)
+    edit_end = start + len(new_text)  # fim da edição no texto novo
+
+    old_ends = buffer.ends
+    n_old = len(buffer.types)
+
+    # Ponto de reinício: fim do último token que termina antes da edição
+    first = old_ends.bisect_left(start)
+    restart = old_ends[first - 1] if first > 0 else 0
+    line, column = buffer.position_of(restart)
+
+    # Só tokens antigos que não sejam o EOF servem de ponto de sincronização
+    last_sync = n_old - 1
+    codes = TOKEN_CODES
+    extra = WINDOW
+    while True:
+        stop = min(end + extra, length)
+        window = text.slice(restart, start) + new_text + text.slice(end, stop)
+        # O lexer olha no máximo dois caracteres além do token: tokens que
+        # chegam perto do fim da janela dependem do texto que ficou fora dela
+        limit = len(window) if stop == length else len(window) - 2
+        lexer = Lexer(window, keep_comments=buffer.keep_comments,
+                      engine=engine)
+        lexer.reset(0, line, column)
+
+        mid_types = array("B")
+        mid_starts = []
+        mid_ends = []
+        mid_literals: Dict[int, Any] = {}
+        resume = n_old  # primeiro token antigo reaproveitado (n_old = nenhum)
+        while True:
+            tok = lexer.next_token()
+            if lexer.index > limit:
+                break
+            tok_end = restart + lexer.index
+            if tok.literal is not None:
+                mid_literals[len(mid_types)] = tok.literal
+            mid_types.append(codes[tok.type])
+            mid_starts.append(tok_end - len(tok.lexeme))
+            mid_ends.append(tok_end)
+            if tok.type == TokenType.EOF:
+                break
+            if tok_end >= edit_end:
+                target = tok_end - delta
+                j = old_ends.bisect_left(target, first, last_sync)
+                if j < last_sync and old_ends[j] == target:
+                    resume = j + 1
+                    break
+        if lexer.index <= limit:
+            break
+        extra *= 2
+
+    # Troca só a faixa [first, resume); a cauda fica como está
+    buffer.table.replace(first, resume, [mid_starts, mid_ends, mid_types],
+                         mid_literals, delta)
+
+    new_lines = []
+    idx = new_text.find("\n")
+    while idx != -1:
+        new_lines.append(start + idx + 1)
+        idx = new_text.find("\n", idx + 1)
+    line_starts = buffer.line_starts
+    buffer.lines.replace(line_starts.bisect_left(start + 1),
+                         line_starts.bisect_left(end + 1), [new_lines], {},
+                         delta)
+
+    text.replace(start, end, new_text)
+    buffer._cache.clear()
+    return TokenEdit(first, resume, first + len(mid_types))
+
+
+class IncrementalLexer:
+    """Mantém o fluxo de tokens de um documento atualizado a cada edição"""
+
+    def __init__(self, source: str, keep_comments: bool = False,
+                 engine: str = "classic") -> None:
+        self.engine = engine
+        self.tokens = EditableTokenBuffer.from_buffer(TokenBuffer.from_lexer(
+            Lexer(source, keep_comments=keep_comments, engine=engine)))
+
+    @property
+    def source(self) -> str:
+        return self.tokens.source
+
+    def edit(self, start: int, end: int, new_text: str) -> TokenEdit:
+        """Aplica a edição e devolve a faixa de tokens que mudou"""
+        return relex(self.tokens, start, end, new_text, self.engine)
+
+
+# -----------------------
+# Re-análise sintática
+# -----------------------
+
+def child_blocks(node: ASTNode) -> List[Block]:
+    """Blocos aninhados diretamente em um comando"""
+    if isinstance(node, Block):
+        return [node]
+    if isinstance(node, Conditional):
+        if node.else_block is not None:
+            return [node.then_block, node.else_block]
+        return [node.then_block]
+    if isinstance(node, While):
+        return [node.block]
+    return []
+
+
+def child_nodes(node: ASTNode) -> List[ASTNode]:
+    """Filhos com faixa de um nó: comandos de um Block, blocos de um comando"""
+    if isinstance(node, Block):
+        return node.commands
+    return child_blocks(node)
+
+
+@dataclass
+class NodeSpan:
+    """Faixa de tokens de um Block/Command, relativa ao início do nó pai"""
+    node: ASTNode
+    parent: Optional[ASTNode]  # None na raiz, cuja faixa é absoluta
+    start: int
+    length: int
+
+
+class IncrementalParser(Parser):
+    """
+    Parser que registra a faixa de tokens de cada Block/Command e reaproveita
+    comandos antigos (candidates: início antigo -> Span) fora da edição.
+    """
+
+    def __init__(self, tokens, candidates: Optional[Dict[int, Span]] = None,
+                 change: Optional[TokenEdit] = None) -> None:
+        super().__init__(tokens)
+        self.spans: Dict[int, Span] = {}
+        self.reused: Dict[int, ASTNode] = {}
+        self._candidates = candidates or {}
+        self._change = change
+
+    def parse_block(self) -> Block:
+        start = self.current
+        block = super().parse_block()
+        self.spans[id(block)] = (block, start, self.current)
+        return block
+
+    def parse_command(self) -> Command:
+        start = self.current
+        if self._candidates:
+            node = self._reuse(start)
+            if node is not None:
+                return node
+        node = super().parse_command()
+        self.spans[id(node)] = (node, start, self.current)
+        return node
+
+    def _reuse(self, start: int) -> Optional[Command]:
+        """Reaproveita o comando antigo que começa na posição equivalente"""
+        first, old_end, new_end = self._change
+        shift = new_end - old_end
+        if start < first:
+            old_start = start
+        elif start >= new_end:
+            old_start = start - shift
+        else:
+            return None
+
+        span = self._candidates.get(old_start)
+        if span is None:
+            return None
+        node, _, stop = span
+        if start < first:
+            # O token seguinte ao comando também é lido (ex.: 'else' após
+            # um 'if'), então ele precisa estar fora da edição
+            if stop >= first:
+                return None
+        else:
+            stop += shift
+
+        self.current = stop
+        self.reused[id(node)] = node
+        self.spans[id(node)] = (node, start, stop)
+        return node
+
+
+class IncrementalDocument:
+    """
+    Documento cujos tokens e AST são atualizados a cada edição de texto.
+
+    Re-análises parciais só acontecem a partir de uma AST sem erros; caso
+    contrário (ou se a edição desbalancear os blocos até a raiz) o programa
+    é analisado por inteiro, garantindo o mesmo resultado de Parser.parse().
+
+    A re-análise é proporcional ao bloco editado. Como a faixa de cada nó é
+    relativa ao pai (NodeSpan), fora do bloco só mudam o tamanho dos blocos
+    que o envolvem e o início dos nós que os seguem, no caminho até a raiz.
+    As posições (linha/coluna) dos nós seguintes à edição são atualizadas
+    na hora quando o número de linhas não muda (só os nós da linha editada
+    mudam); caso contrário, quando `ast` é lido.
+    """
+
+    def __init__(self, source: str, engine: str = "classic") -> None:
+        self.lexer = IncrementalLexer(source, keep_comments=False,
+                                      engine=engine)
+        self.errors: List[ParserError] = []
+        self.spans: Dict[int, NodeSpan] = {}
+        self.reparsed: Optional[Block] = None  # último bloco re-analisado
+        self._ast: Optional[Program] = None
+        # Nós com filhos de posições desatualizadas: id -> (nó, início
+        # relativo a partir do qual os filhos e descendentes estão errados)
+        self._stale: Dict[int, Tuple[ASTNode, int]] = {}
+        self._parse_all()
+
+    @property
+    def source(self) -> str:
+        return self.lexer.source
+
+    @property
+    def tokens(self) -> EditableTokenBuffer:
+        return self.lexer.tokens
+
+    @property
+    def ast(self) -> Optional[Program]:
+        if self._stale:
+            self._refresh()
+        return self._ast
+
+    def span(self, node: ASTNode) -> Tuple[int, int]:
+        """Faixa de tokens [início, fim) de um Block ou Command da AST"""
+        start = 0
+        current: Optional[ASTNode] = node
+        while current is not None:
+            entry = self.spans[id(current)]
+            start += entry.start
+            current = entry.parent
+        return start, start + self.spans[id(node)].length
+
+    def edit(self, start: int, end: int, new_text: str) -> TokenEdit:
+        """Aplica a edição e devolve a faixa de tokens que mudou"""
+        # Quantas linhas a edição acrescenta
+        tokens = self.tokens
+        line_delta = (new_text.count("\n") - tokens.position_of(end)[0]
+                      + tokens.position_of(start)[0])
+        change = self.lexer.edit(start, end, new_text)
+        if not self._reparse(change, start + len(new_text), line_delta):
+            self._parse_all()
+        if self._ast is not None:
+            # A tabela de símbolos da versão anterior não vale mais
+            self._ast.symbols = None
+        return change
+
+    def _parse_all(self) -> None:
+        parser = IncrementalParser(self.tokens)
+        self._ast = parser.parse()
+        self.errors = parser.errors
+        self.spans = {}
+        if self._ast is not None:
+            self._adopt([self._ast.block], None, 0, parser.spans, {})
+        self._stale = {}
+        self.reparsed = None
+
+    def _children(self, node: ASTNode, start: int,
+                  first: int = 0) -> Iterator[Tuple[ASTNode, int]]:
+        """Filhos de um nó que começa em `start`, com o início absoluto"""
+        spans = self.spans
+        for child in child_nodes(node)[first:]:
+            yield child, start + spans[id(child)].start
+
+    def _adopt(self, nodes: List[ASTNode], parent: Optional[ASTNode],
+               parent_start: int, fresh: Dict[int, Span],
+               reused: Dict[int, ASTNode]) -> None:
+        """
+        Registra as faixas de nós recém-analisados (absolutas, em `fresh`).
+        Dos reaproveitados só muda a própria faixa: a dos descendentes é
+        relativa e continua valendo.
+        """
+        stack = [(node, parent, parent_start) for node in nodes]
+        while stack:
+            node, parent, base = stack.pop()
+            _, start, stop = fresh[id(node)]
+            self.spans[id(node)] = NodeSpan(node, parent, start - base,
+                                            stop - start)
+            if id(node) not in reused:
+                stack.extend((child, node, start)
+                             for child in child_nodes(node))
+
+    def _reparse(self, change: TokenEdit, edit_end: int,
+                 line_delta: int) -> bool:
+        if self._ast is None or self.errors:
+            return False
+
+        first, old_end, new_end = change
+        # Se nenhum token mudou (espaços/comentários), só as posições mudam
+        if not first == old_end == new_end:
+            # Do bloco mais interno ao mais externo que contém a edição
+            path = self._enclosing_path(first, old_end)
+            for depth in reversed(range(len(path))):
+                if (isinstance(path[depth][0], Block)
+                        and self._reparse_block(path, depth, change)):
+                    break
+            else:
+                return False
+            self.reparsed = path[depth][0]
+        else:
+            self.reparsed = None
+        self._relocate(new_end, edit_end, line_delta)
+        return True
+
+    def _contains(self, node: ASTNode, start: int, first: int,
+                  old_end: int) -> bool:
+        # '{' antes da edição e '}' depois dela
+        return start < first and old_end < start + self.spans[id(node)].length
+
+    def _enclosing_path(self, first: int,
+                        old_end: int) -> List[Tuple[ASTNode, int]]:
+        """
+        Nós (com o início absoluto) no caminho da raiz até o menor Block que
+        contém a edição; cada um é filho do anterior
+        """
+        spans = self.spans
+        path: List[Tuple[ASTNode, int]] = []
+        block = self._ast.block
+        start = spans[id(block)].start
+        while self._contains(block, start, first, old_end):
+            path.append((block, start))
+            commands = block.commands
+            # Primeiro comando que termina depois do início da edição
+            i = bisect_right(commands, first - start,
+                             key=lambda cmd: (spans[id(cmd)].start
+                                              + spans[id(cmd)].length))
+            if i == len(commands):
+                break
+            cmd = commands[i]
+            cmd_start = start + spans[id(cmd)].start
+            if cmd_start >= old_end:
+                break
+            if isinstance(cmd, Block):
+                blocks = [(cmd, cmd_start)]
+            else:
+                blocks = list(self._children(cmd, cmd_start))
+            inner = None
+            for child, child_start in blocks:
+                if self._contains(child, child_start, first, old_end):
+                    inner = (child, child_start)
+            if inner is None:
+                break
+            if inner[0] is not cmd:
+                path.append((cmd, cmd_start))
+            block, start = inner
+        return path
+
+    def _collect(self, block: Block, block_start: int, first: int,
+                 old_end: int, candidates: Dict[int, Span]) -> None:
+        """Comandos antigos que podem ser reaproveitados dentro do bloco"""
+        stack = [(block, block_start)]
+        while stack:
+            block, base = stack.pop()
+            for cmd, start in self._children(block, base):
+                stop = start + self.spans[id(cmd)].length
+                candidates[start] = (cmd, start, stop)
+                if stop < first or start >= old_end:
+                    continue  # reaproveitável inteiro: não precisa descer
+                if isinstance(cmd, Block):
+                    stack.append((cmd, start))
+                else:
+                    stack.extend(self._children(cmd, start))
+
+    def _reparse_block(self, path: List[Tuple[ASTNode, int]], depth: int,
+                       change: TokenEdit) -> bool:
+        first, old_end, new_end = change
+        shift = new_end - old_end
+        block, start = path[depth]
+        stop = start + self.spans[id(block)].length
+
+        candidates: Dict[int, Span] = {}
+        self._collect(block, start, first, old_end, candidates)
+
+        parser = IncrementalParser(self.tokens, candidates, change)
+        parser.current = start
+        try:
+            new_block = parser.parse_block()
+        except ParserError:
+            return False
+        if parser.errors or parser.current != stop + shift:
+            return False
+
+        # Limites de marcas de posição dentro do bloco que estavam depois do
+        # início da edição passam a valer a partir dele
+        rel_first = first - start
+        mark = self._stale.get(id(block))
+        if mark is not None and mark[1] > rel_first:
+            self._stale[id(block)] = (block, max(rel_first, mark[1] + shift))
+
+        # Remove as faixas dos nós antigos que não foram reaproveitados. Se
+        # algum tinha marca, os descendentes reaproveitados a herdam
+        for node, node_start, _ in candidates.values():
+            if (id(node) not in parser.reused
+                    and self._discard(node, parser.reused)):
+                self._mark(block, min(node_start, first) - start)
+
+        # O Block antigo continua na árvore, com os comandos novos
+        block.commands = new_block.commands
+        self._adopt(block.commands, block, start, parser.spans,
+                    parser.reused)
+        if shift:
+            # Os nós do caminho mudam de tamanho e os irmãos seguintes a
+            # cada um deles (e as marcas que os cobrem), de início
+            spans, stale = self.spans, self._stale
+            for k in range(depth, -1, -1):
+                node = path[k][0]
+                spans[id(node)].length += shift
+                if k == 0:
+                    break
+                parent = path[k - 1][0]
+                node_start = spans[id(node)].start
+                mark = stale.get(id(parent))
+                if mark is not None and mark[1] > node_start:
+                    stale[id(parent)] = (parent, mark[1] + shift)
+                siblings = child_nodes(parent)
+                i = bisect_right(siblings, node_start,
+                                 key=lambda sibling: spans[id(sibling)].start)
+                for sibling in siblings[i:]:
+                    spans[id(sibling)].start += shift
+        return True
+
+    def _discard(self, node: ASTNode, reused: Dict[int, ASTNode]) -> bool:
+        """
+        Remove as faixas de um nó antigo e dos descendentes não reaproveitados;
+        devolve se algum deles tinha marca de posições desatualizadas
+        """
+        stale = False
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if id(node) in reused or self.spans.pop(id(node), None) is None:
+                continue
+            stale = self._stale.pop(id(node), None) is not None or stale
+            stack.extend(child_nodes(node))
+        return stale
+
+    def _mark(self, node: ASTNode, start: int) -> None:
+        """Marca os filhos de `node` a partir do início relativo `start`"""
+        mark = self._stale.get(id(node))
+        if mark is None or start < mark[1]:
+            self._stale[id(node)] = (node, start)
+
+    def _boundary(self, index: int) -> List[Tuple[ASTNode, int, int]]:
+        """
+        (nó, início absoluto, i) do nó mais interno à raiz, no caminho até o
+        token `index`: os filhos a partir do i-ésimo começam em `index` ou
+        depois, e com as subárvores deles formam o resto do texto
+        """
+        spans = self.spans
+        levels = []
+        node = self._ast.block
+        start = spans[id(node)].start
+        while True:
+            children = child_nodes(node)
+            i = bisect_left(children, index - start,
+                            key=lambda child: spans[id(child)].start)
+            levels.append((node, start, i))
+            if i == 0:
+                break
+            node = children[i - 1]
+            start += spans[id(node)].start
+            if start + spans[id(node)].length <= index:
+                break
+        levels.reverse()
+        return levels
+
+    def _relocate(self, index: int, edit_end: int, line_delta: int) -> None:
+        """Atualiza as posições dos nós que começam no token `index` ou depois"""
+        levels = self._boundary(index)
+        if line_delta:
+            for node, start, _ in levels:
+                self._mark(node, index - start)
+            return
+
+        # Sem linhas novas, só mudam os nós da linha em que a edição termina
+        position = self.tokens.position
+        line = self.tokens.position_of(edit_end)[0]
+        # O nível mais interno fica no topo da pilha
+        stack = [self._children(node, start, i)
+                 for node, start, i in reversed(levels)]
+        while stack:
+            item = next(stack[-1], None)
+            if item is None:
+                stack.pop()
+                continue
+            node, start = item
+            node_line, column = position(start)
+            if node_line > line:
+                return  # o que vem depois começa em linhas seguintes
+            if hasattr(node, "line"):
+                # Todo comando com posição começa pelo token que a define
+                node.line, node.column = node_line, column
+            stack.append(self._children(node, start))
+
+    def _refresh(self) -> None:
+        """Recalcula as posições das subárvores marcadas por _relocate()"""
+        spans = self.spans
+        for parent, threshold in self._stale.values():
+            children = child_nodes(parent)
+            i = bisect_left(children, threshold,
+                            key=lambda child: spans[id(child)].start)
+            base = self.span(parent)[0]
+            # Percorridos na ordem do texto, as posições saem de uma
+            # varredura só das tabelas de tokens e de linhas
+            nodes: List[ASTNode] = []
+            starts: List[int] = []
+            stack = [(child, base + spans[id(child)].start)
+                     for child in reversed(children[i:])]
+            while stack:
+                node, start = stack.pop()
+                if not isinstance(node, Block):
+                    nodes.append(node)
+                    starts.append(start)
+                    if not isinstance(node, (Conditional, While)):
+                        continue
+                stack.extend([(child, start + spans[id(child)].start)
+                              for child in reversed(child_nodes(node))])
+            for node, (line, column) in zip(nodes,
+                                            self.tokens.positions(starts)):
+                node.line, node.column = line, column
+        self._stale = {}
@@ -0,0 +1,164 @@
+# interpreter.py
+"""
+Interpretador direto da AST (tree-walker)
+
+Implementação de referência: percorre a árvore a cada execução, decide o
+que fazer pelo tipo de cada nó e procura as variáveis por nome na cadeia
+de escopos. É a versão mais simples de ler, e serve de base de comparação
+para os back-ends compilados (bytecode e closures).
+"""
+
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, List, TextIO
+
+from parser import (Program, Block, Declaration, Assignment, Read, Print,
+                    Conditional, While, BinaryOp, UnaryOp, Number, Identifier,
+                    RelationalOp, LogicalOp, LogicalNot)
+from runtime import (ExecutionError, InputReader, OutputWriter, TYPE_F64,
+                     wrap_i32, i32_div, i32_rem, f64_div, f64_rem,
+                     convert, literal_value, format_value, unescape_string)
+from semantic import resolve
+
+_COMPARE = {
+    "==": lambda a, b: a == b,
+    "!=": lambda a, b: a != b,
+    "<": lambda a, b: a < b,
+    "<=": lambda a, b: a <= b,
+    ">": lambda a, b: a > b,
+    ">=": lambda a, b: a >= b,
+}
+
+
+class Interpreter:
+    """Executa a AST diretamente"""
+
+    def __init__(self, stdin: TextIO, stdout: TextIO) -> None:
+        self.input = InputReader(stdin)
+        self.output = OutputWriter(stdout)
+        # Cada escopo mapeia nome -> [tipo, valor]
+        self.scopes: List[Dict[str, List[Any]]] = []
+
+    def run(self, program: Program) -> None:
+        try:
+            self.exec_block(program.block)
+        finally:
+            self.output.flush()
+
+    def variable(self, name: str) -> List[Any]:
+        for scope in reversed(self.scopes):
+            if name in scope:
+                return scope[name]
+        raise ExecutionError(f"Variável '{name}' não declarada")
+
+    # -----------------------
+    # Comandos
+    # -----------------------
+
+    def exec_block(self, block: Block) -> None:
+        self.scopes.append({})
+        try:
+            for cmd in block.commands:
+                self.exec_command(cmd)
+        finally:
+            self.scopes.pop()
+
+    def exec_command(self, cmd) -> None:
+        if isinstance(cmd, Block):
+            self.exec_block(cmd)
+            return
+        try:
+            if isinstance(cmd, Declaration):
+                zero = 0.0 if cmd.type_name == TYPE_F64 else 0
+                self.scopes[-1][cmd.identifier] = [cmd.type_name, zero]
+            elif isinstance(cmd, Assignment):
+                var = self.variable(cmd.identifier)
+                var[1] = convert(self.eval_expression(cmd.expression), var[0])
+            elif isinstance(cmd, Read):
+                var = self.variable(cmd.identifier)
+                var[1] = self.input.read(var[0])
+            elif isinstance(cmd, Print):
+                if cmd.is_identifier:
+                    text = format_value(self.variable(cmd.value)[1])
+                else:
+                    text = unescape_string(cmd.value)
+                self.output.write_line(text)
+            elif isinstance(cmd, Conditional):
+                if self.eval_condition(cmd.condition):
+                    self.exec_block(cmd.then_block)
+                elif cmd.else_block is not None:
+                    self.exec_block(cmd.else_block)
+            elif isinstance(cmd, While):
+                while self.eval_condition(cmd.condition):
+                    self.exec_block(cmd.block)
+        except ExecutionError as e:
+            if not e.line:
+                e.line = cmd.line
+            raise
+
+    # -----------------------
+    # Expressões
+    # -----------------------
+
+    def eval_condition(self, cond) -> bool:
+        if isinstance(cond, RelationalOp):
+            return _COMPARE[cond.operator](self.eval_expression(cond.left),
+                                           self.eval_expression(cond.right))
+        if isinstance(cond, LogicalOp):
+            if cond.operator == "&&":
+                return (self.eval_condition(cond.left)
+                        and self.eval_condition(cond.right))
+            return (self.eval_condition(cond.left)
+                    or self.eval_condition(cond.right))
+        if isinstance(cond, LogicalNot):
+            return not self.eval_condition(cond.operand)
+        raise ExecutionError(f"Condição não suportada: {type(cond).__name__}")
+
+    def eval_expression(self, expr) -> Any:
+        if isinstance(expr, Number):
+            return literal_value(expr.value)
+        if isinstance(expr, Identifier):
+            return self.variable(expr.name)[1]
+        if isinstance(expr, BinaryOp):
+            a = self.eval_expression(expr.left)
+            b = self.eval_expression(expr.right)
+            return binary(expr.operator, a, b)
+        if isinstance(expr, UnaryOp):
+            value = self.eval_expression(expr.operand)
+            if expr.operator == "-":
+                return -value if isinstance(value, float) else wrap_i32(-value)
+            return value
+        raise ExecutionError(f"Expressão não suportada: {type(expr).__name__}")
+
+
+def binary(operator: str, a: Any, b: Any) -> Any:
+    """Aplica um operador aritmético com a semântica da linguagem"""
+    if isinstance(a, float) or isinstance(b, float):
+        if operator == "+":
+            return a + b
+        if operator == "-":
+            return a - b
+        if operator == "*":
+            return a * b
+        if operator == "/":
+            return f64_div(a, b)
+        return f64_rem(a, b)
+    if operator == "+":
+        return wrap_i32(a + b)
+    if operator == "-":
+        return wrap_i32(a - b)
+    if operator == "*":
+        return wrap_i32(a * b)
+    if operator == "/":
+        return i32_div(a, b)
+    return i32_rem(a, b)
+
+
+def load(program: Program) -> Callable[[TextIO, TextIO], None]:
+    """Valida o programa e devolve uma função run(stdin, stdout)"""
+    resolve(program)
+
+    def run(stdin: TextIO, stdout: TextIO) -> None:
+        Interpreter(stdin, stdout).run(program)
+
+    return run
@@ -0,0 +1,799 @@
+# ir.py
+"""
+Representação intermediária de três endereços
+
+A AST (já analisada, com slots e tipos) é rebaixada para uma lista de
+blocos básicos ligados por um grafo de fluxo de controle (CFG) explícito:
+- cada instrução tem no máximo um operador e um destino (x = a + b);
+  operandos são constantes, variáveis do programa (um registrador por slot)
+  ou temporários;
+- operações com i32 e f64 misturados recebem conversões explícitas, de
+  modo que cada instrução tem um único tipo;
+- Conditional, While e os operadores && || ! viram desvios entre blocos
+  (avaliação em curto-circuito), sem valores booleanos;
+- o while é rebaixado com o teste no cabeçalho, que tem como predecessores
+  o bloco anterior ao laço e o fim do corpo (aresta de retorno).
+
+Cada instrução guarda a linha de origem e o nó da AST que a produziu
+(o comando, ou a comparação para desvios), para que análises sobre o IR
+possam ser relacionadas de volta à árvore.
+
+A forma SSA (opcional) acrescenta funções phi nas fronteiras de
+dominância e numera as definições de cada variável (x.1, x.2, ...); os
+temporários já são definidos uma única vez.
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import KW_ONLY, dataclass, field
+from typing import (Any, ClassVar, Dict, Iterator, List, Optional, Set, Tuple,
+                    Union)
+
+from parser import (Program, Block, Declaration, Assignment, Read, Print,
+                    Conditional, While, BinaryOp, UnaryOp, Number, Identifier,
+                    RelationalOp, LogicalOp, LogicalNot)
+from runtime import (CompileError, TYPE_I32, TYPE_F64, literal_value,
+                     unescape_string)
+from semantic import resolve
+
+
+# -----------------------
+# Operandos
+# -----------------------
+
+@dataclass(frozen=True)
+class Const:
+    """Constante (int para i32, float para f64)"""
+    value: Any
+
+    @property
+    def type_name(self) -> str:
+        return TYPE_F64 if isinstance(self.value, float) else TYPE_I32
+
+    def __str__(self) -> str:
+        return repr(self.value)
+
+
+@dataclass(eq=False)
+class Reg:
+    """
+    Registrador: variável do programa (index = slot) ou temporário
+    (index >= número de variáveis). Na forma SSA, version numera as
+    definições da variável. Cada registrador é um objeto único,
+    comparado por identidade.
+    """
+    index: int
+    type_name: str
+    name: str
+    version: Optional[int] = None
+
+    def __str__(self) -> str:
+        return self.name if self.version is None else f"{self.name}.{self.version}"
+
+
+Operand = Union[Const, Reg]
+
+
+# -----------------------
+# Instruções
+# -----------------------
+
+@dataclass(eq=False)
+class Instruction:
+    """Instrução de três endereços (dest é None se não define valor)"""
+    _: KW_ONLY
+    line: int = 0
+    node: Any = field(default=None, repr=False)
+
+    # Nomes dos campos que contêm operandos lidos
+    USES: ClassVar[Tuple[str, ...]] = ()
+
+    def uses(self) -> List[Operand]:
+        return [getattr(self, name) for name in self.USES]
+
+    def replace_uses(self, replace) -> None:
+        """Substitui cada operando lido por replace(operando)"""
+        for name in self.USES:
+            setattr(self, name, replace(getattr(self, name)))
+
+
+@dataclass(eq=False)
+class Move(Instruction):
+    """dest = source"""
+    dest: Reg
+    source: Operand
+    USES = ("source",)
+
+    def uses(self) -> List[Operand]:
+        return [self.source]
+
+    def __str__(self) -> str:
+        return f"{self.dest} = {self.source}"
+
+
+@dataclass(eq=False)
+class Unary(Instruction):
+    """dest = -operand (no tipo de dest)"""
+    dest: Reg
+    operator: str
+    operand: Operand
+    USES = ("operand",)
+
+    def uses(self) -> List[Operand]:
+        return [self.operand]
+
+    def __str__(self) -> str:
+        return f"{self.dest} = {self.operator}{self.operand}"
+
+
+@dataclass(eq=False)
+class Binary(Instruction):
+    """dest = left op right (operandos e dest do mesmo tipo)"""
+    dest: Reg
+    operator: str
+    left: Operand
+    right: Operand
+    USES = ("left", "right")
+
+    def uses(self) -> List[Operand]:
+        return [self.left, self.right]
+
+    def __str__(self) -> str:
+        return f"{self.dest} = {self.left} {self.operator} {self.right}"
+
+
+@dataclass(eq=False)
+class Convert(Instruction):
+    """dest = source convertido para o tipo de dest"""
+    dest: Reg
+    source: Operand
+    USES = ("source",)
+
+    def uses(self) -> List[Operand]:
+        return [self.source]
+
+    def __str__(self) -> str:
+        return f"{self.dest} = {self.dest.type_name}({self.source})"
+
+
+@dataclass(eq=False)
+class Input(Instruction):
+    """dest = próximo valor da entrada"""
+    dest: Reg
+
+    def __str__(self) -> str:
+        return f"{self.dest} = read {self.dest.type_name}"
+
+
+@dataclass(eq=False)
+class Output(Instruction):
+    """Escreve um operando ou um texto (já sem escapes)"""
+    value: Union[Operand, str]
+    dest = None
+
+    def uses(self) -> List[Operand]:
+        return [] if isinstance(self.value, str) else [self.value]
+
+    def replace_uses(self, replace) -> None:
+        if not isinstance(self.value, str):
+            self.value = replace(self.value)
+
+    def __str__(self) -> str:
+        if isinstance(self.value, str):
+            return f"print {self.value!r}"
+        return f"print {self.value}"
+
+
+@dataclass(eq=False)
+class Phi(Instruction):
+    """dest = phi(valor vindo de cada predecessor)"""
+    dest: Reg
+    sources: Dict[int, Operand] = field(default_factory=dict)
+
+    def uses(self) -> List[Operand]:
+        return list(self.sources.values())
+
+    def replace_uses(self, replace) -> None:
+        for pred, value in self.sources.items():
+            self.sources[pred] = replace(value)
+
+    def __str__(self) -> str:
+        args = ", ".join(f"B{pred}: {value}"
+                         for pred, value in sorted(self.sources.items()))
+        return f"{self.dest} = phi({args})"
+
+
+# -----------------------
+# Terminadores
+# -----------------------
+
+@dataclass(eq=False)
+class Jump(Instruction):
+    target: int
+    dest = None
+
+    def targets(self) -> List[int]:
+        return [self.target]
+
+    def __str__(self) -> str:
+        return f"goto B{self.target}"
+
+
+@dataclass(eq=False)
+class Branch(Instruction):
+    """Desvia para if_true se left op right, senão para if_false"""
+    operator: str
+    left: Operand
+    right: Operand
+    if_true: int
+    if_false: int
+    dest = None
+    USES = ("left", "right")
+
+    def uses(self) -> List[Operand]:
+        return [self.left, self.right]
+
+    def targets(self) -> List[int]:
+        return [self.if_true, self.if_false]
+
+    def __str__(self) -> str:
+        return (f"if {self.left} {self.operator} {self.right} "
+                f"goto B{self.if_true} else B{self.if_false}")
+
+
+@dataclass(eq=False)
+class Exit(Instruction):
+    """Fim do programa"""
+    dest = None
+
+    def targets(self) -> List[int]:
+        return []
+
+    def __str__(self) -> str:
+        return "exit"
+
+
+Terminator = Union[Jump, Branch, Exit]
+
+
+# -----------------------
+# Blocos e programa
+# -----------------------
+
+@dataclass(eq=False)
+class BasicBlock:
+    """Sequência de instruções sem desvios, terminada por um desvio"""
+    id: int
+    label: str
+    instructions: List[Instruction] = field(default_factory=list)
+    terminator: Optional[Terminator] = None
+    preds: List[int] = field(default_factory=list)
+    succs: List[int] = field(default_factory=list)
+
+    def all_instructions(self) -> Iterator[Instruction]:
+        yield from self.instructions
+        if self.terminator is not None:
+            yield self.terminator
+
+
+@dataclass(eq=False)
+class IRProgram:
+    """
+    Programa rebaixado: blocos (o bloco 0 é a entrada, e a lista está em
+    pós-ordem reversa do CFG) e registradores
+    """
+    blocks: List[BasicBlock]
+    variables: List[Reg]     # um registrador por slot
+    temp_count: int
+    ssa: bool = False
+
+    def is_variable(self, reg: Reg) -> bool:
+        return reg.index < len(self.variables)
+
+    def instruction_count(self) -> int:
+        return sum(len(block.instructions) + 1 for block in self.blocks)
+
+
+def link(blocks: List[BasicBlock]) -> None:
+    """Recalcula predecessores e sucessores a partir dos terminadores"""
+    for block in blocks:
+        block.preds = []
+    for block in blocks:
+        block.succs = block.terminator.targets()
+        for succ in block.succs:
+            blocks[succ].preds.append(block.id)
+
+
+# -----------------------
+# Rebaixamento da AST
+# -----------------------
+
+class Lowering:
+    """Traduz a AST analisada em blocos básicos de três endereços"""
+
+    def __init__(self) -> None:
+        self.blocks: List[BasicBlock] = []
+        self.variables: List[Reg] = []
+        self.temp_count = 0
+        self.current: Optional[BasicBlock] = None
+        self.line = 0
+        self.column = 0
+        self.node: Any = None
+
+    def lower(self, program: Program) -> IRProgram:
+        symbols = resolve(program)
+        names = Counter(symbol.name for symbol in symbols)
+        for symbol in symbols:
+            # Nomes repetidos (sombreamento) recebem o slot como sufixo
+            name = (symbol.name if names[symbol.name] == 1
+                    else f"{symbol.name}#{symbol.slot}")
+            self.variables.append(Reg(symbol.slot, symbol.type_name, name))
+        self.current = self.new_block("entry")
+        self.lower_block(program.block)
+        self.terminate(Exit(line=self.line))
+        ir = IRProgram(self.blocks, self.variables, self.temp_count)
+        simplify(ir)
+        return ir
+
+    # -----------------------
+    # Utilitários
+    # -----------------------
+
+    def new_block(self, label: str) -> BasicBlock:
+        block = BasicBlock(len(self.blocks), label)
+        self.blocks.append(block)
+        return block
+
+    def new_temp(self, type_name: str) -> Reg:
+        index = len(self.variables) + self.temp_count
+        self.temp_count += 1
+        return Reg(index, type_name, f"%{self.temp_count - 1}")
+
+    def emit(self, instruction: Instruction) -> None:
+        instruction.line = self.line
+        instruction.node = self.node
+        self.current.instructions.append(instruction)
+
+    def terminate(self, terminator: Terminator) -> None:
+        terminator.line = self.line
+        if terminator.node is None:
+            terminator.node = self.node
+        self.current.terminator = terminator
+
+    def jump(self, target: BasicBlock) -> None:
+        self.terminate(Jump(target.id))
+
+    # -----------------------
+    # Comandos
+    # -----------------------
+
+    def lower_block(self, block: Block) -> None:
+        for cmd in block.commands:
+            self.lower_command(cmd)
+
+    def lower_command(self, cmd) -> None:
+        if isinstance(cmd, Block):
+            self.lower_block(cmd)
+            return
+        self.line, self.column = cmd.line, cmd.column
+        self.node = cmd
+
+        if isinstance(cmd, Declaration):
+            var = self.variables[cmd.slot]
+            zero = 0.0 if cmd.type_name == TYPE_F64 else 0
+            self.emit(Move(var, Const(zero)))
+
+        elif isinstance(cmd, Assignment):
+            self.assign(self.variables[cmd.slot], cmd.expression)
+
+        elif isinstance(cmd, Read):
+            self.emit(Input(self.variables[cmd.slot]))
+
+        elif isinstance(cmd, Print):
+            if cmd.is_identifier:
+                self.emit(Output(self.variables[cmd.slot]))
+            else:
+                self.emit(Output(unescape_string(cmd.value)))
+
+        elif isinstance(cmd, Conditional):
+            then_block = self.new_block("then")
+            else_block = (self.new_block("else")
+                          if cmd.else_block is not None else None)
+            end = self.new_block("endif")
+            self.branch(cmd.condition, then_block, else_block or end)
+            self.current = then_block
+            self.lower_block(cmd.then_block)
+            self.jump(end)
+            if else_block is not None:
+                self.current = else_block
+                self.lower_block(cmd.else_block)
+                self.jump(end)
+            self.current = end
+
+        elif isinstance(cmd, While):
+            header = self.new_block("while")
+            body = self.new_block("body")
+            end = self.new_block("endwhile")
+            self.jump(header)
+            self.current = header
+            self.branch(cmd.condition, body, end)
+            self.current = body
+            self.lower_block(cmd.block)
+            self.line = cmd.line
+            self.jump(header)
+            self.current = end
+
+        else:
+            raise CompileError(f"Comando não suportado: {type(cmd).__name__}",
+                               self.line, self.column)
+
+    def assign(self, var: Reg, expr) -> None:
+        value = self.value(expr)
+        if value.type_name != var.type_name:
+            self.emit(Convert(var, value))
+            return
+        last = self.current.instructions[-1] if self.current.instructions else None
+        if (isinstance(value, Reg) and last is not None and last.dest is value
+                and not self.is_variable(value)):
+            # O temporário recém-calculado é escrito direto na variável
+            last.dest = var
+            if value.index == len(self.variables) + self.temp_count - 1:
+                self.temp_count -= 1
+            return
+        self.emit(Move(var, value))
+
+    def is_variable(self, reg: Reg) -> bool:
+        return reg.index < len(self.variables)
+
+    # -----------------------
+    # Condições
+    # -----------------------
+
+    def branch(self, cond, if_true: BasicBlock, if_false: BasicBlock) -> None:
+        """Rebaixa a condição como desvios para if_true / if_false"""
+        if isinstance(cond, RelationalOp):
+            node = self.node
+            self.node = cond
+            left = self.value(cond.left)
+            right = self.value(cond.right)
+            left, right = self.unify(left, right)
+            self.terminate(Branch(cond.operator, left, right, if_true.id,
+                                  if_false.id, node=cond))
+            self.node = node
+        elif isinstance(cond, LogicalNot):
+            self.branch(cond.operand, if_false, if_true)
+        elif isinstance(cond, LogicalOp):
+            middle = self.new_block("and" if cond.operator == "&&" else "or")
+            if cond.operator == "&&":
+                self.branch(cond.left, middle, if_false)
+            else:
+                self.branch(cond.left, if_true, middle)
+            self.current = middle
+            self.branch(cond.right, if_true, if_false)
+        else:
+            raise CompileError(f"Condição não suportada: {type(cond).__name__}",
+                               self.line, self.column)
+
+    # -----------------------
+    # Expressões
+    # -----------------------
+
+    def value(self, expr) -> Operand:
+        """Operando com o valor da expressão (emitindo as instruções)"""
+        if isinstance(expr, Identifier):
+            return self.variables[expr.slot]
+
+        if isinstance(expr, Number):
+            return Const(literal_value(expr.value))
+
+        if isinstance(expr, UnaryOp):
+            operand = self.value(expr.operand)
+            if expr.operator != "-":
+                return operand
+            if isinstance(operand, Const):
+                return Const(-operand.value if operand.type_name == TYPE_F64
+                             else _neg_i32(operand.value))
+            dest = self.new_temp(operand.type_name)
+            self.emit(Unary(dest, "-", operand))
+            return dest
+
+        if isinstance(expr, BinaryOp):
+            left, right = self.unify(self.value(expr.left),
+                                     self.value(expr.right))
+            dest = self.new_temp(left.type_name)
+            self.emit(Binary(dest, expr.operator, left, right))
+            return dest
+
+        raise CompileError(f"Expressão não suportada: {type(expr).__name__}",
+                           self.line, self.column)
+
+    def unify(self, left: Operand, right: Operand):
+        """Converte o operando i32 para f64 quando os tipos diferem"""
+        if left.type_name == right.type_name:
+            return left, right
+        if left.type_name == TYPE_I32:
+            return self.to_f64(left), right
+        return left, self.to_f64(right)
+
+    def to_f64(self, operand: Operand) -> Operand:
+        if isinstance(operand, Const):
+            return Const(float(operand.value))
+        dest = self.new_temp(TYPE_F64)
+        self.emit(Convert(dest, operand))
+        return dest
+
+
+def _neg_i32(value: int) -> int:
+    return value if value == -2 ** 31 else -value
+
+
+# -----------------------
+# Limpeza do grafo
+# -----------------------
+
+def simplify(ir: IRProgram) -> None:
+    """
+    Junta cada bloco ao seu único predecessor quando este termina em um
+    salto incondicional para ele, remove blocos inalcançáveis e renumera
+    os blocos em pós-ordem reversa (a entrada continua sendo B0).
+    """
+    blocks = ir.blocks
+    link(blocks)
+    merged: Set[int] = set()
+    for block in blocks:
+        if block.id in merged:
+            continue
+        while isinstance(block.terminator, Jump):
+            succ = blocks[block.terminator.target]
+            if len(succ.preds) != 1 or succ is block or succ.id == 0:
+                break
+            block.instructions.extend(succ.instructions)
+            block.terminator = succ.terminator
+            merged.add(succ.id)
+            for target in succ.terminator.targets():
+                preds = blocks[target].preds
+                preds[preds.index(succ.id)] = block.id
+
+    for block in blocks:
+        block.succs = block.terminator.targets()
+    order = [blocks[block_id] for block_id in reverse_postorder(ir)]
+
+    renumber = {block.id: new_id for new_id, block in enumerate(order)}
+    for block in order:
+        block.id = renumber[block.id]
+        term = block.terminator
+        if isinstance(term, Jump):
+            term.target = renumber[term.target]
+        elif isinstance(term, Branch):
+            term.if_true = renumber[term.if_true]
+            term.if_false = renumber[term.if_false]
+    ir.blocks = order
+    link(order)
+
+
+# -----------------------
+# Dominância
+# -----------------------
+
+def reverse_postorder(ir: IRProgram) -> List[int]:
+    """Blocos alcançáveis em pós-ordem reversa a partir da entrada"""
+    post: List[int] = []
+    visited = {0}
+    stack = [(0, reversed(ir.blocks[0].succs))]
+    while stack:
+        block_id, succs = stack[-1]
+        for succ in succs:
+            if succ not in visited:
+                visited.add(succ)
+                stack.append((succ, reversed(ir.blocks[succ].succs)))
+                break
+        else:
+            stack.pop()
+            post.append(block_id)
+    post.reverse()
+    return post
+
+
+def dominators(ir: IRProgram) -> List[int]:
+    """
+    Dominador imediato de cada bloco (a entrada domina a si mesma), pelo
+    algoritmo iterativo de Cooper, Harvey e Kennedy.
+    """
+    order = reverse_postorder(ir)
+    position = {block_id: i for i, block_id in enumerate(order)}
+    idom = [-1] * len(ir.blocks)
+    idom[0] = 0
+
+    def intersect(a: int, b: int) -> int:
+        while a != b:
+            while position[a] > position[b]:
+                a = idom[a]
+            while position[b] > position[a]:
+                b = idom[b]
+        return a
+
+    changed = True
+    while changed:
+        changed = False
+        for block_id in order[1:]:
+            new_idom = -1
+            for pred in ir.blocks[block_id].preds:
+                if idom[pred] == -1:
+                    continue
+                new_idom = pred if new_idom == -1 else intersect(pred, new_idom)
+            if idom[block_id] != new_idom:
+                idom[block_id] = new_idom
+                changed = True
+    return idom
+
+
+def dominance_frontiers(ir: IRProgram, idom: List[int]) -> List[Set[int]]:
+    frontiers: List[Set[int]] = [set() for _ in ir.blocks]
+    for block in ir.blocks:
+        if len(block.preds) < 2:
+            continue
+        for pred in block.preds:
+            runner = pred
+            while runner != idom[block.id] and runner != -1:
+                frontiers[runner].add(block.id)
+                runner = idom[runner]
+    return frontiers
+
+
+def dominator_tree(idom: List[int]) -> List[List[int]]:
+    children: List[List[int]] = [[] for _ in idom]
+    for block_id, parent in enumerate(idom):
+        if block_id != 0 and parent != -1:
+            children[parent].append(block_id)
+    return children
+
+
+# -----------------------
+# Forma SSA
+# -----------------------
+
+def to_ssa(ir: IRProgram) -> IRProgram:
+    """
+    Converte o programa (no lugar) para a forma SSA: phis nas fronteiras
+    de dominância iteradas dos blocos que definem cada variável, seguidos
+    da renomeação em pré-ordem da árvore de dominadores.
+
+    Phis com um operando indefinido (a variável não está declarada em todos
+    os caminhos, como a de um bloco dentro de um laço) e phis sem uso são
+    removidos: a análise semântica garante que não são lidos.
+    """
+    idom = dominators(ir)
+    frontiers = dominance_frontiers(ir, idom)
+    n_vars = len(ir.variables)
+
+    # Inserção de phis
+    def_blocks: List[Set[int]] = [set() for _ in range(n_vars)]
+    for block in ir.blocks:
+        for instr in block.instructions:
+            if instr.dest is not None and instr.dest.index < n_vars:
+                def_blocks[instr.dest.index].add(block.id)
+    phis: List[Dict[int, Phi]] = [{} for _ in ir.blocks]
+    for slot, defined in enumerate(def_blocks):
+        work = list(defined)
+        while work:
+            block_id = work.pop()
+            for frontier in frontiers[block_id]:
+                if slot not in phis[frontier]:
+                    phis[frontier][slot] = Phi(ir.variables[slot])
+                    if frontier not in defined:
+                        work.append(frontier)
+    for block in ir.blocks:
+        block.instructions[:0] = [phis[block.id][slot]
+                                  for slot in sorted(phis[block.id])]
+
+    # Renomeação (percurso iterativo da árvore de dominadores)
+    counters = [0] * n_vars
+    stacks: List[List[Reg]] = [[] for _ in range(n_vars)]
+
+    def current(operand: Operand) -> Operand:
+        if isinstance(operand, Reg) and operand.index < n_vars:
+            stack = stacks[operand.index]
+            return stack[-1] if stack else None
+        return operand
+
+    def define(reg: Reg) -> Reg:
+        counters[reg.index] += 1
+        version = Reg(reg.index, reg.type_name, reg.name, counters[reg.index])
+        stacks[reg.index].append(version)
+        return version
+
+    children = dominator_tree(idom)
+    work: List[Any] = [(0, False)]
+    while work:
+        block_id, leaving = work.pop()
+        block = ir.blocks[block_id]
+        if leaving:
+            for instr in reversed(block.instructions):
+                if instr.dest is not None and instr.dest.index < n_vars:
+                    stacks[instr.dest.index].pop()
+            continue
+        for instr in block.instructions:
+            if not isinstance(instr, Phi):
+                instr.replace_uses(current)
+            if instr.dest is not None and instr.dest.index < n_vars:
+                instr.dest = define(instr.dest)
+        if block.terminator is not None:
+            block.terminator.replace_uses(current)
+        for succ in block.succs:
+            for phi in ir.blocks[succ].instructions:
+                if not isinstance(phi, Phi):
+                    break
+                phi.sources[block_id] = current(ir.variables[phi.dest.index])
+        work.append((block_id, True))
+        for child in reversed(children[block_id]):
+            work.append((child, False))
+
+    _prune_phis(ir)
+    ir.ssa = True
+    return ir
+
+
+def _prune_phis(ir: IRProgram) -> None:
+    all_phis = [instr for block in ir.blocks for instr in block.instructions
+                if isinstance(instr, Phi)]
+    # Phis que dependem de um valor indefinido nunca são lidos
+    dead: Set[Reg] = set()
+    changed = True
+    while changed:
+        changed = False
+        for phi in all_phis:
+            if phi.dest not in dead and any(
+                    value is None or value in dead
+                    for value in phi.sources.values()):
+                dead.add(phi.dest)
+                changed = True
+
+    # Phis sem uso (contagem de usos com propagação)
+    defining = {phi.dest: phi for phi in all_phis}
+    uses: Dict[Reg, int] = {}
+    for block in ir.blocks:
+        for instr in block.all_instructions():
+            for value in instr.uses():
+                if isinstance(value, Reg):
+                    uses[value] = uses.get(value, 0) + 1
+    work = [phi for phi in all_phis if phi.dest not in dead
+            and not uses.get(phi.dest)]
+    while work:
+        phi = work.pop()
+        if phi.dest in dead:
+            continue
+        dead.add(phi.dest)
+        for value in phi.sources.values():
+            if isinstance(value, Reg) and value in uses:
+                uses[value] -= 1
+                if uses[value] == 0 and value in defining:
+                    work.append(defining[value])
+
+    if dead:
+        for block in ir.blocks:
+            block.instructions = [
+                instr for instr in block.instructions
+                if not (isinstance(instr, Phi) and instr.dest in dead)]
+
+
+# -----------------------
+# Interface
+# -----------------------
+
+def lower(program: Program, ssa: bool = False) -> IRProgram:
+    """Rebaixa o programa analisado para o IR (opcionalmente em SSA)"""
+    ir = Lowering().lower(program)
+    return to_ssa(ir) if ssa else ir
+
+
+def format_ir(ir: IRProgram) -> str:
+    """Listagem textual do IR, um bloco por vez"""
+    lines: List[str] = []
+    for block in ir.blocks:
+        preds = " ".join(f"B{pred}" for pred in block.preds)
+        header = f"B{block.id} ({block.label}):"
+        lines.append(f"{header:<24}; preds: {preds}" if preds else header)
+        for instr in block.all_instructions():
+            lines.append(f"    {instr}")
+    return "\n".join(lines)
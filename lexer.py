@@ -1,9 +1,10 @@
 # lexer.py
 from __future__ import annotations
 
+import re
 from dataclasses import dataclass
 from enum import Enum, auto
-from typing import Optional, List, Any
+from typing import Optional, List, Any, Iterator
 
 
 class LexerError(Exception):
@@ -75,15 +76,66 @@ class Token:
     column: int
 
 
+# Motores de varredura disponíveis em Lexer(engine=...)
+ENGINES = ("classic", "regex")
+
+# Padrão combinado usado pelo motor "regex": cada alternativa reconhece um
+# lexema completo de uma só vez. Erros léxicos e caracteres fora do ASCII
+# não casam aqui e são delegados ao scanner caractere a caractere.
+_MASTER_PATTERN = re.compile(
+    r"""
+    [ \t\r\n]*
+    (?:
+      (?P<line_comment>//[^\n]*)
+    | (?P<block_comment>/\*.*?\*/)
+    | (?P<ident>[A-Za-z_]\w*)
+    | (?P<number>[0-9]+(?:\.[0-9]+)?|\.[0-9]+)
+    | (?P<string>"(?:[^"\\\n]|\\[^\n])*")
+    | (?P<op>==|!=|<=|>=|&&|\|\||/(?![/*])|[-+*%(){},;:=<>!])
+    )?
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+
+_OPERATORS = {
+    "+": TokenType.PLUS,
+    "-": TokenType.MINUS,
+    "*": TokenType.STAR,
+    "/": TokenType.SLASH,
+    "%": TokenType.PERCENT,
+    "(": TokenType.LPAREN,
+    ")": TokenType.RPAREN,
+    "{": TokenType.LBRACE,
+    "}": TokenType.RBRACE,
+    ",": TokenType.COMMA,
+    ";": TokenType.SEMICOLON,
+    ":": TokenType.COLON,
+    "=": TokenType.ASSIGNMENT,
+    "!": TokenType.EXCLAMATION,
+    "==": TokenType.REL_OPERATOR,
+    "!=": TokenType.REL_OPERATOR,
+    "<": TokenType.REL_OPERATOR,
+    "<=": TokenType.REL_OPERATOR,
+    ">": TokenType.REL_OPERATOR,
+    ">=": TokenType.REL_OPERATOR,
+    "&&": TokenType.LOGICAL_AND,
+    "||": TokenType.LOGICAL_OR,
+}
+
+
 class Lexer:
 
-    def __init__(self, source: str, keep_comments: bool = False) -> None:
+    def __init__(self, source: str, keep_comments: bool = False,
+                 engine: str = "classic") -> None:
+        if engine not in ENGINES:
+            raise LexerError(f"motor léxico desconhecido: {engine}")
         self.source = source
         self.length = len(source)
         self.index = 0
         self.line = 1
         self.column = 1
         self.keep_comments = keep_comments
+        self.engine = engine
 
         self._keywords = {
             "fn": TokenType.KW_FN,
@@ -105,6 +157,12 @@ class Lexer:
     # -------------
     # Utilitários
     # -------------
+    def reset(self, index: int, line: int, column: int) -> None:
+        """Reposiciona a varredura (usado pela re-análise incremental)"""
+        self.index = index
+        self.line = line
+        self.column = column
+
     def is_at_end(self) -> bool:
         return self.index >= self.length
 
@@ -316,6 +374,91 @@ class Lexer:
     # Próximo token
     # -----------------------
     def next_token(self) -> Token:
+        if self.engine == "regex":
+            return self.next_token_regex()
+        return self.next_token_classic()
+
+    def next_token_regex(self) -> Token:
+        """
+        Motor de varredura por padrão combinado: reconhece o lexema inteiro
+        com um único match e atualiza linha/coluna uma vez por lexema.
+        Produz exatamente os mesmos tokens de next_token_classic().
+        """
+        source = self.source
+        length = self.length
+        match = _MASTER_PATTERN.match
+        while True:
+            pos = self.index
+            m = match(source, pos)
+            kind = m.lastgroup
+            # Início do lexema após o espaço em branco consumido pelo padrão
+            start = m.start(kind) if kind is not None else m.end()
+            if start > pos:
+                newlines = source.count("\n", pos, start)
+                if newlines:
+                    self.line += newlines
+                    self.column = start - source.rfind("\n", pos, start)
+                else:
+                    self.column += start - pos
+                self.index = start
+
+            if kind is None:
+                if start >= length:
+                    return Token(TokenType.EOF, "", None, self.line,
+                                 self.column)
+                # Erros léxicos e casos raros ficam com o scanner clássico
+                return self.next_token_classic()
+
+            end = m.end()
+            line, column = self.line, self.column
+
+            if kind == "ident":
+                self.index = end
+                self.column += end - start
+                lexeme = source[start:end]
+                ttype = self._keywords.get(lexeme, TokenType.IDENTIFIER)
+                return Token(ttype, lexeme, None, line, column)
+
+            if kind == "op":
+                self.index = end
+                self.column += end - start
+                lexeme = source[start:end]
+                return Token(_OPERATORS[lexeme], lexeme, None, line, column)
+
+            if kind == "number":
+                if end < length:
+                    # '12.' ou dígitos não ASCII logo após o número exigem
+                    # as regras completas do scanner clássico
+                    nxt = source[end]
+                    if nxt == "." or nxt > "\x7f":
+                        return self.next_token_classic()
+                self.index = end
+                self.column += end - start
+                lexeme = source[start:end]
+                literal = float(lexeme) if "." in lexeme else int(lexeme)
+                return Token(TokenType.NUMBER, lexeme, literal, line, column)
+
+            if kind == "string":
+                self.index = end
+                self.column += end - start
+                lexeme = source[start:end]
+                return Token(TokenType.STRING, lexeme, lexeme[1:-1], line,
+                             column)
+
+            # Comentários: o de bloco pode conter quebras de linha
+            self.index = end
+            newlines = source.count("\n", start, end)
+            if newlines:
+                self.line += newlines
+                self.column = end - source.rfind("\n", start, end)
+            else:
+                self.column += end - start
+            if self.keep_comments:
+                ttype = (TokenType.LINE_COMMENT if kind == "line_comment"
+                         else TokenType.BLOCK_COMMENT)
+                return Token(ttype, source[start:end], None, line, column)
+
+    def next_token_classic(self) -> Token:
         # 1) Pular espaços e comentários (retornando comentários se keep_comments=True)
         while True:
             if self.is_at_end():
@@ -510,10 +653,15 @@ class Lexer:
     # Tokenize completo
     # -----------------------
     def tokenize(self) -> List[Token]:
-        tokens: List[Token] = []
+        return list(self.iter_tokens())
+
+    # -----------------------
+    # Geração sob demanda
+    # -----------------------
+    def iter_tokens(self) -> Iterator[Token]:
+        """Gera os tokens um a um, terminando no EOF (inclusive)"""
         while True:
             tok = self.next_token()
-            tokens.append(tok)
+            yield tok
             if tok.type == TokenType.EOF:
-                break
-        return tokens
+                return
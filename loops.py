@@ -0,0 +1,568 @@
+# loops.py
+"""
+Otimizações de laços (While) sobre a AST
+
+Executada depois do dobramento e do fluxo de dados, trata cada laço de
+dentro para fora:
+- variáveis de indução: uma variável i32 cujas únicas atribuições no laço
+  têm a forma i = i + c ou i = i - c (c constante) é reconhecida, com o
+  seu passo;
+- redução de força: i * k (k constante) passa a ser uma variável t,
+  iniciada com i * k antes do laço e acrescida de c * k logo depois de cada
+  atualização de i (válido em aritmética módulo 2^32). i % k (k > 0) passa
+  a ser um contador que volta a zero ao chegar em k, quando se pode provar
+  que i nunca é negativo nem dá a volta: i começa >= 0 (atribuição ou
+  declaração logo antes do laço), é atualizada uma vez por iteração com
+  i = i + 1, fora de laços internos, e a condição exige i < e (e de tipo
+  i32);
+- movimentação de código invariante: subexpressões BinaryOp que só leem
+  variáveis não alteradas no laço, e que não podem falhar, são calculadas
+  uma vez antes do laço.
+
+A redução de força só compensa em código nativo: nos back-ends
+interpretados '*' e '%' custam o mesmo que a soma que os substitui, e o
+chamador a desliga (as oportunidades continuam no relatório).
+
+Os valores calculados antes do laço ficam em variáveis novas, declaradas
+(let mut) em um bloco que envolve o laço; os nomes não coincidem com
+nenhuma variável do programa, e os símbolos são acrescentados à tabela.
+Cada transformação é registrada em `changes` (relatório de --opt-report).
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from parser import (Program, Block, Declaration, Assignment, Read, Conditional,
+                    While, BinaryOp, UnaryOp, Number, Identifier, RelationalOp,
+                    LogicalOp, LogicalNot)
+from optimizer import can_fail, make_number
+from runtime import TYPE_I32, TYPE_F64, wrap_i32, literal_value
+from semantic import Symbol, resolve
+
+
+def _type_of(expr) -> str:
+    if isinstance(expr, Identifier):
+        return expr.type_name
+    if isinstance(expr, Number):
+        value = literal_value(expr.value)
+        return TYPE_F64 if isinstance(value, float) else TYPE_I32
+    if isinstance(expr, UnaryOp):
+        return _type_of(expr.operand)
+    if isinstance(expr, BinaryOp):
+        if TYPE_F64 in (_type_of(expr.left), _type_of(expr.right)):
+            return TYPE_F64
+    return TYPE_I32
+
+
+def _int_constant(expr) -> Optional[int]:
+    if isinstance(expr, Number):
+        value = literal_value(expr.value)
+        if isinstance(value, int):
+            return value
+    return None
+
+
+def _key(expr) -> Tuple:
+    """Chave estrutural de uma expressão (variáveis pelo slot)"""
+    if isinstance(expr, Identifier):
+        return ("id", expr.slot)
+    if isinstance(expr, Number):
+        return ("num", repr(literal_value(expr.value)))
+    if isinstance(expr, UnaryOp):
+        return ("un", expr.operator, _key(expr.operand))
+    return ("bin", expr.operator, _key(expr.left), _key(expr.right))
+
+
+def _source(expr) -> str:
+    """Texto da expressão para o relatório"""
+    if isinstance(expr, Identifier):
+        return expr.name
+    if isinstance(expr, Number):
+        return expr.lexeme
+    if isinstance(expr, UnaryOp):
+        return f"{expr.operator}{_source(expr.operand)}"
+    parts = []
+    for side in (expr.left, expr.right):
+        text = _source(side)
+        parts.append(f"({text})" if isinstance(side, BinaryOp) else text)
+    return f"{parts[0]} {expr.operator} {parts[1]}"
+
+
+def _reads(expr, slots: Set[int]) -> bool:
+    """Verdadeiro se a expressão lê alguma variável (e a junta em slots)"""
+    if isinstance(expr, Identifier):
+        slots.add(expr.slot)
+        return True
+    if isinstance(expr, UnaryOp):
+        return _reads(expr.operand, slots)
+    if isinstance(expr, BinaryOp):
+        left = _reads(expr.left, slots)
+        return _reads(expr.right, slots) or left
+    return False
+
+
+def _written(cmd, slots: Set[int]) -> Set[int]:
+    """Slots declarados, atribuídos ou lidos (read) dentro do comando"""
+    if isinstance(cmd, Block):
+        for inner in cmd.commands:
+            _written(inner, slots)
+    elif isinstance(cmd, (Declaration, Assignment, Read)):
+        slots.add(cmd.slot)
+    elif isinstance(cmd, Conditional):
+        _written(cmd.then_block, slots)
+        if cmd.else_block is not None:
+            _written(cmd.else_block, slots)
+    elif isinstance(cmd, While):
+        _written(cmd.block, slots)
+    return slots
+
+
+def _conjuncts(cond) -> List[Any]:
+    if isinstance(cond, LogicalOp) and cond.operator == "&&":
+        return _conjuncts(cond.left) + _conjuncts(cond.right)
+    return [cond]
+
+
+def _step(cmd: Assignment) -> Optional[int]:
+    """Passo de uma atribuição i = i + c / i - c / c + i (None se outra forma)"""
+    expr = cmd.expression
+    if cmd.type_name != TYPE_I32 or not isinstance(expr, BinaryOp):
+        return None
+    if (expr.operator in ("+", "-") and isinstance(expr.left, Identifier)
+            and expr.left.slot == cmd.slot):
+        c = _int_constant(expr.right)
+        if c is not None:
+            return wrap_i32(c if expr.operator == "+" else -c)
+    if (expr.operator == "+" and isinstance(expr.right, Identifier)
+            and expr.right.slot == cmd.slot):
+        c = _int_constant(expr.left)
+        if c is not None:
+            return wrap_i32(c)
+    return None
+
+
+def _rewrite(expr, replace):
+    """Recria a expressão trocando as subexpressões para as quais replace
+    devolve um nó (de fora para dentro)"""
+    if isinstance(expr, (BinaryOp, UnaryOp)):
+        new = replace(expr)
+        if new is not None:
+            return new
+    if isinstance(expr, BinaryOp):
+        left = _rewrite(expr.left, replace)
+        right = _rewrite(expr.right, replace)
+        if left is expr.left and right is expr.right:
+            return expr
+        return BinaryOp(left, expr.operator, right)
+    if isinstance(expr, UnaryOp):
+        operand = _rewrite(expr.operand, replace)
+        return expr if operand is expr.operand else UnaryOp(expr.operator,
+                                                            operand)
+    return expr
+
+
+def _rewrite_condition(cond, replace):
+    if isinstance(cond, RelationalOp):
+        left = _rewrite(cond.left, replace)
+        right = _rewrite(cond.right, replace)
+        if left is cond.left and right is cond.right:
+            return cond
+        return RelationalOp(left, cond.operator, right)
+    if isinstance(cond, LogicalOp):
+        left = _rewrite_condition(cond.left, replace)
+        right = _rewrite_condition(cond.right, replace)
+        if left is cond.left and right is cond.right:
+            return cond
+        return LogicalOp(left, cond.operator, right)
+    operand = _rewrite_condition(cond.operand, replace)
+    return cond if operand is cond.operand else LogicalNot(operand)
+
+
+def _expressions(cmd, out: List[Any]) -> List[Any]:
+    """Expressões (e condições) de um comando e dos comandos internos"""
+    if isinstance(cmd, Block):
+        for inner in cmd.commands:
+            _expressions(inner, out)
+    elif isinstance(cmd, Assignment):
+        out.append(cmd.expression)
+    elif isinstance(cmd, Conditional):
+        out.append(cmd.condition)
+        _expressions(cmd.then_block, out)
+        if cmd.else_block is not None:
+            _expressions(cmd.else_block, out)
+    elif isinstance(cmd, While):
+        out.append(cmd.condition)
+        _expressions(cmd.block, out)
+    return out
+
+
+def _subexpressions(expr, out: List[Any]) -> List[Any]:
+    if isinstance(expr, (RelationalOp, LogicalOp, BinaryOp)):
+        _subexpressions(expr.left, out)
+        _subexpressions(expr.right, out)
+    elif isinstance(expr, (LogicalNot, UnaryOp)):
+        _subexpressions(expr.operand, out)
+    if isinstance(expr, BinaryOp):
+        out.append(expr)
+    return out
+
+
+class Induction:
+    """Variável de indução básica de um laço"""
+
+    def __init__(self, slot: int, name: str) -> None:
+        self.slot = slot
+        self.name = name
+        self.steps: List[int] = []
+        self.in_inner_loop = False   # alguma atualização em um laço interno
+
+
+class LoopOptimizer:
+    """Passada de otimização de laços"""
+
+    def __init__(self, strength_reduction: bool = True) -> None:
+        # Sem redução de força, as oportunidades só aparecem no relatório
+        self.strength_reduction = strength_reduction
+        self.stats: Dict[str, int] = {
+            "induction_variables": 0,
+            "strength_reduced": 0,
+            "invariants_hoisted": 0,
+        }
+        self.changes: List[str] = []
+        self.symbols: List[Symbol] = []
+        self.names: Set[str] = set()
+        self.counter = 0
+        self.loop_depth = 0
+
+    def optimize(self, program: Program) -> Program:
+        self.symbols = list(resolve(program))
+        self.names = {symbol.name for symbol in self.symbols}
+        block = self.visit_block(program.block)
+        if block is program.block:
+            return program
+        return Program(block, self.symbols)
+
+    def report(self, line: int, message: str) -> None:
+        self.changes.append(f"linha {line}: {message}")
+
+    def new_variable(self, type_name: str, loop: While) -> Symbol:
+        """Variável nova, com um nome que não existe no programa"""
+        name = ""
+        while not name or name in self.names:
+            self.counter += 1
+            name = f"_t{self.counter}"
+        self.names.add(name)
+        symbol = Symbol(name, type_name, True, len(self.symbols), loop.line,
+                        loop.column, self.loop_depth)
+        self.symbols.append(symbol)
+        return symbol
+
+    # -----------------------
+    # Comandos
+    # -----------------------
+
+    def visit_block(self, block: Block) -> Block:
+        commands: List[Any] = []
+        changed = False
+        for cmd in block.commands:
+            new = self.visit_command(cmd, commands)
+            changed = changed or new is not cmd
+            commands.append(new)
+        return Block(commands) if changed else block
+
+    def visit_command(self, cmd, preceding: List[Any]):
+        if isinstance(cmd, Block):
+            return self.visit_block(cmd)
+        if isinstance(cmd, Conditional):
+            then_block = self.visit_block(cmd.then_block)
+            else_block = (self.visit_block(cmd.else_block)
+                          if cmd.else_block is not None else None)
+            if then_block is cmd.then_block and else_block is cmd.else_block:
+                return cmd
+            return Conditional(cmd.condition, then_block, else_block,
+                               cmd.line, cmd.column)
+        if isinstance(cmd, While):
+            self.loop_depth += 1
+            block = self.visit_block(cmd.block)
+            self.loop_depth -= 1
+            if block is not cmd.block:
+                cmd = While(cmd.condition, block, cmd.line, cmd.column)
+            return self.optimize_loop(cmd, preceding)
+        return cmd
+
+    # -----------------------
+    # Laços
+    # -----------------------
+
+    def optimize_loop(self, loop: While, preceding: List[Any]):
+        """O laço otimizado, envolvido em um bloco se algo foi movido"""
+        inductions = self.find_inductions(loop)
+        for iv in inductions.values():
+            steps = ", ".join(f"{s:+d}" for s in iv.steps)
+            self.stats["induction_variables"] += 1
+            self.report(loop.line, f"variável de indução '{iv.name}' "
+                                   f"(passo {steps})")
+
+        setup: List[Any] = []
+        condition, block = loop.condition, loop.block
+        reduced = self.reduce_strength(loop, inductions, preceding, setup)
+        if reduced is not None:
+            condition, block = reduced
+        # Inclui as variáveis reduzidas, atualizadas dentro do laço
+        written = _written(block, set())
+
+        hoisted: Dict[Tuple, Identifier] = {}
+
+        def hoist(expr):
+            if not isinstance(expr, BinaryOp) or can_fail(expr):
+                return None
+            slots: Set[int] = set()
+            if not _reads(expr, slots) or slots & written:
+                return None
+            key = _key(expr)
+            if key not in hoisted:
+                symbol = self.new_variable(_type_of(expr), loop)
+                hoisted[key] = self.reference(symbol)
+                setup.extend(self.define(symbol, expr, loop))
+                self.stats["invariants_hoisted"] += 1
+                self.report(loop.line, f"'{_source(expr)}' é invariante; "
+                                       f"calculada antes do laço em "
+                                       f"'{symbol.name}'")
+            return hoisted[key]
+
+        condition = _rewrite_condition(condition, hoist)
+        block = self.rewrite_block(block, hoist, {})
+        if not setup:
+            return loop
+        return Block(setup + [While(condition, block, loop.line,
+                                    loop.column)])
+
+    def find_inductions(self, loop: While) -> Dict[int, Induction]:
+        """Variáveis de indução básicas do laço, por slot"""
+        found: Dict[int, Induction] = {}
+        rejected: Set[int] = set()
+
+        def visit(cmd, inner: bool) -> None:
+            if isinstance(cmd, Block):
+                for c in cmd.commands:
+                    visit(c, inner)
+            elif isinstance(cmd, (Declaration, Read)):
+                rejected.add(cmd.slot)
+            elif isinstance(cmd, Assignment):
+                step = _step(cmd)
+                if step is None:
+                    rejected.add(cmd.slot)
+                    return
+                iv = found.setdefault(cmd.slot,
+                                      Induction(cmd.slot, cmd.identifier))
+                iv.steps.append(step)
+                iv.in_inner_loop = iv.in_inner_loop or inner
+            elif isinstance(cmd, Conditional):
+                visit(cmd.then_block, inner)
+                if cmd.else_block is not None:
+                    visit(cmd.else_block, inner)
+            elif isinstance(cmd, While):
+                visit(cmd.block, True)
+
+        visit(loop.block, False)
+        return {slot: iv for slot, iv in found.items() if slot not in rejected}
+
+    def reduce_strength(self, loop: While, inductions: Dict[int, Induction],
+                        preceding: List[Any], setup: List[Any]):
+        """Condição e corpo com i * k e i % k trocados por variáveis
+        mantidas a cada atualização de i (None se nada mudou)"""
+        if not inductions:
+            return None
+        expressions = [loop.condition] + _expressions(loop.block, [])
+        candidates: Dict[Tuple, Tuple[Induction, str, int, BinaryOp]] = {}
+        for expr in expressions:
+            for sub in _subexpressions(expr, []):
+                match = self.induction_operation(sub, inductions)
+                if match is not None:
+                    iv, operator, k = match
+                    candidates.setdefault((iv.slot, operator, k),
+                                          (iv, operator, k, sub))
+
+        replaced: Dict[Tuple, Identifier] = {}
+        # slot de i -> (operador, variável, k) a manter após i = i + c
+        updates: Dict[int, List[Tuple[str, Symbol, int]]] = {}
+        for key, (iv, operator, k, sub) in candidates.items():
+            if operator == "%" and not self.bounded_counter(loop, iv,
+                                                            preceding):
+                continue
+            if not self.strength_reduction:
+                self.report(loop.line, f"'{_source(sub)}' pode ser reduzida "
+                                       f"(não aplicado neste back-end)")
+                continue
+            symbol = self.new_variable(TYPE_I32, loop)
+            target = self.reference(symbol)
+            replaced[key] = target
+            setup.extend(self.define(symbol, sub, loop))
+            updates.setdefault(iv.slot, []).append((operator, symbol, k))
+            how = "somas" if operator == "*" else "um contador"
+            self.stats["strength_reduced"] += 1
+            self.report(loop.line, f"'{_source(sub)}' reduzida a {how} em "
+                                   f"'{symbol.name}'")
+        if not replaced:
+            return None
+
+        def replace(expr):
+            match = self.induction_operation(expr, inductions)
+            if match is None:
+                return None
+            iv, operator, k = match
+            return replaced.get((iv.slot, operator, k))
+
+        condition = _rewrite_condition(loop.condition, replace)
+        block = self.rewrite_block(loop.block, replace, updates)
+        return condition, block
+
+    @staticmethod
+    def induction_operation(expr, inductions: Dict[int, Induction]):
+        """(variável, operador, k) se a expressão for i * k, k * i ou i % k"""
+        if not isinstance(expr, BinaryOp):
+            return None
+        left, right = expr.left, expr.right
+        if expr.operator == "*" and isinstance(right, Identifier):
+            left, right = right, left
+        if not isinstance(left, Identifier) or left.slot not in inductions:
+            return None
+        k = _int_constant(right)
+        if k is None:
+            return None
+        if expr.operator == "*" or (expr.operator == "%" and k > 0):
+            return inductions[left.slot], expr.operator, k
+        return None
+
+    def bounded_counter(self, loop: While, iv: Induction,
+                        preceding: List[Any]) -> bool:
+        """Verdadeiro se i fica entre 0 e o máximo de i32 durante o laço"""
+        if iv.steps != [1] or iv.in_inner_loop:
+            return False
+        limited = any(
+            isinstance(c, RelationalOp) and (
+                (c.operator == "<" and isinstance(c.left, Identifier)
+                 and c.left.slot == iv.slot and _type_of(c.right) == TYPE_I32)
+                or (c.operator == ">" and isinstance(c.right, Identifier)
+                    and c.right.slot == iv.slot
+                    and _type_of(c.left) == TYPE_I32))
+            for c in _conjuncts(loop.condition))
+        if not limited:
+            return False
+        # Valor na entrada: o último comando anterior que escreve em i
+        for cmd in reversed(preceding):
+            if iv.slot not in _written(cmd, set()):
+                continue
+            if isinstance(cmd, Declaration):
+                return True
+            if isinstance(cmd, Assignment):
+                start = _int_constant(cmd.expression)
+                return start is not None and start >= 0
+            return False
+        return False
+
+    # -----------------------
+    # Construção de nós
+    # -----------------------
+
+    @staticmethod
+    def reference(symbol: Symbol) -> Identifier:
+        return Identifier(symbol.name, symbol.slot, symbol.type_name)
+
+    @staticmethod
+    def assign(symbol: Symbol, expr, line: int, column: int) -> Assignment:
+        return Assignment(symbol.name, expr, line, column, symbol.slot,
+                          symbol.type_name)
+
+    def define(self, symbol: Symbol, expr, loop: While) -> List[Any]:
+        """Declaração da variável nova e o seu valor antes do laço"""
+        return [Declaration(True, symbol.name, symbol.type_name, loop.line,
+                            loop.column, symbol.slot),
+                self.assign(symbol, expr, loop.line, loop.column)]
+
+    def maintenance(self, cmd: Assignment,
+                    updates: List[Tuple[str, Symbol, int]]) -> List[Any]:
+        """Comandos que mantêm as variáveis reduzidas após i = i + c"""
+        step = _step(cmd)
+        commands: List[Any] = []
+        for operator, symbol, k in updates:
+            current = self.reference(symbol)
+            if operator == "*":
+                delta = wrap_i32(step * k)
+                if delta == 0:
+                    continue
+                expr = (BinaryOp(current, "-", make_number(-delta))
+                        if delta < 0 and delta != -2 ** 31
+                        else BinaryOp(current, "+", make_number(delta)))
+                commands.append(self.assign(symbol, expr, cmd.line,
+                                            cmd.column))
+            else:
+                commands.append(self.assign(
+                    symbol, BinaryOp(current, "+", make_number(1)),
+                    cmd.line, cmd.column))
+                reset = Block([self.assign(symbol, make_number(0), cmd.line,
+                                           cmd.column)])
+                commands.append(Conditional(
+                    RelationalOp(self.reference(symbol), "==", make_number(k)),
+                    reset, None, cmd.line, cmd.column))
+        return commands
+
+    def rewrite_block(self, block: Block, replace,
+                      updates: Dict[int, List[Any]]) -> Block:
+        """Recria o bloco trocando subexpressões e inserindo a manutenção
+        das variáveis reduzidas após cada atualização de uma indução"""
+        commands: List[Any] = []
+        changed = False
+        for cmd in block.commands:
+            new = self.rewrite_command(cmd, replace, updates)
+            changed = changed or new is not cmd
+            commands.append(new)
+            if isinstance(cmd, Assignment) and cmd.slot in updates:
+                commands.extend(self.maintenance(cmd, updates[cmd.slot]))
+                changed = True
+        return Block(commands) if changed else block
+
+    def rewrite_command(self, cmd, replace, updates: Dict[int, List[Any]]):
+        if isinstance(cmd, Block):
+            return self.rewrite_block(cmd, replace, updates)
+        if isinstance(cmd, Assignment):
+            expr = _rewrite(cmd.expression, replace)
+            if expr is cmd.expression:
+                return cmd
+            return Assignment(cmd.identifier, expr, cmd.line, cmd.column,
+                              cmd.slot, cmd.type_name)
+        if isinstance(cmd, Conditional):
+            cond = _rewrite_condition(cmd.condition, replace)
+            then_block = self.rewrite_block(cmd.then_block, replace, updates)
+            else_block = (self.rewrite_block(cmd.else_block, replace, updates)
+                          if cmd.else_block is not None else None)
+            if (cond is cmd.condition and then_block is cmd.then_block
+                    and else_block is cmd.else_block):
+                return cmd
+            return Conditional(cond, then_block, else_block, cmd.line,
+                               cmd.column)
+        if isinstance(cmd, While):
+            cond = _rewrite_condition(cmd.condition, replace)
+            block = self.rewrite_block(cmd.block, replace, updates)
+            if cond is cmd.condition and block is cmd.block:
+                return cmd
+            return While(cond, block, cmd.line, cmd.column)
+        return cmd
+
+
+def optimize_loops(program: Program, stats: Optional[Dict[str, int]] = None,
+                   changes: Optional[List[str]] = None,
+                   strength_reduction: bool = True) -> Program:
+    """
+    Aplica as otimizações de laços; os contadores são somados em stats e a
+    descrição de cada transformação é acrescentada a changes.
+    """
+    optimizer = LoopOptimizer(strength_reduction)
+    optimized = optimizer.optimize(program)
+    if stats is not None:
+        for key, count in optimizer.stats.items():
+            stats[key] = stats.get(key, 0) + count
+    if changes is not None:
+        changes.extend(optimizer.changes)
+    return optimized
@@ -1,75 +1,176 @@
 # main.py
 """
 Compilador - Checkpoints 01 e 02
-Analisador Léxico e Sintático
+Analisador Léxico, Sintático e Semântico
 
 Uso:
     python main.py --input programa.txt              # Análise léxica e sintática
     python main.py --input programa.txt --lex-only   # Apenas análise léxica
     python main.py --input programa.txt --verbose    # Modo verboso com AST
+    python main.py --input programa.txt --lexer-engine regex  # Motor léxico por regex
+    python main.py --input programa.txt --stream     # Léxico e sintático em uma passada
+    python main.py --input programa.txt --token-buffer  # Tokens em armazenamento compacto
+    python main.py --input programa.txt --lex-only --emit-tokens prog.tok  # Grava os tokens
+    python main.py --tokens prog.tok                 # Analisa a partir dos tokens gravados
+    python main.py --input programa.txt --lex-only --format jsonl  # Tokens em JSON Lines
+    python main.py --input programa.txt --format json  # AST em JSON
+    python main.py --input programa.txt --parser stack  # Parser sem recursão
+    python main.py --batch 'testes/**/*.txt' --jobs 8  # Vários arquivos em paralelo
+    python main.py --input programa.txt --no-cache   # Ignora o cache em disco
+    python main.py --input programa.txt --run --program-input dados.txt  # Executa
+    python main.py --input programa.txt --run --backend closure  # Outro back-end
+    python main.py --input programa.txt --run --backend python   # Traduz para Python
+    python main.py --input programa.txt --native      # Compila para C e executa
+    python main.py --input programa.txt --run --no-optimize     # Sem otimizações
+    python main.py --input programa.txt --emit-ir      # IR de três endereços
+    python main.py --input programa.txt --emit-ir ssa  # IR em forma SSA
+    python main.py --input programa.txt --opt-report   # Relatório de otimizações
+    python main.py --input programa.txt --profile      # Tempos por fase (JSON)
+    python main.py --daemon &                        # Daemon de compilação
+    python main.py --client --input programa.txt     # Análise feita pelo daemon
 """
 
 import argparse
+import contextlib
+import functools
+import io
+import os
 import sys
-from lexer import Lexer, LexerError, TokenType, Token
-from parser import Parser, ParserError
+import time
+from typing import Iterable, Optional, TextIO
+from lexer import Lexer, LexerError, TokenType, Token, ENGINES
+from parser import ParserError
+from stack_parser import PARSERS
+from token_buffer import TokenBuffer
+from token_file import TokenFile, TokenFileError, save_tokens
+from batch import (FileResult, PASSED, LEXICAL_ERRORS, SYNTAX_ERRORS,
+                   SEMANTIC_ERRORS, RUNTIME_ERRORS, TOO_DEEP, NOT_FOUND, FAILED,
+                   EXIT_CODES, expand_inputs, run_batch, exit_code, summarize)
+from cache import CompileCache, DEFAULT_CACHE_DIR, get_cache
+from runtime import CompileError, ExecutionError
+from backends import (BACKENDS, DEFAULT_BACKEND, STRENGTH_REDUCTION,
+                      load as load_backend)
+from optimizer import ConstantFolder
+from cgen import compiler as c_compiler
+from dataflow import optimize_dataflow
+from loops import optimize_loops
+from semantic import analyze
+from ir import format_ir, lower
+from profiling import Profile, phase, write_profile, pstats_path, cprofile_hook
+from dump import FORMATS, format_token, write_ast, write_tokens
+from daemon import (Collected, DaemonError, DEFAULT_SOCKET, encode_response,
+                    send_request, serve)
 
 
-def format_token(t: Token) -> str:
-    """Formata um token para exibição"""
-    lexeme_display = t.lexeme if t.lexeme != "" else "''"
-    return f"{t.line}:{t.column} {t.type.name} {lexeme_display} {t.literal}"
-
-
-def print_tokens(tokens: list[Token], keep_comments: bool = False):
+def print_tokens(tokens: Iterable[Token], keep_comments: bool = False):
     """Imprime todos os tokens"""
-    for t in tokens:
-        if not keep_comments and t.type in (TokenType.LINE_COMMENT, TokenType.BLOCK_COMMENT):
-            continue
-        print(format_token(t))
+    write_tokens(sys.stdout, tokens, "text", keep_comments)
 
 
-def print_ast(node, indent=0):
+def print_ast(node):
     """Imprime a AST de forma hierárquica"""
-    prefix = "  " * indent
-    node_type = type(node).__name__
-
-    if hasattr(node, '__dict__'):
-        attrs = []
-        for key, value in node.__dict__.items():
-            if isinstance(value, list):
-                attrs.append(f"{key}=[{len(value)} items]")
-            elif not isinstance(value, (type(None), bool, int, float, str)):
-                attrs.append(f"{key}=<{type(value).__name__}>")
-            else:
-                attrs.append(f"{key}={repr(value)}")
-
-        attr_str = ", ".join(attrs) if attrs else ""
-        print(f"{prefix}{node_type}({attr_str})")
-
-        # Imprime recursivamente os filhos
-        for key, value in node.__dict__.items():
-            if isinstance(value, list):
-                for item in value:
-                    if hasattr(item, '__dict__'):
-                        print_ast(item, indent + 1)
-            elif hasattr(value, '__dict__') and not isinstance(value, (str, int, float, bool)):
-                print_ast(value, indent + 1)
-    else:
-        print(f"{prefix}{node_type}: {node}")
+    write_ast(sys.stdout, node, "text")
+
+
+class TokenTally:
+    """Repassa os tokens do lexer contando-os e coletando os erros léxicos"""
+
+    def __init__(self, tokens, echo: bool = False):
+        self._tokens = tokens
+        self.echo = echo
+        self.count = 0
+        self.errors: list[Token] = []
+
+    def __iter__(self):
+        for t in self._tokens:
+            self.count += 1
+            if t.type == TokenType.LEXICAL_ERROR:
+                self.errors.append(t)
+            if self.echo:
+                print(format_token(t))
+            yield t
+
+    def drain(self):
+        """Consome os tokens que o parser não chegou a pedir"""
+        for _ in self:
+            pass
+
+
+def collect_lexical(collect: Collected, errors: Iterable[Token]) -> None:
+    for err in errors:
+        collect.error("lexico", err.literal, err.line, err.column)
+
+
+def lex(lexer: Lexer, compact: bool = False,
+        cache: Optional[CompileCache] = None, key: Optional[str] = None):
+    """Executa o lexer, devolvendo List[Token] ou TokenBuffer (compact)"""
+    if cache is not None:
+        # O cache guarda sempre a forma compacta, que desserializa rápido
+        kind = "tokens-comments" if lexer.keep_comments else "tokens"
+        tokens = cache.load(key, kind)
+        if tokens is None:
+            tokens = TokenBuffer.from_lexer(lexer)
+            cache.store(key, kind, tokens)
+        return tokens if compact else list(tokens)
 
+    if compact:
+        return TokenBuffer.from_lexer(lexer)
+    return lexer.tokenize()
 
-def run_lexer_only(text: str, keep_comments: bool = False):
-    """Executa apenas a análise léxica"""
+
+def parse(tokens, cache: Optional[CompileCache] = None,
+          key: Optional[str] = None, parser_name: str = "recursive"):
+    """Executa o parser, devolvendo (AST, erros)"""
+    if cache is not None:
+        # Cada parser tem a sua entrada: a AST não é reaproveitada entre eles
+        kind = f"ast-{parser_name}"
+        result = cache.load(key, kind)
+        if result is None:
+            result = parse(tokens, parser_name=parser_name)
+            cache.store(key, kind, result)
+        return result
+
+    parser = PARSERS[parser_name](tokens)
+    ast = parser.parse()
+    return ast, parser.get_errors()
+
+
+def run_lexer_only(text: str, keep_comments: bool = False,
+                   engine: str = "classic", compact: bool = False,
+                   cache: Optional[CompileCache] = None,
+                   profile: Optional[Profile] = None,
+                   tokens: Optional[TokenBuffer] = None,
+                   emit_tokens: Optional[str] = None,
+                   output_format: str = "text",
+                   dump_out: Optional[TextIO] = None,
+                   collect: Optional[Collected] = None):
+    """Executa apenas a análise léxica (ou exibe os tokens de um arquivo)
+
+    Com output_format diferente de "text", os tokens são escritos em
+    `dump_out` nesse formato (ver dump.py). Com `collect` (daemon), guarda
+    também os tokens e os erros léxicos.
+    """
     print("=" * 60)
     print("ANÁLISE LÉXICA")
     print("=" * 60)
 
-    lexer = Lexer(text, keep_comments=keep_comments)
-    tokens = lexer.tokenize()
+    if tokens is None:
+        lexer = Lexer(text, keep_comments=keep_comments, engine=engine)
+        key = cache.key(text) if cache is not None else None
+        with phase(profile, "lexico"):
+            tokens = lex(lexer, (compact or emit_tokens is not None
+                                 or output_format == "binary"), cache, key)
+    if emit_tokens:
+        with phase(profile, "gravacao-tokens"):
+            save_tokens(emit_tokens, tokens)
+    if profile is not None:
+        profile.metrics["tokens"] = len(tokens)
 
     # Verifica se há erros léxicos
     lexical_errors = [t for t in tokens if t.type == TokenType.LEXICAL_ERROR]
+    if collect is not None:
+        collect.tokens = tokens
+        collect_lexical(collect, lexical_errors)
 
     if lexical_errors:
         print("\nERROS LÉXICOS ENCONTRADOS:")
@@ -77,36 +178,97 @@ def run_lexer_only(text: str, keep_comments: bool = False):
             print(f"  Linha {err.line}, coluna {err.column}: {err.literal}")
         print()
 
-    print_tokens(tokens, keep_comments)
+    if output_format == "text":
+        print_tokens(tokens, keep_comments)
+    else:
+        with phase(profile, "saida"):
+            write_tokens(dump_out, tokens, output_format, keep_comments)
     print(f"\nTotal de tokens: {len(tokens)}")
 
-    return len(lexical_errors) == 0
+    return LEXICAL_ERRORS if lexical_errors else PASSED
 
 
-def run_full_analysis(text: str, verbose: bool = False):
-    """Executa análise léxica e sintática completa"""
+def run_full_analysis(text: str, verbose: bool = False,
+                      engine: str = "classic", streaming: bool = False,
+                      compact: bool = False,
+                      cache: Optional[CompileCache] = None,
+                      execute: bool = False,
+                      program_input: Optional[str] = None,
+                      backend: str = DEFAULT_BACKEND,
+                      optimize: bool = True,
+                      emit_ir: Optional[str] = None,
+                      opt_report: bool = False,
+                      parser_name: str = "recursive",
+                      profile: Optional[Profile] = None,
+                      tokens: Optional[TokenBuffer] = None,
+                      emit_tokens: Optional[str] = None,
+                      output_format: str = "text",
+                      dump_out: Optional[TextIO] = None,
+                      collect: Optional[Collected] = None):
+    """Executa as análises léxica, sintática e semântica (e, se pedido, executa)
+
+    Com `tokens` (lidos de um arquivo de --tokens), o léxico não é executado.
+    Com output_format diferente de "text", a AST é escrita em `dump_out`
+    nesse formato (ver dump.py). Com `collect` (daemon), guarda os tokens
+    (exceto em streaming), a AST e os erros de cada fase.
+    """
 
     # Fase 1: Análise Léxica
     print("=" * 60)
     print("FASE 1: ANÁLISE LÉXICA")
     print("=" * 60)
 
-    lexer = Lexer(text, keep_comments=False)
-    tokens = lexer.tokenize()
+    lexer = Lexer(text, keep_comments=False, engine=engine)
+    key = None
 
-    # Verifica erros léxicos
-    lexical_errors = [t for t in tokens if t.type == TokenType.LEXICAL_ERROR]
+    if tokens is not None:
+        streaming = False
+        token_count = len(tokens)
+        lexical_errors = [t for t in tokens if t.type == TokenType.LEXICAL_ERROR]
+    elif streaming:
+        # Uma única passada: o parser puxa os tokens do gerador sob demanda,
+        # e a contagem e os erros léxicos são coletados no caminho
+        if verbose:
+            print("\nTOKENS:")
+        with phase(profile, "lexico+sintatico"):
+            tally = TokenTally(lexer.iter_tokens(), echo=verbose)
+            parser = PARSERS[parser_name](tally, streaming=True)
+            try:
+                ast = parser.parse()
+            except RecursionError:
+                return too_deep("sintatico", collect)
+            errors = parser.get_errors()
+            tally.drain()
+        token_count = tally.count
+        lexical_errors = tally.errors
+    else:
+        key = cache.key(text) if cache is not None else None
+        with phase(profile, "lexico"):
+            tokens = lex(lexer, compact or emit_tokens is not None, cache,
+                         key)
+        if emit_tokens:
+            with phase(profile, "gravacao-tokens"):
+                save_tokens(emit_tokens, tokens)
+        token_count = len(tokens)
+        # Verifica erros léxicos
+        lexical_errors = [t for t in tokens if t.type == TokenType.LEXICAL_ERROR]
+
+    if profile is not None:
+        profile.metrics["tokens"] = token_count
+    if collect is not None:
+        collect.tokens = tokens
+        collect_lexical(collect, lexical_errors)
 
     if lexical_errors:
         print("\nERROS LÉXICOS ENCONTRADOS:")
         for err in lexical_errors:
             print(f"  Linha {err.line}, coluna {err.column}: {err.literal}")
         print("\nAnálise interrompida devido a erros léxicos.")
-        return False
+        return LEXICAL_ERRORS
 
-    print(f"[OK] Analise lexica concluida com sucesso ({len(tokens)} tokens)")
+    print(f"[OK] Analise lexica concluida com sucesso ({token_count} tokens)")
 
-    if verbose:
+    if verbose and not streaming:
         print("\nTOKENS:")
         print_tokens(tokens)
 
@@ -115,34 +277,487 @@ def run_full_analysis(text: str, verbose: bool = False):
     print("FASE 2: ANALISE SINTATICA")
     print("=" * 60)
 
-    parser = Parser(tokens)
-    ast = parser.parse()
+    if not streaming:
+        try:
+            with phase(profile, "sintatico"):
+                ast, errors = parse(tokens, cache if key else None, key,
+                                    parser_name)
+        except RecursionError:
+            return too_deep("sintatico", collect)
+    if profile is not None and ast is not None:
+        profile.measure_ast(ast)
+    if collect is not None:
+        collect.ast = ast
+        for err in errors:
+            collect.error("sintatico", err.message, err.token.line,
+                          err.token.column)
 
-    if parser.has_errors():
+    if errors:
         print("\nERROS SINTATICOS ENCONTRADOS:")
-        for err in parser.get_errors():
+        for err in errors:
             print(f"  {err}")
         print("\nAnalise sintatica falhou.")
-        return False
+        return SYNTAX_ERRORS
 
     if ast is None:
         print("\nErro: AST nao foi gerada corretamente.")
-        return False
+        return SYNTAX_ERRORS
 
     print("[OK] Analise sintatica concluida com sucesso!")
 
-    if verbose:
+    if output_format != "text":
+        with phase(profile, "saida"):
+            write_ast(dump_out, ast, output_format)
+    elif verbose:
         print("\nARVORE SINTATICA ABSTRATA (AST):")
         print_ast(ast)
 
+    # Fase 3: Análise Semântica
+    print("\n" + "=" * 60)
+    print("FASE 3: ANALISE SEMANTICA")
+    print("=" * 60)
+
+    with phase(profile, "semantico"):
+        semantic_errors = analyze(ast)
+    if collect is not None:
+        for err in semantic_errors:
+            collect.error("semantico", err.message, err.line, err.column)
+    if semantic_errors:
+        print("\nERROS SEMANTICOS ENCONTRADOS:")
+        for err in semantic_errors:
+            print(f"  {err}")
+        print("\nAnalise semantica falhou.")
+        return SEMANTIC_ERRORS
+
+    print(f"[OK] Analise semantica concluida com sucesso "
+          f"({len(ast.symbols)} variaveis)")
+
     print("\n" + "=" * 60)
     print("COMPILACAO BEM-SUCEDIDA!")
     print("=" * 60)
 
-    return True
+    # As fases seguintes ainda percorrem a AST com recursão
+    stage = "otimizacao"
+    try:
+        if optimize and (emit_ir or execute or opt_report):
+            report = [] if opt_report else None
+            with phase(profile, "otimizacao"):
+                ast = optimize_program(ast, report,
+                                       backend in STRENGTH_REDUCTION)
+            if report is not None:
+                print_report(report)
 
+        stage = "ir"
+        if emit_ir:
+            with phase(profile, "ir"):
+                print_ir(ast, ssa=emit_ir == "ssa")
+    except RecursionError:
+        return too_deep(stage, collect)
 
-def main():
+    if execute:
+        return run_program(ast, program_input, backend, cache, profile,
+                           collect)
+
+    return PASSED
+
+
+# Descrição das fases recursivas nas mensagens de too_deep
+RECURSIVE_STAGES = {
+    "sintatico": "o parser recursivo",
+    "otimizacao": "as otimizações",
+    "ir": "o IR",
+    "preparo": "o preparo no back-end",
+    "execucao": "a execução no back-end",
+}
+
+
+def too_deep(stage: str, collect: Optional[Collected] = None,
+             backend: Optional[str] = None) -> str:
+    """Relata o RecursionError de uma fase que ainda percorre a AST com
+    recursão (a análise com --parser stack não tem esse limite)"""
+    where = RECURSIVE_STAGES[stage] + (f" {backend}" if backend else "")
+    if stage == "sintatico":
+        hint = "use --parser stack, que não tem esse limite"
+    else:
+        hint = "a análise léxica, sintática e semântica foi concluída"
+    message = f"aninhamento profundo demais para {where} ({hint})"
+    if collect is not None:
+        collect.error(stage, message)
+    print(f"\nErro: {message}")
+    return TOO_DEEP
+
+
+def optimize_program(ast, report: Optional[list] = None,
+                     strength_reduction: bool = False):
+    """
+    Aplica as otimizações sobre a AST, na ordem: dobramento, fluxo de dados
+    e laços (redução de força só se pedida, ver backends.py). Com report,
+    acrescenta as linhas do relatório de otimizações.
+    """
+    folder = ConstantFolder()
+    dataflow_stats: dict = {}
+    loop_stats: dict = {}
+    changes: list = []
+    ast = folder.optimize(ast)
+    ast = optimize_dataflow(ast, dataflow_stats)
+    ast = optimize_loops(ast, loop_stats, changes, strength_reduction)
+    if report is not None:
+        for title, stats in (("dobramento de constantes", folder.stats),
+                             ("fluxo de dados", dataflow_stats),
+                             ("laços", loop_stats)):
+            counts = " ".join(f"{key}={count}" for key, count in stats.items())
+            report.append(f"{title}: {counts}")
+        report.extend(f"  {change}" for change in changes)
+    return ast
+
+
+def print_report(report: list) -> None:
+    """Imprime o relatório de otimizações (--opt-report)"""
+    print("\n" + "=" * 60)
+    print("RELATORIO DE OTIMIZACOES")
+    print("=" * 60)
+    for line in report:
+        print(line)
+
+
+def print_ir(ast, ssa: bool = False) -> None:
+    """Imprime o IR de três endereços do programa (o mesmo que seria executado)"""
+    print("\n" + "=" * 60)
+    print("REPRESENTACAO INTERMEDIARIA" + (" (SSA)" if ssa else ""))
+    print("=" * 60)
+    print(format_ir(lower(ast, ssa=ssa)))
+
+
+def run_program(ast, program_input: Optional[str] = None,
+                backend: str = DEFAULT_BACKEND,
+                cache: Optional[CompileCache] = None,
+                profile: Optional[Profile] = None,
+                collect: Optional[Collected] = None) -> str:
+    """Fase 4: prepara a AST (já otimizada) no back-end escolhido e executa"""
+    print("\n" + "=" * 60)
+    print("FASE 4: EXECUCAO")
+    print("=" * 60)
+
+    if backend == "c" and c_compiler() is None:
+        print("[AVISO] Compilador C nao encontrado; executando na VM")
+
+    try:
+        with phase(profile, "preparo"):
+            run = load_backend(ast, backend, cache)
+    except RecursionError:
+        return too_deep("preparo", collect, backend)
+    except CompileError as e:
+        if collect is not None:
+            collect.error("semantico", e.message, e.line, e.column)
+        print(f"\n{e}")
+        return SEMANTIC_ERRORS
+
+    # A saída do programa passa pelo sys.stdout atual (capturado no modo lote)
+    sys.stdout.flush()
+    try:
+        with phase(profile, "execucao"):
+            if program_input is None:
+                run(sys.stdin, sys.stdout)
+            else:
+                with open(program_input, "r", encoding="utf-8") as data:
+                    run(data, sys.stdout)
+    except RecursionError:
+        return too_deep("execucao", collect, backend)
+    except ExecutionError as e:
+        if collect is not None:
+            collect.error("execucao", e.message, e.line)
+        print(f"\n{e}")
+        return RUNTIME_ERRORS
+
+    return PASSED
+
+
+def analyze_text(text: str, args: argparse.Namespace, source: str = "",
+                 profile: Optional[Profile] = None,
+                 tokens: Optional[TokenBuffer] = None,
+                 collect: Optional[Collected] = None) -> str:
+    """Executa a análise pedida na linha de comando e devolve a situação"""
+    cache = None
+    if not args.no_cache and tokens is None:
+        cache = get_cache(args.cache_dir, args.cache_size * 1024 * 1024)
+    if profile is not None and tokens is None:
+        profile.measure_text(text)
+    hook_path = pstats_path(args.pstats, source) if args.pstats else None
+
+    # Fora do modo texto, a saída padrão leva apenas o dump; o restante do
+    # relatório vai para a saída de erros
+    dump_out = sys.stdout
+    report = (contextlib.redirect_stdout(sys.stderr)
+              if args.format != "text" else contextlib.nullcontext())
+
+    with cprofile_hook(hook_path), report:
+        if args.lex_only:
+            status = run_lexer_only(text, keep_comments=args.keep_comments,
+                                    engine=args.lexer_engine,
+                                    compact=args.token_buffer, cache=cache,
+                                    profile=profile, tokens=tokens,
+                                    emit_tokens=args.emit_tokens,
+                                    output_format=args.format,
+                                    dump_out=dump_out, collect=collect)
+        else:
+            status = run_full_analysis(text, verbose=args.verbose,
+                                       engine=args.lexer_engine,
+                                       streaming=args.stream,
+                                       compact=args.token_buffer, cache=cache,
+                                       execute=args.run,
+                                       program_input=args.program_input,
+                                       backend=args.backend,
+                                       optimize=not args.no_optimize,
+                                       emit_ir=args.emit_ir,
+                                       opt_report=args.opt_report,
+                                       parser_name=args.parser,
+                                       profile=profile, tokens=tokens,
+                                       emit_tokens=args.emit_tokens,
+                                       output_format=args.format,
+                                       dump_out=dump_out, collect=collect)
+
+        if profile is not None:
+            profile.status = status
+            write_profile(profile,
+                          None if args.profile == "-" else args.profile)
+    return status
+
+
+def analyze_file(path: str, args: argparse.Namespace) -> FileResult:
+    """Analisa um arquivo do lote capturando a saída (executa nos workers)"""
+    start = time.perf_counter()
+    out = io.StringIO()
+    profile = Profile(path) if args.profile else None
+    try:
+        with phase(profile, "leitura"):
+            with open(path, "r", encoding="utf-8") as f:
+                text = f.read()
+        with contextlib.redirect_stdout(out):
+            status = analyze_text(text, args, path, profile)
+    except FileNotFoundError:
+        status = NOT_FOUND
+        out.write(f"Erro: Arquivo não encontrado: {path}\n")
+    except Exception as e:
+        status = FAILED
+        out.write(f"Erro inesperado: {e}\n")
+    return FileResult(path, status, out.getvalue(),
+                      time.perf_counter() - start)
+
+
+def run_batch_mode(args: argparse.Namespace) -> int:
+    """Analisa todos os arquivos do lote e imprime os resultados em ordem"""
+    start = time.perf_counter()
+    paths = expand_inputs(args.batch or [], args.manifest or [])
+    worker = functools.partial(analyze_file, args=args)
+
+    results = []
+    for result in run_batch(paths, worker, args.jobs):
+        results.append(result)
+        print(f"### {result.path} [{result.status}] ({result.seconds:.3f}s)")
+        print(result.output, end="")
+        print()
+
+    print(summarize(results, time.perf_counter() - start))
+    return exit_code(results)
+
+
+def run_token_file_mode(args: argparse.Namespace) -> int:
+    """Analisa os tokens de um arquivo gravado por --emit-tokens"""
+    profile = Profile(args.tokens) if args.profile else None
+    try:
+        with phase(profile, "leitura"):
+            tokens = TokenFile.open(args.tokens)
+    except FileNotFoundError:
+        print(f"Erro: Arquivo não encontrado: {args.tokens}", file=sys.stderr)
+        return 2
+    except TokenFileError as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        return 2
+    with tokens:
+        status = analyze_text("", args, args.tokens, profile, tokens)
+    return EXIT_CODES[status]
+
+
+# -----------------------
+# Daemon (--daemon, --client)
+# -----------------------
+
+# Opções que o daemon não aceita em uma requisição
+DAEMON_REJECTED = {"input", "stdin", "batch", "manifest", "jobs", "daemon",
+                   "client", "stop_daemon", "socket"}
+
+# Valores aceitos das opções com escolhas
+OPTION_CHOICES = {
+    "format": [f for f in FORMATS if f != "binary"],
+    "lexer_engine": ENGINES,
+    "parser": list(PARSERS),
+    "backend": list(BACKENDS),
+    "emit_ir": [None, "cfg", "ssa"],
+}
+
+# Opções com caminhos, tornados absolutos pelo cliente (o daemon roda em
+# outro diretório)
+PATH_OPTIONS = ["cache_dir", "program_input", "emit_tokens", "tokens",
+                "pstats", "profile"]
+
+# Programa compilado uma vez por processo do daemon, ao iniciar
+WARMUP_PROGRAM = "fn main() { let mut x: i32; x = 1 + 2; print!(x); }"
+
+
+def request_args(options: dict) -> argparse.Namespace:
+    """Opções de uma requisição do daemon sobre os padrões da linha de comando"""
+    args = build_arg_parser().parse_args([])
+    for name, value in options.items():
+        if name in DAEMON_REJECTED or not hasattr(args, name):
+            raise DaemonError(f"opção não aceita pelo daemon: {name}")
+        default = getattr(args, name)
+        if default is None:
+            valid = value is None or isinstance(value, str)
+        else:
+            valid = type(value) is type(default)
+        if valid and name in OPTION_CHOICES:
+            valid = value in OPTION_CHOICES[name]
+        if not valid:
+            raise DaemonError(f"valor inválido para {name}: {value!r}")
+        setattr(args, name, value)
+    error = finish_args(args)
+    if error:
+        raise DaemonError(error)
+    return args
+
+
+def dump_json(write, value) -> str:
+    """Dump JSON (dump.py) de tokens ou da AST, sem a quebra de linha final"""
+    out = io.StringIO()
+    write(out, value)
+    return out.getvalue().rstrip("\n")
+
+
+def handle_request(request: dict) -> bytes:
+    """Atende uma requisição do daemon (executa nos processos do pool)"""
+    start = time.perf_counter()
+    out, err = io.StringIO(), io.StringIO()
+    collect = Collected()
+    raw = {}
+    stdin = sys.stdin
+    try:
+        args = request_args(request.get("options") or {})
+        if request.get("tokens"):
+            # Em streaming os tokens não chegam a ser guardados
+            args.stream = False
+        source = args.tokens or request.get("path") or "<daemon>"
+        profile = Profile(source) if args.profile else None
+        # A entrada do programa executado vem na requisição
+        sys.stdin = io.StringIO(request.get("input") or "")
+        with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+            with contextlib.ExitStack() as stack:
+                tokens = None
+                if args.tokens:
+                    with phase(profile, "leitura"):
+                        tokens = stack.enter_context(TokenFile.open(args.tokens))
+                    text = ""
+                elif "source" in request:
+                    text = request["source"]
+                    if not isinstance(text, str):
+                        raise DaemonError("source deve ser uma string")
+                elif "path" in request:
+                    with phase(profile, "leitura"):
+                        with open(request["path"], "r", encoding="utf-8") as f:
+                            text = f.read()
+                else:
+                    raise DaemonError("a requisição precisa de source ou path")
+                status = analyze_text(text, args, source, profile, tokens,
+                                      collect)
+
+                # Ainda dentro do ExitStack: os tokens podem estar no mmap
+                if request.get("tokens") and collect.tokens is not None:
+                    raw["tokens"] = dump_json(
+                        lambda o, t: write_tokens(o, t, "json",
+                                                  args.keep_comments),
+                        collect.tokens)
+                if request.get("ast") and collect.ast is not None:
+                    raw["ast"] = dump_json(
+                        lambda o, a: write_ast(o, a, "json"), collect.ast)
+    except FileNotFoundError as e:
+        status = NOT_FOUND
+        err.write(f"Erro: Arquivo não encontrado: {e.filename}\n")
+    except (DaemonError, TokenFileError) as e:
+        status = FAILED
+        err.write(f"Erro: {e}\n")
+    except Exception as e:
+        status = FAILED
+        err.write(f"Erro inesperado: {e}\n")
+    finally:
+        sys.stdin = stdin
+
+    return encode_response({"id": request.get("id"), "status": status,
+                            "exit_code": EXIT_CODES[status],
+                            "output": out.getvalue(),
+                            "errors": err.getvalue(),
+                            "diagnostics": collect.diagnostics,
+                            "seconds": time.perf_counter() - start}, raw)
+
+
+def warm_up() -> None:
+    """Carrega o cache e os caminhos do léxico ao sintático em um processo"""
+    handle_request({"source": WARMUP_PROGRAM, "options": {"no_cache": True}})
+
+
+def run_daemon_mode(args: argparse.Namespace) -> int:
+    """Executa o daemon até ser encerrado (--daemon)"""
+    try:
+        serve(args.socket, handle_request, args.jobs, warm_up)
+    except (DaemonError, OSError) as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        return 2
+    return 0
+
+
+def client_options(args: argparse.Namespace) -> dict:
+    """Opções da linha de comando que diferem do padrão, para o daemon"""
+    defaults = build_arg_parser().parse_args([])
+    options = {}
+    for name, value in vars(args).items():
+        if name in DAEMON_REJECTED or value == getattr(defaults, name):
+            continue
+        if name in PATH_OPTIONS and value is not None and value != "-":
+            value = os.path.abspath(value)
+        options[name] = value
+    return options
+
+
+def run_client_mode(args: argparse.Namespace) -> int:
+    """Envia a análise ao daemon (--client) e reproduz a sua saída"""
+    request = {"options": client_options(args)}
+    if args.stdin:
+        request["source"] = sys.stdin.read()
+    elif not args.tokens:
+        request["path"] = os.path.abspath(args.input)
+    if args.run and args.program_input is None:
+        request["input"] = sys.stdin.read()
+
+    try:
+        response = send_request(args.socket, request)
+    except DaemonError as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        return 2
+    sys.stdout.write(response["output"])
+    sys.stderr.write(response["errors"])
+    return response["exit_code"]
+
+
+def run_stop_daemon(args: argparse.Namespace) -> int:
+    """Encerra o daemon (--stop-daemon)"""
+    try:
+        send_request(args.socket, {"command": "shutdown"})
+    except DaemonError as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        return 2
+    return 0
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    """Opções da linha de comando (também os padrões das requisições do daemon)"""
     parser = argparse.ArgumentParser(
         description="Compilador - Checkpoints 01 e 02",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -152,6 +767,27 @@ Exemplos de uso:
   python main.py --input programa_ckp2_ter_noite.txt --verbose
   python main.py --input programa.txt --lex-only
   python main.py --input programa.txt --lex-only --keep-comments
+  python main.py --input programa.txt --lexer-engine regex
+  python main.py --input programa.txt --stream
+  python main.py --input programa.txt --token-buffer
+  python main.py --input programa.txt --lex-only --emit-tokens programa.tok
+  python main.py --tokens programa.tok --verbose
+  python main.py --input programa.txt --lex-only --format jsonl
+  python main.py --input programa.txt --format binary > programa.ast
+  python main.py --input programa_profundo.txt --parser stack
+  python main.py --batch 'testes/*.txt' teste_correto_simples.txt --jobs 4
+  python main.py --manifest lista.txt --lex-only
+  python main.py --input programa.txt --cache-dir /tmp/cache
+  python main.py --input programa_ckp2_ter_noite.txt --run --program-input dados.txt
+  python main.py --input programa.txt --run --backend closure
+  python main.py --input programa_ckp2_ter_noite.txt --native --program-input dados.txt
+  python main.py --input programa.txt --emit-ir ssa
+  python main.py --input programa_ckp2_ter_noite.txt --opt-report
+  python main.py --input programa.txt --profile
+  python main.py --batch 'testes/*.txt' --profile perfil.jsonl --pstats perfis/
+  python main.py --daemon --jobs 4 &
+  python main.py --client --input programa.txt --verbose
+  python main.py --stop-daemon
         """
     )
 
@@ -187,24 +823,248 @@ Exemplos de uso:
         help="Lê o código-fonte da entrada padrão (ignora --input)",
     )
 
+    parser.add_argument(
+        "--lexer-engine",
+        choices=ENGINES,
+        default="classic",
+        help="Motor de varredura do analisador léxico (padrão: classic)",
+    )
+
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Analisa em uma única passada, sem materializar a lista de tokens",
+    )
+
+    parser.add_argument(
+        "--token-buffer",
+        action="store_true",
+        help="Guarda os tokens em arrays compactos (TokenBuffer)",
+    )
+
+    parser.add_argument(
+        "--format",
+        choices=FORMATS,
+        default="text",
+        help="Formato dos tokens (com --lex-only) ou da AST escritos na "
+             "saída padrão; fora de text, o relatório vai para a saída de "
+             "erros (padrão: text)",
+    )
+
+    parser.add_argument(
+        "--emit-tokens",
+        metavar="ARQUIVO",
+        help="Grava os tokens em um arquivo binário (lido depois com --tokens)",
+    )
+
+    parser.add_argument(
+        "--tokens",
+        metavar="ARQUIVO",
+        help="Lê os tokens de um arquivo gravado por --emit-tokens, sem "
+             "executar o léxico (ignora --input)",
+    )
+
+    parser.add_argument(
+        "--parser",
+        choices=list(PARSERS),
+        default="recursive",
+        help="Parser usado: descendente recursivo ou com pilha explícita, "
+             "sem limite de aninhamento (padrão: recursive)",
+    )
+
+    parser.add_argument(
+        "--batch",
+        nargs="+",
+        metavar="CAMINHO",
+        help="Analisa vários arquivos (caminhos ou globs) em paralelo",
+    )
+
+    parser.add_argument(
+        "--manifest",
+        action="append",
+        metavar="ARQUIVO",
+        help="Arquivo com um caminho ou glob por linha (ativa o modo lote)",
+    )
+
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=None,
+        help="Processos usados no modo lote e pelo daemon (padrão: um por CPU)",
+    )
+
+    parser.add_argument(
+        "--cache-dir",
+        default=DEFAULT_CACHE_DIR,
+        help=f"Diretório do cache de tokens/AST (padrão: {DEFAULT_CACHE_DIR})",
+    )
+
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=256,
+        metavar="MB",
+        help="Tamanho máximo do cache em MB (padrão: 256)",
+    )
+
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Não lê nem grava o cache em disco",
+    )
+
+    parser.add_argument(
+        "--run",
+        action="store_true",
+        help="Executa o programa após uma compilação bem-sucedida",
+    )
+
+    parser.add_argument(
+        "--program-input",
+        metavar="ARQUIVO",
+        help="Entrada do programa executado com --run (padrão: entrada padrão)",
+    )
+
+    parser.add_argument(
+        "--backend",
+        choices=list(BACKENDS),
+        default=DEFAULT_BACKEND,
+        help=f"Back-end de execução usado com --run (padrão: {DEFAULT_BACKEND})",
+    )
+
+    parser.add_argument(
+        "--native",
+        action="store_true",
+        help="Executa como código nativo: traduz para C e compila com cc "
+             "(o mesmo que --run --backend c)",
+    )
+
+    parser.add_argument(
+        "--no-optimize",
+        action="store_true",
+        help="Executa sem otimizações (dobramento de constantes, fluxo de dados, laços)",
+    )
+
+    parser.add_argument(
+        "--emit-ir",
+        nargs="?",
+        const="cfg",
+        choices=["cfg", "ssa"],
+        help="Imprime o IR de três endereços em blocos básicos (ssa: em forma SSA)",
+    )
+
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="-",
+        metavar="ARQUIVO",
+        help="Mede cada fase (tempo de relógio e de CPU, tokens/s, bytes/s, "
+             "nós da AST) e imprime em JSON, ou acrescenta uma linha JSON "
+             "ao ARQUIVO",
+    )
+
+    parser.add_argument(
+        "--pstats",
+        metavar="DIRETORIO",
+        help="Mede o léxico e o sintático com cProfile e grava um .pstats "
+             "por entrada no diretório",
+    )
+
+    parser.add_argument(
+        "--opt-report",
+        action="store_true",
+        help="Imprime o que cada otimização alterou (dobramento, fluxo de dados, laços)",
+    )
+
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="Inicia o daemon de compilação, que atende requisições JSON no "
+             "socket (--socket) com processos sempre aquecidos",
+    )
+
+    parser.add_argument(
+        "--client",
+        action="store_true",
+        help="Envia a análise ao daemon em vez de executá-la neste processo",
+    )
+
+    parser.add_argument(
+        "--stop-daemon",
+        action="store_true",
+        help="Encerra o daemon, depois das requisições em andamento",
+    )
+
+    parser.add_argument(
+        "--socket",
+        metavar="CAMINHO",
+        default=DEFAULT_SOCKET,
+        help=f"Socket Unix do daemon (padrão: {DEFAULT_SOCKET})",
+    )
+
+    return parser
+
+
+def finish_args(args: argparse.Namespace) -> Optional[str]:
+    """Aplica --native e devolve o erro de uma combinação inválida de opções"""
+    if args.native:
+        args.run = True
+        args.backend = "c"
+    if args.emit_tokens and (args.stream or args.tokens or args.batch
+                             or args.manifest):
+        return ("--emit-tokens não pode ser usado com --stream, "
+                "--tokens, --batch ou --manifest")
+    if args.format != "text" and (args.batch or args.manifest):
+        return "--format só pode ser usado com um único arquivo"
+    if args.tokens and (args.batch or args.manifest or args.stdin):
+        return "--tokens não pode ser usado com --batch, --manifest ou --stdin"
+    if (args.client or args.daemon) and (args.batch or args.manifest):
+        return "--client e --daemon não podem ser usados com --batch ou --manifest"
+    if args.client and args.format == "binary":
+        return "--format binary não pode ser usado com --client"
+    return None
+
+
+def main():
+    parser = build_arg_parser()
     args = parser.parse_args()
+    error = finish_args(args)
+    if error:
+        parser.error(error)
+
+    if args.daemon:
+        sys.exit(run_daemon_mode(args))
+
+    if args.stop_daemon:
+        sys.exit(run_stop_daemon(args))
+
+    if args.client:
+        sys.exit(run_client_mode(args))
+
+    if args.batch or args.manifest:
+        sys.exit(run_batch_mode(args))
+
+    if args.tokens:
+        sys.exit(run_token_file_mode(args))
 
     try:
+        source = "<stdin>" if args.stdin else args.input
+        profile = Profile(source) if args.profile else None
+
         # Lê o código-fonte
-        if args.stdin:
-            text = sys.stdin.read()
-        else:
-            with open(args.input, "r", encoding="utf-8") as f:
-                text = f.read()
+        with phase(profile, "leitura"):
+            if args.stdin:
+                text = sys.stdin.read()
+            else:
+                with open(args.input, "r", encoding="utf-8") as f:
+                    text = f.read()
 
         # Executa análise
-        if args.lex_only:
-            success = run_lexer_only(text, keep_comments=args.keep_comments)
-        else:
-            success = run_full_analysis(text, verbose=args.verbose)
+        status = analyze_text(text, args, source, profile)
 
         # Código de saída
-        sys.exit(0 if success else 1)
+        sys.exit(EXIT_CODES[status])
 
     except FileNotFoundError:
         print(f"Erro: Arquivo não encontrado: {args.input}", file=sys.stderr)
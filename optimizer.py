@@ -0,0 +1,331 @@
+# optimizer.py
+"""
+Otimizações sobre a AST (entre o parser e os back-ends)
+
+Dobramento de constantes e simplificações algébricas:
+- BinaryOp/UnaryOp cujas folhas são todas Number são calculados com a
+  semântica da linguagem (i32 com volta em 32 bits, f64 IEEE). Divisão
+  inteira por zero e resultados não finitos não são dobrados, para que o
+  comportamento em execução seja o mesmo.
+- Identidades de i32: x*1, 1*x, x+0, 0+x, x-0, x/1 -> x; x*0, 0*x -> 0
+  (só quando x não pode falhar, isto é, não contém '/' ou '%');
+  constantes encadeadas são reagrupadas: (x + 1) + 2 -> x + 3, (x * 2) * 3
+  -> x * 6 (válido em aritmética módulo 2^32).
+- RelationalOp/LogicalOp/LogicalNot com operandos constantes são
+  avaliados; um operando que não altera o resultado é removido.
+- Conditional com condição constante vira o bloco escolhido (ou nada) e
+  While com condição falsa é removido.
+
+A árvore original não é modificada: nós alterados são recriados (com as
+mesmas anotações) e os demais são compartilhados. A passada trabalha sobre
+um programa já analisado (semantic.py), de onde vêm os tipos das
+variáveis; por isso erros em código removido já foram reportados.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from parser import (Program, Block, Assignment, Conditional, While, BinaryOp,
+                    UnaryOp, Number, Identifier, RelationalOp, LogicalOp,
+                    LogicalNot)
+from runtime import (TYPE_I32, TYPE_F64, wrap_i32, i32_div, i32_rem, f64_div,
+                     f64_rem, literal_value)
+from semantic import resolve
+
+# Condição dobrada: um nó ou um valor constante
+Condition = Union[RelationalOp, LogicalOp, LogicalNot, bool]
+
+_COMPARE = {
+    "==": lambda a, b: a == b,
+    "!=": lambda a, b: a != b,
+    "<": lambda a, b: a < b,
+    "<=": lambda a, b: a <= b,
+    ">": lambda a, b: a > b,
+    ">=": lambda a, b: a >= b,
+}
+
+
+def make_number(value: Any) -> Number:
+    """Nó Number para um valor calculado"""
+    return Number(value, repr(value))
+
+
+def can_fail(expr) -> bool:
+    """Verdadeiro se avaliar a expressão pode levantar erro (/ ou %)"""
+    if isinstance(expr, BinaryOp):
+        return (expr.operator in ("/", "%") or can_fail(expr.left)
+                or can_fail(expr.right))
+    if isinstance(expr, UnaryOp):
+        return can_fail(expr.operand)
+    if isinstance(expr, RelationalOp):
+        return can_fail(expr.left) or can_fail(expr.right)
+    if isinstance(expr, LogicalOp):
+        return can_fail(expr.left) or can_fail(expr.right)
+    if isinstance(expr, LogicalNot):
+        return can_fail(expr.operand)
+    return False
+
+
+def evaluate(operator: str, a: Any, b: Any) -> Optional[Any]:
+    """Resultado de a <op> b com a semântica da linguagem (None: não dobrar)"""
+    if isinstance(a, float) or isinstance(b, float):
+        if operator == "+":
+            r = a + b
+        elif operator == "-":
+            r = a - b
+        elif operator == "*":
+            r = a * b
+        elif operator == "/":
+            r = f64_div(a, b)
+        else:
+            r = f64_rem(a, b)
+        return float(r) if math.isfinite(r) else None
+    if operator in ("/", "%") and b == 0:
+        return None
+    if operator == "+":
+        return wrap_i32(a + b)
+    if operator == "-":
+        return wrap_i32(a - b)
+    if operator == "*":
+        return wrap_i32(a * b)
+    if operator == "/":
+        return i32_div(a, b)
+    return i32_rem(a, b)
+
+
+class ConstantFolder:
+    """Passada de dobramento de constantes e eliminação de código morto"""
+
+    def __init__(self) -> None:
+        self.stats: Dict[str, int] = {
+            "expressions_folded": 0,
+            "identities": 0,
+            "conditions_folded": 0,
+            "branches_pruned": 0,
+            "loops_removed": 0,
+        }
+
+    def optimize(self, program: Program) -> Program:
+        symbols = resolve(program)
+        block = self.fold_block(program.block)
+        return program if block is program.block else Program(block, symbols)
+
+    # -----------------------
+    # Comandos
+    # -----------------------
+
+    def fold_block(self, block: Block) -> Block:
+        commands: List[Any] = []
+        changed = False
+        for cmd in block.commands:
+            folded = self.fold_command(cmd)
+            if folded is not cmd:
+                changed = True
+            if folded is not None:
+                commands.append(folded)
+        return Block(commands) if changed else block
+
+    def fold_command(self, cmd):
+        """Comando simplificado, o próprio comando, ou None se removido"""
+        if isinstance(cmd, Block):
+            return self.fold_block(cmd)
+
+        if isinstance(cmd, Assignment):
+            expr = self.fold_expression(cmd.expression)
+            if expr is cmd.expression:
+                return cmd
+            return Assignment(cmd.identifier, expr, cmd.line, cmd.column,
+                              cmd.slot, cmd.type_name)
+
+        if isinstance(cmd, Conditional):
+            cond = self.fold_condition(cmd.condition)
+            then_block = self.fold_block(cmd.then_block)
+            else_block = (self.fold_block(cmd.else_block)
+                          if cmd.else_block is not None else None)
+            if isinstance(cond, bool):
+                self.stats["branches_pruned"] += 1
+                # O bloco escolhido continua sendo um bloco (mesmo escopo)
+                return then_block if cond else else_block
+            if (cond is cmd.condition and then_block is cmd.then_block
+                    and else_block is cmd.else_block):
+                return cmd
+            return Conditional(cond, then_block, else_block, cmd.line,
+                               cmd.column)
+
+        if isinstance(cmd, While):
+            cond = self.fold_condition(cmd.condition)
+            block = self.fold_block(cmd.block)
+            if cond is False:
+                self.stats["loops_removed"] += 1
+                return None
+            if cond is True:
+                # Laço infinito: a condição original é mantida
+                cond = cmd.condition
+            if cond is cmd.condition and block is cmd.block:
+                return cmd
+            return While(cond, block, cmd.line, cmd.column)
+
+        return cmd
+
+    # -----------------------
+    # Condições
+    # -----------------------
+
+    def fold_condition(self, cond) -> Condition:
+        if isinstance(cond, RelationalOp):
+            left = self.fold_expression(cond.left)
+            right = self.fold_expression(cond.right)
+            if isinstance(left, Number) and isinstance(right, Number):
+                self.stats["conditions_folded"] += 1
+                return _COMPARE[cond.operator](literal_value(left.value),
+                                               literal_value(right.value))
+            if left is cond.left and right is cond.right:
+                return cond
+            return RelationalOp(left, cond.operator, right)
+
+        if isinstance(cond, LogicalNot):
+            operand = self.fold_condition(cond.operand)
+            if isinstance(operand, bool):
+                self.stats["conditions_folded"] += 1
+                return not operand
+            return cond if operand is cond.operand else LogicalNot(operand)
+
+        if isinstance(cond, LogicalOp):
+            left = self.fold_condition(cond.left)
+            right = self.fold_condition(cond.right)
+            # Valor que decide o resultado: False para &&, True para ||
+            decisive = cond.operator == "||"
+            if isinstance(left, bool):
+                self.stats["conditions_folded"] += 1
+                # Com o lado esquerdo decisivo, o direito nem é avaliado
+                return left if left == decisive else right
+            if isinstance(right, bool):
+                if right != decisive:
+                    self.stats["conditions_folded"] += 1
+                    return left
+                if not can_fail(left):
+                    self.stats["conditions_folded"] += 1
+                    return right
+                # O lado esquerdo ainda precisa ser avaliado (pode falhar)
+                right = cond.right
+            if left is cond.left and right is cond.right:
+                return cond
+            return LogicalOp(left, cond.operator, right)
+
+        return cond
+
+    # -----------------------
+    # Expressões
+    # -----------------------
+
+    def fold_expression(self, expr):
+        return self.fold_typed(expr)[0]
+
+    def fold_typed(self, expr) -> Tuple[Any, str]:
+        """Expressão simplificada e o seu tipo"""
+        if isinstance(expr, Identifier):
+            return expr, expr.type_name
+
+        if isinstance(expr, Number):
+            value = literal_value(expr.value)
+            return expr, TYPE_F64 if isinstance(value, float) else TYPE_I32
+
+        if isinstance(expr, UnaryOp):
+            operand, type_name = self.fold_typed(expr.operand)
+            if isinstance(operand, Number):
+                value = literal_value(operand.value)
+                if expr.operator == "-":
+                    value = -value if isinstance(value, float) else wrap_i32(-value)
+                self.stats["expressions_folded"] += 1
+                return make_number(value), type_name
+            if operand is expr.operand:
+                return expr, type_name
+            return UnaryOp(expr.operator, operand), type_name
+
+        if isinstance(expr, BinaryOp):
+            return self.fold_binary(expr)
+
+        return expr, TYPE_I32
+
+    def fold_binary(self, expr: BinaryOp) -> Tuple[Any, str]:
+        left, left_type = self.fold_typed(expr.left)
+        right, right_type = self.fold_typed(expr.right)
+        op = expr.operator
+        type_name = (TYPE_F64 if TYPE_F64 in (left_type, right_type)
+                     else TYPE_I32)
+
+        if isinstance(left, Number) and isinstance(right, Number):
+            value = evaluate(op, literal_value(left.value),
+                             literal_value(right.value))
+            if value is not None:
+                self.stats["expressions_folded"] += 1
+                return make_number(value), type_name
+        elif type_name == TYPE_I32:
+            simplified = self.simplify_i32(left, op, right)
+            if simplified is not None:
+                self.stats["identities"] += 1
+                return simplified, type_name
+
+        if left is expr.left and right is expr.right:
+            return expr, type_name
+        return BinaryOp(left, op, right), type_name
+
+    def simplify_i32(self, left, op: str, right):
+        """Identidades algébricas de i32 (None se nenhuma se aplica)"""
+        lconst = literal_value(left.value) if isinstance(left, Number) else None
+        rconst = literal_value(right.value) if isinstance(right, Number) else None
+
+        if op == "+":
+            if rconst == 0:
+                return left
+            if lconst == 0:
+                return right
+        elif op == "-":
+            if rconst == 0:
+                return left
+        elif op == "*":
+            if rconst == 1:
+                return left
+            if lconst == 1:
+                return right
+            if rconst == 0 and not can_fail(left):
+                return make_number(0)
+            if lconst == 0 and not can_fail(right):
+                return make_number(0)
+        elif op == "/":
+            if rconst == 1:
+                return left
+
+        # Reagrupamento: (x + c1) + c2 -> x + (c1 + c2); idem para '*'
+        if (rconst is not None and isinstance(left, BinaryOp)
+                and isinstance(left.right, Number)
+                and isinstance(literal_value(left.right.value), int)):
+            inner = literal_value(left.right.value)
+            if op in ("+", "-") and left.operator in ("+", "-"):
+                total = ((inner if left.operator == "+" else -inner)
+                         + (rconst if op == "+" else -rconst))
+                return self._offset(left.left, wrap_i32(total))
+            if op == "*" and left.operator == "*":
+                return self._scaled(left.left, wrap_i32(inner * rconst))
+        return None
+
+    def _offset(self, base, total: int):
+        if total == 0:
+            return base
+        if total < 0 and total != -2 ** 31:
+            return BinaryOp(base, "-", make_number(-total))
+        return BinaryOp(base, "+", make_number(total))
+
+    def _scaled(self, base, factor: int):
+        if factor == 1:
+            return base
+        if factor == 0 and not can_fail(base):
+            return make_number(0)
+        return BinaryOp(base, "*", make_number(factor))
+
+
+def fold_constants(program: Program) -> Program:
+    """Aplica o dobramento de constantes e devolve a AST otimizada"""
+    return ConstantFolder().optimize(program)
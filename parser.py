@@ -10,9 +10,10 @@ Implementa um parser baseado na gramática fornecida:
 """
 
 from __future__ import annotations
-from dataclasses import dataclass
-from typing import Optional, List, Any
+from dataclasses import dataclass, field
+from typing import Optional, List, Any, Iterable
 from lexer import Token, TokenType, Lexer
+from token_buffer import TokenBuffer
 
 
 class ParserError(Exception):
@@ -22,6 +23,10 @@ class ParserError(Exception):
         self.token = token
         super().__init__(f"Erro sintático na linha {token.line}, coluna {token.column}: {message}")
 
+    def __reduce__(self):
+        # Permite serializar o erro (cache em disco, processos do modo lote)
+        return (ParserError, (self.message, self.token))
+
 
 # -----------------------
 # Nós da Árvore Sintática Abstrata (AST)
@@ -37,6 +42,8 @@ class ASTNode:
 class Program(ASTNode):
     """programa : 'fn' 'main' '(' ')' bloco"""
     block: Block
+    # Tabela de símbolos (List[semantic.Symbol]) preenchida pela análise semântica
+    symbols: Optional[List[Any]] = field(default=None, repr=False, compare=False)
 
 
 @dataclass
@@ -59,6 +66,8 @@ class Declaration(Command):
     type_name: str
     line: int
     column: int
+    # Anotação da análise semântica
+    slot: Optional[int] = field(default=None, repr=False, compare=False)
 
 
 @dataclass
@@ -68,6 +77,9 @@ class Assignment(Command):
     expression: ArithmeticExpression
     line: int
     column: int
+    # Anotações da análise semântica (variável de destino)
+    slot: Optional[int] = field(default=None, repr=False, compare=False)
+    type_name: Optional[str] = field(default=None, repr=False, compare=False)
 
 
 @dataclass
@@ -76,6 +88,9 @@ class Read(Command):
     identifier: str
     line: int
     column: int
+    # Anotações da análise semântica
+    slot: Optional[int] = field(default=None, repr=False, compare=False)
+    type_name: Optional[str] = field(default=None, repr=False, compare=False)
 
 
 @dataclass
@@ -85,6 +100,9 @@ class Print(Command):
     is_identifier: bool
     line: int
     column: int
+    # Anotações da análise semântica (apenas quando is_identifier)
+    slot: Optional[int] = field(default=None, repr=False, compare=False)
+    type_name: Optional[str] = field(default=None, repr=False, compare=False)
 
 
 @dataclass
@@ -138,6 +156,9 @@ class Number(ArithmeticExpression):
 class Identifier(ArithmeticExpression):
     """Identificador"""
     name: str
+    # Anotações da análise semântica
+    slot: Optional[int] = field(default=None, repr=False, compare=False)
+    type_name: Optional[str] = field(default=None, repr=False, compare=False)
 
 
 @dataclass
@@ -168,6 +189,78 @@ class LogicalNot(RelationalExpression):
     operand: RelationalExpression
 
 
+# -----------------------
+# Fluxo preguiçoso de tokens
+# -----------------------
+
+class TokenStream:
+    """
+    Janela deslizante sobre um iterador de tokens.
+
+    Os tokens são puxados do iterador apenas quando o parser os consulta e
+    descartados assim que ficam para trás: o parser nunca volta atrás.
+    """
+
+    # Quantidade mínima de tokens descartados de uma vez (amortiza o del)
+    TRIM_THRESHOLD = 64
+
+    def __init__(self, tokens: Iterable[Token]) -> None:
+        self._source = iter(tokens)
+        self._buffer: List[Token] = []
+        self._base = 0  # índice absoluto de _buffer[0]
+        self._last: Optional[Token] = None
+        self._done = False
+
+    def get(self, index: int) -> Token:
+        """Retorna o token de índice absoluto `index` (EOF além do fim)"""
+        offset = index - self._base
+        buffer = self._buffer
+        while offset >= len(buffer):
+            if self._done:
+                return self._last
+            tok = next(self._source, None)
+            if tok is None:
+                # Iterador esgotado sem EOF explícito: repete o último token
+                self._done = True
+                if self._last is None:
+                    raise IndexError("fluxo de tokens vazio")
+                return self._last
+            buffer.append(tok)
+            self._last = tok
+            if tok.type == TokenType.EOF:
+                self._done = True
+        return buffer[offset]
+
+    def release(self, index: int) -> None:
+        """Permite descartar os tokens anteriores a `index`"""
+        drop = index - self._base
+        if drop >= self.TRIM_THRESHOLD:
+            del self._buffer[:drop]
+            self._base = index
+
+
+# -----------------------
+# Precedência dos operadores binários
+# -----------------------
+
+# Força de ligação (maior liga mais forte): '&&' e '||' têm a mesma força
+LOGICAL_POWER = 1
+RELATIONAL_POWER = 2
+ADDITIVE_POWER = 3
+MULTIPLICATIVE_POWER = 4
+
+BINDING_POWER = {
+    TokenType.LOGICAL_AND: LOGICAL_POWER,
+    TokenType.LOGICAL_OR: LOGICAL_POWER,
+    TokenType.REL_OPERATOR: RELATIONAL_POWER,
+    TokenType.PLUS: ADDITIVE_POWER,
+    TokenType.MINUS: ADDITIVE_POWER,
+    TokenType.STAR: MULTIPLICATIVE_POWER,
+    TokenType.SLASH: MULTIPLICATIVE_POWER,
+    TokenType.PERCENT: MULTIPLICATIVE_POWER,
+}
+
+
 # -----------------------
 # Parser
 # -----------------------
@@ -180,9 +273,19 @@ class Parser:
     Cada não-terminal da gramática corresponde a um método parse_XXX.
     """
 
-    def __init__(self, tokens: List[Token]) -> None:
+    def __init__(self, tokens: Iterable[Token], streaming: bool = False) -> None:
         # Remove comentários da lista de tokens
-        self.tokens = [t for t in tokens if t.type not in (TokenType.LINE_COMMENT, TokenType.BLOCK_COMMENT)]
+        comments = (TokenType.LINE_COMMENT, TokenType.BLOCK_COMMENT)
+        self._stream: Optional[TokenStream] = None
+        if streaming:
+            # Modo preguiçoso: tokens consumidos sob demanda do iterador
+            self.tokens: List[Token] = []
+            self._stream = TokenStream(t for t in tokens if t.type not in comments)
+        elif isinstance(tokens, TokenBuffer):
+            # Buffer compacto: indexado diretamente, sem copiar em Tokens
+            self.tokens = tokens.without_comments()
+        else:
+            self.tokens = [t for t in tokens if t.type not in comments]
         self.current = 0
         self.errors: List[ParserError] = []
 
@@ -196,18 +299,24 @@ class Parser:
 
     def peek(self) -> Token:
         """Retorna o token atual sem avançar"""
+        if self._stream is not None:
+            return self._stream.get(self.current)
         if self.current < len(self.tokens):
             return self.tokens[self.current]
         return self.tokens[-1]  # EOF
 
     def previous(self) -> Token:
         """Retorna o token anterior"""
+        if self._stream is not None:
+            return self._stream.get(self.current - 1)
         return self.tokens[self.current - 1]
 
     def advance(self) -> Token:
         """Avança para o próximo token e retorna o anterior"""
         if not self.is_at_end():
             self.current += 1
+            if self._stream is not None:
+                self._stream.release(self.current - 1)
         return self.previous()
 
     def check(self, *token_types: TokenType) -> bool:
@@ -451,69 +560,179 @@ class Parser:
 
         return While(condition, block, while_token.line, while_token.column)
 
-    def parse_arithmetic_expression(self) -> ArithmeticExpression:
-        """
-        expressaoAritmetica :
-            expressaoAritmetica '+' termo |
-            expressaoAritmetica '-' termo |
-            termo
+    # -----------------------
+    # Expressões (precedence climbing)
+    # -----------------------
 
-        Implementado com eliminação de recursão à esquerda:
-        expressaoAritmetica : termo (('+' | '-') termo)*
+    def parse_expression(self, min_power: int = LOGICAL_POWER, left=None):
         """
-        expr = self.parse_term()
-
-        while self.match(TokenType.PLUS, TokenType.MINUS):
-            operator = self.previous().lexeme
-            right = self.parse_term()
-            expr = BinaryOp(expr, operator, right)
-
-        return expr
-
-    def parse_term(self) -> ArithmeticExpression:
+        Expressão cujos operadores binários ligam com força >= min_power
+        (tabela BINDING_POWER). Operadores de mesma força associam à
+        esquerda: o operando direito é lido com a força do operador + 1.
+        Com `left`, continua uma expressão cujo início já foi lido.
+
+        Com min_power <= RELATIONAL_POWER a expressão é uma condição:
+            expressaoRelacional : termoRelacional (operadorLogico termoRelacional)*
+            termoRelacional :
+                expressaoAritmetica OP_REL expressaoAritmetica |
+                '(' expressaoRelacional ')' |
+                '!' termoRelacional
+        Um operador relacional só aparece entre duas expressões aritméticas
+        e um lógico só entre duas relacionais; uma condição que termina em
+        expressão aritmética é um erro.
         """
-        termo :
-            termo '*' fator |
-            termo '/' fator |
-            fator
-
-        Implementado com eliminação de recursão à esquerda:
-        termo : fator (('*' | '/' | '%') fator)*
-        """
-        expr = self.parse_factor()
-
-        while self.match(TokenType.STAR, TokenType.SLASH, TokenType.PERCENT):
-            operator = self.previous().lexeme
-            right = self.parse_factor()
-            expr = BinaryOp(expr, operator, right)
-
-        return expr
-
-    def parse_factor(self) -> ArithmeticExpression:
+        condition = min_power <= RELATIONAL_POWER
+        if left is None:
+            left = self.parse_prefix(condition)
+        # Termos relacionais ('!' ou parênteses) não continuam com '+', '*'...
+        arithmetic = not (condition and isinstance(left, RelationalExpression))
+
+        while True:
+            token = self.peek()
+            power = BINDING_POWER.get(token.type)
+            if power is None or power < min_power:
+                break
+
+            if power > RELATIONAL_POWER:
+                # expressaoAritmetica : termo (('+' | '-') termo)*
+                # termo : fator (('*' | '/' | '%') fator)*
+                if not arithmetic:
+                    break
+                self.advance()
+                left = BinaryOp(left, token.lexeme,
+                                self.parse_expression(power + 1))
+            elif arithmetic:
+                # expressaoAritmetica OP_REL expressaoAritmetica
+                if power == LOGICAL_POWER:
+                    break
+                self.advance()
+                left = RelationalOp(left, token.lexeme,
+                                    self.parse_expression(ADDITIVE_POWER))
+                arithmetic = False
+            else:
+                # operadorLogico: && | ||
+                if power == RELATIONAL_POWER:
+                    break
+                self.advance()
+                left = LogicalOp(left, token.lexeme,
+                                 self.parse_expression(RELATIONAL_POWER))
+
+        if condition and arithmetic:
+            raise ParserError("Esperado operador relacional", self.peek())
+        return left
+
+    def parse_prefix(self, condition: bool):
         """
         fator :
             NUMINT |
             NUMREAL |
             ID |
             '(' expressaoAritmetica ')'
+
+        Em condições, também '!' termoRelacional e os parênteses de
+        parse_parenthesized_condition.
         """
+        token = self.peek()
+        kind = token.type
+
         # Número
-        if self.match(TokenType.NUMBER):
-            token = self.previous()
+        if kind == TokenType.NUMBER:
+            self.advance()
             return Number(token.literal, token.lexeme)
 
         # Identificador
-        if self.match(TokenType.IDENTIFIER):
-            token = self.previous()
+        if kind == TokenType.IDENTIFIER:
+            self.advance()
             return Identifier(token.lexeme)
 
-        # Expressão entre parênteses
-        if self.match(TokenType.LPAREN):
-            expr = self.parse_arithmetic_expression()
+        if kind == TokenType.LPAREN:
+            if condition:
+                return self.parse_parenthesized_condition()
+            # Expressão entre parênteses
+            self.advance()
+            expr = self.parse_expression(ADDITIVE_POWER)
             self.consume(TokenType.RPAREN, "Esperado ')' após expressão")
             return expr
 
-        raise ParserError("Esperado número, identificador ou '('", self.peek())
+        # Negação lógica: '!'
+        if kind == TokenType.EXCLAMATION and condition:
+            self.advance()
+            return LogicalNot(self.parse_expression(RELATIONAL_POWER))
+
+        raise ParserError("Esperado número, identificador ou '('", token)
+
+    def parse_parenthesized_condition(self) -> RelationalExpression:
+        """
+        termoRelacional que começa com '(': pode ser relacional ou aritmética
+            '(' expressaoAritmetica ')' OP_REL expressaoAritmetica |
+            '(' expressaoRelacional ')'
+
+        Lê primeiro a expressão aritmética após o '('. Se ela termina em
+        ')', é a primeira forma. Senão o grupo é uma expressão relacional
+        cujo primeiro termo começa com essa mesma expressão aritmética, e a
+        leitura continua dali, sem voltar ao '(': cada token é lido uma
+        única vez.
+        """
+        self.advance()  # consome '('
+
+        # Um '(' logo em seguida agrupa uma expressão aritmética; se o grupo
+        # externo for relacional, esse '(' abre o primeiro termo, que então
+        # só pode ser '(' expressaoAritmetica ')' OP_REL expressaoAritmetica
+        after_group = None
+        if self.check(TokenType.LPAREN):
+            left = self.parse_prefix(False)
+            after_group, group_end = self.peek(), self.current
+            left = self.parse_expression(ADDITIVE_POWER, left)
+        else:
+            left = self.parse_expression(ADDITIVE_POWER)
+
+        # Se após a expressão aritmética temos ')', é uma expressão aritmética entre parênteses
+        # Mas ainda precisamos de um operador relacional depois
+        if self.check(TokenType.RPAREN):
+            self.advance()  # consome ')'
+
+            # Verifica se há operador relacional após os parênteses
+            if self.check(TokenType.REL_OPERATOR):
+                operator = self.advance().lexeme
+                right = self.parse_expression(ADDITIVE_POWER)
+                return RelationalOp(left, operator, right)
+            else:
+                # Sem operador relacional, erro
+                raise ParserError("Esperado operador relacional", self.peek())
+
+        # Expressão relacional entre parênteses: completa o primeiro termo
+        if after_group is not None and after_group.type != TokenType.REL_OPERATOR:
+            raise self.group_error(after_group, group_end)
+        if not self.check(TokenType.REL_OPERATOR):
+            raise ParserError("Esperado operador relacional", self.peek())
+        operator = self.advance().lexeme
+        term = RelationalOp(left, operator, self.parse_expression(ADDITIVE_POWER))
+        expr = self.parse_expression(LOGICAL_POWER, term)
+        self.consume(TokenType.RPAREN, "Esperado ')' após expressão relacional")
+        return expr
+
+    def group_error(self, after_group: Token, group_end: int) -> ParserError:
+        """
+        Erro de um grupo relacional cujo primeiro termo '(' ... ')' não é
+        seguido de OP_REL (`after_group`, na posição `group_end`).
+
+        O parser com retrocesso parava em `after_group`; aqui o restante da
+        expressão aritmética já foi lido. Tokens aritméticos nunca são
+        pontos de sincronização, então recuar para o último deles faz
+        synchronize() retomar no mesmo token que antes.
+        """
+        if self.current > group_end:
+            self.current -= 1
+        return ParserError("Esperado operador relacional", after_group)
+
+    def parse_arithmetic_expression(self) -> ArithmeticExpression:
+        """
+        expressaoAritmetica :
+            expressaoAritmetica '+' termo |
+            expressaoAritmetica '-' termo |
+            termo
+        """
+        return self.parse_expression(ADDITIVE_POWER)
 
     def parse_relational_expression(self) -> RelationalExpression:
         """
@@ -521,24 +740,8 @@ class Parser:
             expressaoAritmetica OP_REL expressaoAritmetica |
             '(' expressaoRelacional ')' |
             expressaoRelacional operadorLogico termoRelacional
-
-        Para evitar ambiguidade e recursão à esquerda, implementamos:
-        expressaoRelacional : termoRelacional (operadorLogico termoRelacional)*
-
-        termoRelacional :
-            expressaoAritmetica OP_REL expressaoAritmetica |
-            '(' expressaoRelacional ')' |
-            '!' termoRelacional
         """
-        expr = self.parse_relational_term()
-
-        # operadorLogico: && | ||
-        while self.match(TokenType.LOGICAL_AND, TokenType.LOGICAL_OR):
-            operator = self.previous().lexeme
-            right = self.parse_relational_term()
-            expr = LogicalOp(expr, operator, right)
-
-        return expr
+        return self.parse_expression(LOGICAL_POWER)
 
     def parse_relational_term(self) -> RelationalExpression:
         """
@@ -547,51 +750,7 @@ class Parser:
             '(' expressaoRelacional ')' |
             '!' termoRelacional
         """
-        # Negação lógica: '!'
-        if self.match(TokenType.EXCLAMATION):
-            operand = self.parse_relational_term()
-            return LogicalNot(operand)
-
-        # Expressão entre parênteses - pode ser relacional ou aritmética
-        if self.check(TokenType.LPAREN):
-            # Salva posição atual para potencial backtracking
-            saved_pos = self.current
-            self.advance()  # consome '('
-
-            # Tenta parsear como expressão aritmética primeiro
-            left = self.parse_arithmetic_expression()
-
-            # Se após a expressão aritmética temos ')', é uma expressão aritmética entre parênteses
-            # Mas ainda precisamos de um operador relacional depois
-            if self.check(TokenType.RPAREN):
-                self.advance()  # consome ')'
-
-                # Verifica se há operador relacional após os parênteses
-                if self.check(TokenType.REL_OPERATOR):
-                    operator = self.advance().lexeme
-                    right = self.parse_arithmetic_expression()
-                    return RelationalOp(left, operator, right)
-                else:
-                    # Sem operador relacional, erro
-                    raise ParserError("Esperado operador relacional", self.peek())
-
-            # Se não tem ')', pode ser uma expressão relacional complexa dentro dos parênteses
-            # Restaura posição e tenta parsear como expressão relacional
-            self.current = saved_pos
-            self.advance()  # consome '(' novamente
-            expr = self.parse_relational_expression()
-            self.consume(TokenType.RPAREN, "Esperado ')' após expressão relacional")
-            return expr
-
-        # expressaoAritmetica OP_REL expressaoAritmetica
-        left = self.parse_arithmetic_expression()
-
-        if self.match(TokenType.REL_OPERATOR):
-            operator = self.previous().lexeme
-            right = self.parse_arithmetic_expression()
-            return RelationalOp(left, operator, right)
-
-        raise ParserError("Esperado operador relacional", self.peek())
+        return self.parse_expression(RELATIONAL_POWER)
 
     # -----------------------
     # Métodos auxiliares
@@ -0,0 +1,233 @@
+# profiling.py
+"""
+Medição de desempenho por fase da compilação (--profile)
+
+Profile registra, para cada fase (leitura, léxico, sintático, semântico,
+otimização, execução...), o tempo de relógio e o tempo de CPU do processo,
+além das medidas da entrada: bytes, linhas, tokens e, da AST, o número de
+nós por tipo, a profundidade máxima da árvore e o aninhamento máximo de
+blocos. to_dict() devolve tudo em uma estrutura pronta para JSON, com as
+vazões (bytes/s e tokens/s) das fases léxica e sintática.
+
+cprofile_hook() é o gancho opcional para encontrar pontos quentes: durante
+uma execução, envolve Lexer.tokenize, Lexer.iter_tokens e Parser.parse (ou
+StackParser.parse) com um cProfile.Profile (ligado só enquanto esses
+métodos rodam; no gerador de tokens, o consumidor fica de fora entre um
+token e outro) e grava um arquivo .pstats ao final.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import dataclasses
+import functools
+import json
+import os
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Any, Dict, Iterator, List, Optional
+
+from lexer import Lexer
+from parser import Parser, Block
+from stack_parser import StackParser
+
+
+class Profile:
+    """Tempos por fase e medidas de uma execução"""
+
+    def __init__(self, source: str = "") -> None:
+        self.source = source
+        self.phases: List[Dict[str, Any]] = []
+        self.metrics: Dict[str, Any] = {}
+        self.ast: Optional[Dict[str, Any]] = None
+        self.status: Optional[str] = None
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            self.phases.append({
+                "name": name,
+                "wall": time.perf_counter() - wall,
+                "cpu": time.process_time() - cpu,
+            })
+
+    def measure_text(self, text: str) -> None:
+        self.metrics["bytes"] = len(text.encode("utf-8", "surrogatepass"))
+        self.metrics["lines"] = (text.count("\n")
+                                 + (1 if text and text[-1] != "\n" else 0))
+
+    def measure_ast(self, ast) -> None:
+        self.ast = ast_stats(ast)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data: Dict[str, Any] = {"source": self.source, "status": self.status}
+        data.update(self.metrics)
+        phases = []
+        for entry in self.phases:
+            entry = dict(entry)
+            wall = entry["wall"]
+            if wall > 0 and entry["name"] in ("lexico", "lexico+sintatico"):
+                if "bytes" in self.metrics:
+                    entry["bytes_per_second"] = self.metrics["bytes"] / wall
+            if (wall > 0 and "tokens" in self.metrics
+                    and entry["name"] in ("lexico", "sintatico",
+                                          "lexico+sintatico")):
+                entry["tokens_per_second"] = self.metrics["tokens"] / wall
+            phases.append(entry)
+        data["phases"] = phases
+        data["total"] = {
+            "wall": sum(entry["wall"] for entry in self.phases),
+            "cpu": sum(entry["cpu"] for entry in self.phases),
+        }
+        if self.ast is not None:
+            data["ast"] = self.ast
+        return data
+
+    def to_json(self, indent: Optional[int] = 2) -> str:
+        return json.dumps(self.to_dict(), indent=indent, ensure_ascii=False)
+
+
+def phase(profile: Optional[Profile], name: str):
+    """Contexto que mede a fase, ou que não faz nada sem perfil"""
+    return profile.phase(name) if profile is not None else nullcontext()
+
+
+def ast_stats(ast) -> Dict[str, Any]:
+    """
+    Número de nós (total e por tipo), profundidade máxima da árvore e
+    aninhamento máximo de blocos (if/while/bloco dentro de bloco), com
+    percurso iterativo: a AST pode ser mais profunda que o limite de
+    recursão do Python.
+    """
+    counts: Dict[str, int] = {}
+    # Campos filhos de cada tipo de nó (sem as anotações da análise)
+    fields: Dict[type, List[str]] = {}
+    max_depth = 0
+    max_nesting = 0
+    stack = [(ast, 1, 0)]
+    while stack:
+        node, depth, nesting = stack.pop()
+        # __class__ em vez de type(): vale também para as visões da AstArena
+        kind = node.__class__
+        name = kind.__name__
+        counts[name] = counts.get(name, 0) + 1
+        max_depth = max(max_depth, depth)
+        if isinstance(node, Block):
+            nesting += 1
+            max_nesting = max(max_nesting, nesting)
+        names = fields.get(kind)
+        if names is None:
+            names = fields[kind] = [f.name for f in
+                                          dataclasses.fields(node) if f.repr]
+        for field_name in names:
+            value = getattr(node, field_name)
+            for child in (value if isinstance(value, list) else (value,)):
+                if dataclasses.is_dataclass(child):
+                    stack.append((child, depth + 1, nesting))
+    return {
+        "nodes": sum(counts.values()),
+        "max_depth": max_depth,
+        "max_nesting": max_nesting,
+        "node_types": dict(sorted(counts.items())),
+    }
+
+
+def write_profile(profile: Profile, path: Optional[str]) -> None:
+    """Imprime o JSON do perfil ou acrescenta uma linha a um arquivo JSONL"""
+    if path is None:
+        print("\n" + "=" * 60)
+        print("PERFIL DE EXECUCAO")
+        print("=" * 60)
+        print(profile.to_json())
+        return
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(profile.to_json(indent=None) + "\n")
+
+
+# -----------------------
+# Gancho do cProfile
+# -----------------------
+
+# Métodos do front-end medidos pelo gancho
+HOOKED = [(Lexer, "tokenize"), (Lexer, "iter_tokens"), (Parser, "parse"),
+          (StackParser, "parse")]
+
+
+class _Hook:
+    """Liga o profiler na entrada do método mais externo e desliga na saída"""
+
+    def __init__(self, profiler: cProfile.Profile) -> None:
+        self.profiler = profiler
+        self.depth = 0
+
+    def enter(self) -> None:
+        self.depth += 1
+        if self.depth == 1:
+            self.profiler.enable()
+
+    def leave(self) -> None:
+        self.depth -= 1
+        if self.depth == 0:
+            self.profiler.disable()
+
+    def wrap(self, method):
+        if method.__name__ == "iter_tokens":
+            @functools.wraps(method)
+            def generator(*args, **kwargs):
+                # Entre um token e outro o consumidor roda fora do profiler
+                self.enter()
+                try:
+                    tokens = method(*args, **kwargs)
+                    while True:
+                        try:
+                            tok = next(tokens)
+                        except StopIteration:
+                            return
+                        self.leave()
+                        try:
+                            yield tok
+                        finally:
+                            self.enter()
+                finally:
+                    self.leave()
+            return generator
+
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            self.enter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.leave()
+        return wrapper
+
+
+def pstats_path(directory: str, source: str) -> str:
+    """Arquivo .pstats de uma entrada (o caminho vira parte do nome)"""
+    name = source.replace(os.sep, "_").replace(":", "_").lstrip("._") or "stdin"
+    return os.path.join(directory, f"{name}.pstats")
+
+
+@contextmanager
+def cprofile_hook(path: Optional[str]) -> Iterator[None]:
+    """Mede o léxico e o sintático com cProfile e grava as estatísticas
+    em path (sem path, não faz nada)"""
+    if path is None:
+        yield
+        return
+    hook = _Hook(cProfile.Profile())
+    originals = [(cls, name, getattr(cls, name)) for cls, name in HOOKED]
+    for cls, name, method in originals:
+        setattr(cls, name, hook.wrap(method))
+    try:
+        yield
+    finally:
+        for cls, name, method in originals:
+            setattr(cls, name, method)
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        hook.profiler.dump_stats(path)
@@ -0,0 +1,323 @@
+# pygen.py
+"""
+Back-end de execução por tradução para Python
+
+Gera um módulo Python equivalente ao programa e o executa com compile() e
+exec(), de modo que o trabalho pesado fica com o próprio interpretador
+CPython:
+- cada variável vira uma variável local de uma função (acesso rápido);
+- While e Conditional viram while/if nativos, && || ! viram and/or/not;
+- read(x) e print! usam o leitor e o escritor bufferizados de runtime.py.
+
+A semântica de i32 é preservada: somas, subtrações e multiplicações são
+feitas com inteiros exatos e reduzidas a 32 bits uma única vez, antes de
+cada uso que depende do valor (armazenamento, comparação, divisão); '/' e
+'%' usam as funções da linguagem, não os operadores de Python.
+
+O código compilado é guardado em memória e, se houver cache em disco, sob
+o hash do módulo gerado. Programas que excedem limites do compilador do
+Python (aninhamento muito profundo) são executados pelo back-end de
+closures.
+"""
+
+from __future__ import annotations
+
+import marshal
+import math
+from typing import Any, Callable, Dict, List, Optional, TextIO, Tuple
+
+import closures
+from cache import CompileCache
+from parser import (Program, Block, Declaration, Assignment, Read, Print,
+                    Conditional, While, BinaryOp, UnaryOp, Number, Identifier,
+                    RelationalOp, LogicalOp, LogicalNot)
+from runtime import (CompileError, ExecutionError, InputReader, OutputWriter,
+                     TYPE_I32, TYPE_F64, i32_div, i32_rem, f64_div, f64_rem,
+                     to_i32, literal_value, format_value, unescape_string)
+from semantic import resolve
+
+FILENAME = "<programa>"
+
+# Nomes disponíveis para o módulo gerado
+_NAMESPACE = {
+    "_idiv": i32_div,
+    "_irem": i32_rem,
+    "_fdiv": f64_div,
+    "_frem": f64_rem,
+    "_to_i32": to_i32,
+    "_fmt": format_value,
+    "_INF": math.inf,
+}
+
+# Tradução de um operando: (código, tipo, já reduzido a 32 bits)
+Operand = Tuple[str, str, bool]
+
+
+def _wrap(code: str) -> str:
+    return f"((({code}) + 2147483648 & 4294967295) - 2147483648)"
+
+
+def _literal(value: Any) -> str:
+    if isinstance(value, float) and math.isinf(value):
+        return "_INF" if value > 0 else "(-_INF)"
+    text = repr(value)
+    return f"({text})" if text.startswith("-") else text
+
+
+class PythonGenerator:
+    """Traduz a AST em código-fonte Python"""
+
+    INDENT = "    "
+
+    def __init__(self) -> None:
+        self.names: List[str] = []
+        self.out: List[str] = []
+        self.lines: List[int] = []   # linha de origem de cada linha gerada
+        self.depth = 1
+        self.line = 0
+        self.column = 0
+
+    def generate(self, program: Program) -> str:
+        self.names = [symbol.name for symbol in resolve(program)]
+        self.out.append("def main(_in, _out):")
+        self.lines.append(0)
+        for text in ("_ri = _in.read_i32", "_rf = _in.read_f64",
+                     "_w = _out.write_line"):
+            self.emit(text)
+        self.emit_block(program.block)
+        return "\n".join(self.out) + "\n"
+
+    def emit(self, text: str) -> None:
+        self.out.append(self.INDENT * self.depth + text)
+        self.lines.append(self.line)
+
+    def variable(self, slot: int) -> str:
+        return f"{self.names[slot]}_{slot}"
+
+    # -----------------------
+    # Comandos
+    # -----------------------
+
+    def emit_block(self, block: Block) -> None:
+        start = len(self.out)
+        for cmd in block.commands:
+            self.emit_command(cmd)
+        if len(self.out) == start:
+            self.emit("pass")
+
+    def emit_nested(self, block: Block) -> None:
+        self.depth += 1
+        self.emit_block(block)
+        self.depth -= 1
+
+    def emit_command(self, cmd) -> None:
+        if isinstance(cmd, Block):
+            self.emit_block(cmd)
+            return
+        self.line, self.column = cmd.line, cmd.column
+
+        if isinstance(cmd, Declaration):
+            zero = "0.0" if cmd.type_name == TYPE_F64 else "0"
+            self.emit(f"{self.variable(cmd.slot)} = {zero}")
+
+        elif isinstance(cmd, Assignment):
+            value = self.store_value(self.expression(cmd.expression),
+                                     cmd.type_name)
+            self.emit(f"{self.variable(cmd.slot)} = {value}")
+
+        elif isinstance(cmd, Read):
+            reader = "_rf" if cmd.type_name == TYPE_F64 else "_ri"
+            self.emit(f"{self.variable(cmd.slot)} = {reader}()")
+
+        elif isinstance(cmd, Print):
+            if cmd.is_identifier:
+                name = self.variable(cmd.slot)
+                if cmd.type_name == TYPE_F64:
+                    self.emit(f"_w(_fmt({name}))")
+                else:
+                    self.emit(f"_w(str({name}))")
+            else:
+                self.emit(f"_w({unescape_string(cmd.value)!r})")
+
+        elif isinstance(cmd, Conditional):
+            self.emit(f"if {self.condition(cmd.condition)}:")
+            self.emit_nested(cmd.then_block)
+            if cmd.else_block is not None:
+                self.line = cmd.line
+                self.emit("else:")
+                self.emit_nested(cmd.else_block)
+
+        elif isinstance(cmd, While):
+            self.emit(f"while {self.condition(cmd.condition)}:")
+            self.emit_nested(cmd.block)
+
+        else:
+            raise CompileError(f"Comando não suportado: {type(cmd).__name__}",
+                               self.line, self.column)
+
+    def store_value(self, operand: Operand, target: str) -> str:
+        code, type_name, exact = operand
+        if target == TYPE_F64:
+            if type_name == TYPE_F64:
+                return code
+            return f"float({code if exact else _wrap(code)})"
+        if type_name == TYPE_F64:
+            return f"_to_i32({code})"
+        return code if exact else _wrap(code)
+
+    # -----------------------
+    # Condições
+    # -----------------------
+
+    def condition(self, cond) -> str:
+        if isinstance(cond, RelationalOp):
+            left = self.value(self.expression(cond.left))
+            right = self.value(self.expression(cond.right))
+            return f"({left} {cond.operator} {right})"
+        if isinstance(cond, LogicalOp):
+            op = "and" if cond.operator == "&&" else "or"
+            return (f"({self.condition(cond.left)} {op} "
+                    f"{self.condition(cond.right)})")
+        if isinstance(cond, LogicalNot):
+            return f"(not {self.condition(cond.operand)})"
+        raise CompileError(f"Condição não suportada: {type(cond).__name__}",
+                           self.line, self.column)
+
+    # -----------------------
+    # Expressões
+    # -----------------------
+
+    @staticmethod
+    def value(operand: Operand) -> str:
+        """Código do valor exato do operando (i32 reduzido a 32 bits)"""
+        code, type_name, exact = operand
+        return code if exact or type_name == TYPE_F64 else _wrap(code)
+
+    def expression(self, expr) -> Operand:
+        if isinstance(expr, Identifier):
+            return self.variable(expr.slot), expr.type_name, True
+
+        if isinstance(expr, Number):
+            value = literal_value(expr.value)
+            type_name = TYPE_F64 if isinstance(value, float) else TYPE_I32
+            return _literal(value), type_name, True
+
+        if isinstance(expr, UnaryOp):
+            code, type_name, exact = self.expression(expr.operand)
+            if expr.operator != "-":
+                return code, type_name, exact
+            return f"(-{code})", type_name, type_name == TYPE_F64
+
+        if isinstance(expr, BinaryOp):
+            return self.binary(expr)
+
+        raise CompileError(f"Expressão não suportada: {type(expr).__name__}",
+                           self.line, self.column)
+
+    def binary(self, expr: BinaryOp) -> Operand:
+        left = self.expression(expr.left)
+        right = self.expression(expr.right)
+        op = expr.operator
+
+        if TYPE_F64 in (left[1], right[1]):
+            a, b = self.value(left), self.value(right)
+            if op == "/":
+                if isinstance(expr.right, Number) and expr.right.value != 0:
+                    return f"({a} / {b})", TYPE_F64, True
+                return f"_fdiv({a}, {b})", TYPE_F64, True
+            if op == "%":
+                return f"_frem({a}, {b})", TYPE_F64, True
+            return f"({a} {op} {b})", TYPE_F64, True
+
+        if op in ("+", "-", "*"):
+            # Inteiros exatos: a redução a 32 bits fica para o uso do valor
+            return f"({left[0]} {op} {right[0]})", TYPE_I32, False
+
+        a, b = self.value(left), self.value(right)
+        helper = "_idiv" if op == "/" else "_irem"
+        python_op = "//" if op == "/" else "%"
+        simple = (isinstance(expr.left, (Identifier, Number))
+                  and isinstance(expr.right, (Identifier, Number)))
+        if simple and isinstance(expr.right, Number) and literal_value(
+                expr.right.value) > 0:
+            # Caso comum (n % 3, n / 2): operador nativo quando n >= 0
+            return (f"({a} {python_op} {b} if {a} >= 0 else {helper}({a}, {b}))",
+                    TYPE_I32, True)
+        if simple:
+            return (f"({a} {python_op} {b} if {a} >= 0 and {b} > 0 "
+                    f"else {helper}({a}, {b}))", TYPE_I32, True)
+        return f"{helper}({a}, {b})", TYPE_I32, True
+
+
+def generate(program: Program) -> Tuple[str, List[int]]:
+    """Código-fonte Python do programa e a linha de origem de cada linha"""
+    gen = PythonGenerator()
+    source = gen.generate(program)
+    return source, gen.lines
+
+
+# -----------------------
+# Compilação e execução
+# -----------------------
+
+_compiled: Dict[str, Any] = {}
+
+
+def compile_source(source: str, cache: Optional[CompileCache] = None):
+    """Objeto de código do módulo gerado (memória, depois disco, depois compile)"""
+    key = cache.key(source) if cache is not None else source
+    code = _compiled.get(key)
+    if code is not None:
+        return code
+    if cache is not None:
+        data = cache.load(key, "pycode")
+        if data is not None:
+            code = marshal.loads(data)
+    if code is None:
+        code = compile(source, FILENAME, "exec")
+        if cache is not None:
+            cache.store(key, "pycode", marshal.dumps(code))
+    _compiled[key] = code
+    return code
+
+
+class PythonProgram:
+    """Programa traduzido para Python, executável várias vezes"""
+
+    def __init__(self, source: str, lines: List[int], code) -> None:
+        self.source = source
+        self.lines = lines
+        namespace = dict(_NAMESPACE)
+        exec(code, namespace)
+        self._main = namespace["main"]
+
+    def run(self, stdin: TextIO, stdout: TextIO) -> None:
+        output = OutputWriter(stdout)
+        try:
+            self._main(InputReader(stdin), output)
+        except ExecutionError as e:
+            if not e.line:
+                e.line = self._source_line(e.__traceback__)
+            raise
+        finally:
+            output.flush()
+
+    def _source_line(self, tb) -> int:
+        line = 0
+        while tb is not None:
+            if tb.tb_frame.f_code.co_filename == FILENAME:
+                line = self.lines[tb.tb_lineno - 1]
+            tb = tb.tb_next
+        return line
+
+
+def load(program: Program, cache: Optional[CompileCache] = None
+         ) -> Callable[[TextIO, TextIO], None]:
+    """Traduz e compila o programa e devolve uma função run(stdin, stdout)"""
+    source, lines = generate(program)
+    try:
+        code = compile_source(source, cache)
+    except (SyntaxError, RecursionError, MemoryError):
+        # Aninhamento além dos limites do compilador do Python
+        return closures.load(program)
+    return PythonProgram(source, lines, code).run
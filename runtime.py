@@ -0,0 +1,251 @@
+# runtime.py
+"""
+Semântica de execução da linguagem
+
+Regras compartilhadas por todos os back-ends de execução:
+
+- i32: inteiro de 32 bits com sinal; +, - e * dão a volta (complemento de
+  dois). '/' trunca em direção a zero e '%' tem o sinal do dividendo (como
+  em Rust e C), e ambos falham com divisão por zero.
+- f64: ponto flutuante IEEE 754; divisão por zero resulta em inf/NaN e '%'
+  segue fmod.
+- Operações com um operando f64 são feitas em f64. Atribuir f64 a uma
+  variável i32 trunca em direção a zero, saturando nos limites (NaN vira 0).
+- read(x) lê o próximo valor separado por espaços da entrada; print!(x)
+  escreve o valor seguido de quebra de linha. f64 é escrito com até 15
+  dígitos significativos ('%.15g'), inf/-inf/NaN por extenso.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Any, List, Optional, TextIO
+
+I32_MIN = -2 ** 31
+I32_MAX = 2 ** 31 - 1
+
+TYPE_I32 = "i32"
+TYPE_F64 = "f64"
+
+
+class CompileError(Exception):
+    """Erro detectado ao preparar o programa para execução"""
+
+    def __init__(self, message: str, line: int = 0, column: int = 0):
+        self.message = message
+        self.line = line
+        self.column = column
+        super().__init__(message)
+
+    def __str__(self) -> str:
+        return f"Erro de compilação na linha {self.line}, coluna {self.column}: {self.message}"
+
+    def __reduce__(self):
+        return (CompileError, (self.message, self.line, self.column))
+
+
+class ExecutionError(Exception):
+    """Erro durante a execução do programa"""
+
+    def __init__(self, message: str, line: int = 0):
+        self.message = message
+        self.line = line
+        super().__init__(message)
+
+    def __str__(self) -> str:
+        if self.line:
+            return f"Erro de execução na linha {self.line}: {self.message}"
+        return f"Erro de execução: {self.message}"
+
+    def __reduce__(self):
+        return (ExecutionError, (self.message, self.line))
+
+
+# -----------------------
+# Aritmética
+# -----------------------
+
+def wrap_i32(value: int) -> int:
+    """Reduz um inteiro ao intervalo de i32 (complemento de dois)"""
+    return ((value + 0x80000000) & 0xFFFFFFFF) - 0x80000000
+
+
+def i32_div(a: int, b: int) -> int:
+    if b == 0:
+        raise ExecutionError("divisão inteira por zero")
+    q = abs(a) // abs(b)
+    if (a < 0) != (b < 0):
+        q = -q
+    return wrap_i32(q)
+
+
+def i32_rem(a: int, b: int) -> int:
+    if b == 0:
+        raise ExecutionError("resto de divisão inteira por zero")
+    r = abs(a) % abs(b)
+    return -r if a < 0 else r
+
+
+def f64_div(a: float, b: float) -> float:
+    try:
+        return a / b
+    except ZeroDivisionError:
+        if a == 0 or a != a:
+            return math.nan
+        return math.copysign(math.inf, a) * math.copysign(1.0, b)
+
+
+def f64_rem(a: float, b: float) -> float:
+    if b == 0 or math.isinf(a):
+        return math.nan
+    return math.fmod(a, b)
+
+
+def to_i32(value: Any) -> int:
+    """Converte para i32 truncando em direção a zero (com saturação)"""
+    if isinstance(value, int):
+        return value
+    if value != value:
+        return 0
+    if value >= I32_MAX:
+        return I32_MAX
+    if value <= I32_MIN:
+        return I32_MIN
+    return int(value)
+
+
+def to_f64(value: Any) -> float:
+    return float(value)
+
+
+def convert(value: Any, type_name: str) -> Any:
+    """Converte um valor para o tipo de uma variável"""
+    return to_f64(value) if type_name == TYPE_F64 else to_i32(value)
+
+
+def literal_value(value: Any) -> Any:
+    """Valor de um literal numérico (inteiros dão a volta em i32)"""
+    if isinstance(value, int):
+        return wrap_i32(value)
+    return value
+
+
+# -----------------------
+# Entrada e saída
+# -----------------------
+
+def format_value(value: Any) -> str:
+    """Texto escrito por print! para um valor numérico"""
+    if isinstance(value, int):
+        return str(value)
+    if value != value:
+        return "NaN"
+    if math.isinf(value):
+        return "inf" if value > 0 else "-inf"
+    return "%.15g" % value
+
+
+_ESCAPES = {"n": "\n", "t": "\t", '"': '"', "\\": "\\"}
+
+
+def unescape_string(literal: str) -> str:
+    """Interpreta as sequências de escape de uma CADEIA (\\n, \\t, \\", \\\\)"""
+    if "\\" not in literal:
+        return literal
+    out = []
+    i = 0
+    n = len(literal)
+    while i < n:
+        ch = literal[i]
+        if ch == "\\" and i + 1 < n:
+            nxt = literal[i + 1]
+            out.append(_ESCAPES.get(nxt, "\\" + nxt))
+            i += 2
+        else:
+            out.append(ch)
+            i += 1
+    return "".join(out)
+
+
+class InputReader:
+    """Lê valores separados por espaços em blocos, sob demanda"""
+
+    CHUNK_SIZE = 1 << 16
+
+    def __init__(self, stream: Optional[TextIO]) -> None:
+        self._stream = stream
+        self._words: List[str] = []
+        self._pos = 0
+        self._carry = ""
+        self._eof = stream is None
+
+    def _fill(self) -> bool:
+        while not self._eof:
+            chunk = self._stream.read(self.CHUNK_SIZE)
+            if not chunk:
+                self._eof = True
+                words = self._carry.split()
+                self._carry = ""
+            else:
+                data = self._carry + chunk
+                words = data.split()
+                # A última palavra pode continuar no próximo bloco
+                if words and not data[-1].isspace():
+                    self._carry = words.pop()
+                else:
+                    self._carry = ""
+            if words:
+                self._words = words
+                self._pos = 0
+                return True
+        return False
+
+    def next_word(self) -> str:
+        if self._pos >= len(self._words) and not self._fill():
+            raise ExecutionError("fim da entrada durante read")
+        word = self._words[self._pos]
+        self._pos += 1
+        return word
+
+    def read_i32(self) -> int:
+        word = self.next_word()
+        try:
+            value = int(word)
+        except ValueError:
+            raise ExecutionError(f"entrada inválida para i32: '{word}'")
+        if not I32_MIN <= value <= I32_MAX:
+            raise ExecutionError(f"entrada fora do intervalo de i32: '{word}'")
+        return value
+
+    def read_f64(self) -> float:
+        word = self.next_word()
+        try:
+            return float(word)
+        except ValueError:
+            raise ExecutionError(f"entrada inválida para f64: '{word}'")
+
+    def read(self, type_name: str) -> Any:
+        return self.read_f64() if type_name == TYPE_F64 else self.read_i32()
+
+
+class OutputWriter:
+    """Acumula as linhas escritas e descarrega em blocos"""
+
+    FLUSH_LINES = 4096
+
+    def __init__(self, stream: TextIO) -> None:
+        self._stream = stream
+        self._lines: List[str] = []
+
+    def write_line(self, text: str) -> None:
+        lines = self._lines
+        lines.append(text)
+        if len(lines) >= self.FLUSH_LINES:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._lines:
+            self._stream.write("\n".join(self._lines))
+            self._stream.write("\n")
+            self._lines.clear()
+        self._stream.flush()
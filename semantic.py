@@ -0,0 +1,224 @@
+# semantic.py
+"""
+Analisador Semântico
+
+Percorre a AST uma única vez, mantendo uma tabela de símbolos por bloco
+(os escopos seguem o aninhamento de Block), e verifica:
+- todo identificador usado (em expressões, atribuições, read e print!)
+  foi declarado antes, neste bloco ou em um bloco envolvente;
+- uma variável sem 'mut' recebe valor no máximo uma vez: uma segunda
+  atribuição (ou read) em qualquer caminho, ou uma atribuição dentro de um
+  laço mais interno que a declaração, é erro.
+
+Cada declaração recebe um slot (índice denso, na ordem das declarações) e
+as referências na AST são anotadas com o slot e o tipo (i32/f64) da
+variável. A tabela completa fica em Program.symbols, e os back-ends de
+execução usam os slots em vez de procurar nomes.
+
+Todos os erros são coletados; a análise não para no primeiro.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from parser import (Program, Block, Declaration, Assignment, Read, Print,
+                    Conditional, While, BinaryOp, UnaryOp, Identifier,
+                    RelationalOp, LogicalOp, LogicalNot)
+from runtime import CompileError
+
+# Tarefas da pilha de SemanticAnalyzer.visit_block
+_COMMAND, _BLOCK, _CLOSE_SCOPE, _ELSE, _JOIN, _END_LOOP = range(6)
+
+
+class SemanticError(CompileError):
+    """Erro semântico com posição no código-fonte"""
+
+    def __str__(self) -> str:
+        return f"Erro semântico na linha {self.line}, coluna {self.column}: {self.message}"
+
+    def __reduce__(self):
+        return (SemanticError, (self.message, self.line, self.column))
+
+
+@dataclass
+class Symbol:
+    """Variável declarada"""
+    name: str
+    type_name: str
+    is_mutable: bool
+    slot: int
+    line: int
+    column: int
+    loop_depth: int  # número de laços envolvendo a declaração
+
+
+class SemanticAnalyzer:
+    """Resolve nomes, verifica atribuições e anota a AST"""
+
+    def __init__(self) -> None:
+        self.symbols: List[Symbol] = []
+        self.scopes: List[Dict[str, Symbol]] = []
+        self.errors: List[SemanticError] = []
+        # Slots de variáveis imutáveis que podem já ter recebido valor
+        self.assigned: Set[int] = set()
+        self.loop_depth = 0
+        self.line = 0
+        self.column = 0
+
+    def analyze(self, program: Program) -> List[SemanticError]:
+        self.visit_block(program.block)
+        # Só programas sem erros ficam com a tabela (prontos para execução)
+        program.symbols = None if self.errors else self.symbols
+        return self.errors
+
+    def error(self, message: str) -> None:
+        self.errors.append(SemanticError(message, self.line, self.column))
+
+    # -----------------------
+    # Tabela de símbolos
+    # -----------------------
+
+    def declare(self, cmd: Declaration) -> Symbol:
+        symbol = Symbol(cmd.identifier, cmd.type_name, cmd.is_mutable,
+                        len(self.symbols), cmd.line, cmd.column,
+                        self.loop_depth)
+        self.symbols.append(symbol)
+        self.scopes[-1][cmd.identifier] = symbol
+        return symbol
+
+    def lookup(self, name: str) -> Optional[Symbol]:
+        for scope in reversed(self.scopes):
+            symbol = scope.get(name)
+            if symbol is not None:
+                return symbol
+        self.error(f"Variável '{name}' não declarada")
+        return None
+
+    def assign(self, name: str) -> Optional[Symbol]:
+        """Resolve o destino de uma atribuição ou read"""
+        symbol = self.lookup(name)
+        if symbol is None or symbol.is_mutable:
+            return symbol
+        if self.loop_depth > symbol.loop_depth:
+            self.error(f"Variável imutável '{name}' atribuída dentro de um "
+                       f"laço (declare com 'let mut')")
+        elif symbol.slot in self.assigned:
+            self.error(f"Variável imutável '{name}' atribuída mais de uma "
+                       f"vez (declare com 'let mut')")
+        self.assigned.add(symbol.slot)
+        return symbol
+
+    # -----------------------
+    # Comandos
+    # -----------------------
+
+    def visit_block(self, block: Block) -> None:
+        """
+        Percorre o bloco sem recursão: uma pilha de tarefas guarda os
+        comandos ainda não visitados e o que fazer ao sair de cada bloco
+        (fechar o escopo, juntar os ramos de um if, sair de um laço), de
+        modo que o aninhamento só é limitado pela memória, como no
+        StackParser.
+        """
+        tasks: List[Tuple[int, Any]] = [(_BLOCK, block)]
+        while tasks:
+            action, item = tasks.pop()
+            if action == _COMMAND:
+                self.visit_command(item, tasks)
+            elif action == _BLOCK:
+                self.scopes.append({})
+                tasks.append((_CLOSE_SCOPE, None))
+                tasks.extend((_COMMAND, cmd) for cmd in reversed(item.commands))
+            elif action == _CLOSE_SCOPE:
+                self.scopes.pop()
+            elif action == _ELSE:
+                cmd, before = item
+                after_then = self.assigned
+                self.assigned = before
+                tasks.append((_JOIN, after_then))
+                tasks.append((_BLOCK, cmd.else_block))
+            elif action == _JOIN:
+                # Depois do if, vale o que pode ter acontecido em qualquer ramo
+                self.assigned |= item
+            else:  # _END_LOOP
+                self.loop_depth -= 1
+
+    def visit_command(self, cmd, tasks: List[Tuple[int, Any]]) -> None:
+        """Visita um comando; os blocos internos vão para `tasks`"""
+        if isinstance(cmd, Block):
+            tasks.append((_BLOCK, cmd))
+            return
+        self.line, self.column = cmd.line, cmd.column
+
+        if isinstance(cmd, Declaration):
+            cmd.slot = self.declare(cmd).slot
+
+        elif isinstance(cmd, Assignment):
+            # O valor é calculado antes de ser atribuído
+            symbol = self.assign(cmd.identifier)
+            self.visit_expression(cmd.expression)
+            _annotate(cmd, symbol)
+
+        elif isinstance(cmd, Read):
+            _annotate(cmd, self.assign(cmd.identifier))
+
+        elif isinstance(cmd, Print):
+            if cmd.is_identifier:
+                _annotate(cmd, self.lookup(cmd.value))
+
+        elif isinstance(cmd, Conditional):
+            self.visit_expression(cmd.condition)
+            if cmd.else_block is not None:
+                tasks.append((_ELSE, (cmd, set(self.assigned))))
+            tasks.append((_BLOCK, cmd.then_block))
+
+        elif isinstance(cmd, While):
+            self.visit_expression(cmd.condition)
+            self.loop_depth += 1
+            tasks.append((_END_LOOP, None))
+            tasks.append((_BLOCK, cmd.block))
+
+    # -----------------------
+    # Expressões
+    # -----------------------
+
+    def visit_expression(self, expr) -> None:
+        """Resolve os identificadores de uma expressão aritmética ou
+        condição, da esquerda para a direita, com uma pilha explícita"""
+        stack = [expr]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, Identifier):
+                _annotate(node, self.lookup(node.name))
+            elif isinstance(node, (BinaryOp, RelationalOp, LogicalOp)):
+                stack.append(node.right)
+                stack.append(node.left)
+            elif isinstance(node, (UnaryOp, LogicalNot)):
+                stack.append(node.operand)
+
+
+def _annotate(node, symbol: Optional[Symbol]) -> None:
+    if symbol is None:
+        node.slot = node.type_name = None
+    else:
+        node.slot = symbol.slot
+        node.type_name = symbol.type_name
+
+
+def analyze(program: Program) -> List[SemanticError]:
+    """Analisa e anota o programa; devolve todos os erros encontrados"""
+    return SemanticAnalyzer().analyze(program)
+
+
+def resolve(program: Program) -> List[Symbol]:
+    """
+    Tabela de símbolos de um programa já analisado. Programas ainda não
+    analisados são analisados agora; o primeiro erro é levantado.
+    """
+    if program.symbols is None:
+        errors = analyze(program)
+        if errors:
+            raise errors[0]
+    return program.symbols
@@ -0,0 +1,296 @@
+# stack_parser.py
+"""
+Parser com pilha explícita (sem recursão)
+
+O Parser descendente recursivo gasta um quadro da pilha do Python por nível
+de aninhamento de blocos, comandos, parênteses e '!': algumas centenas de
+níveis bastam para um RecursionError. O StackParser reconhece a mesma
+gramática guardando o contexto de cada nível em listas:
+
+- blocos: cada '{' aberto empilha um _Frame com os comandos já lidos e o
+  que fazer ao fechá-lo (bloco simples, corpo de while, então/senão de if);
+- expressões aritméticas: cada '(' empilha a soma e o termo parciais;
+- expressões relacionais: cada grupo '(' expressaoRelacional ')' empilha a
+  expressão parcial, o operador lógico pendente e os '!' ainda não
+  aplicados.
+
+A AST e a lista de erros são idênticas às do Parser, inclusive a
+recuperação de erros (um erro dentro de um bloco aninhado é tratado pela
+lista de comandos que o contém) e a leitura de '(' em condições (ver
+Parser.parse_parenthesized_condition). Tempo e memória são lineares no
+tamanho da entrada, para qualquer profundidade.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Type
+
+from lexer import TokenType
+from parser import (Parser, ParserError, Program, Block, Command, Assignment,
+                    Conditional, While, BinaryOp, Number, Identifier,
+                    RelationalOp, LogicalOp, LogicalNot)
+
+# O que fazer com o bloco ao fechar o '}'
+PLAIN, WHILE, THEN, ELSE, PROGRAM = range(5)
+
+MULTIPLICATIVE = (TokenType.STAR, TokenType.SLASH, TokenType.PERCENT)
+ADDITIVE = (TokenType.PLUS, TokenType.MINUS)
+LOGICAL = (TokenType.LOGICAL_AND, TokenType.LOGICAL_OR)
+
+
+@dataclass
+class _Frame:
+    """Bloco aberto: comandos lidos e o comando que ele completa"""
+    kind: int
+    condition: Any = None
+    line: int = 0
+    column: int = 0
+    then_block: Optional[Block] = None
+    commands: List[Command] = field(default_factory=list)
+
+
+class StackParser(Parser):
+    """
+    Parser equivalente ao Parser recursivo, com o aninhamento guardado em
+    pilhas explícitas: a profundidade só é limitada pela memória.
+    """
+
+    def parse(self) -> Optional[Program]:
+        """Ponto de entrada do parser"""
+        try:
+            return self._parse_program()
+        except ParserError as e:
+            self.errors.append(e)
+            return None
+
+    # -----------------------
+    # Programa, blocos e comandos
+    # -----------------------
+
+    def _parse_program(self) -> Program:
+        self.consume(TokenType.KW_FN, "Esperado 'fn' no início do programa")
+        self.consume(TokenType.KW_MAIN, "Esperado 'main' após 'fn'")
+        self.consume(TokenType.LPAREN, "Esperado '(' após 'main'")
+        self.consume(TokenType.RPAREN, "Esperado ')' após '('")
+        self.consume(TokenType.LBRACE, "Esperado '{'")
+
+        frames = [_Frame(PROGRAM)]
+        while True:
+            frame = frames[-1]
+            # listaComandos do bloco no topo da pilha
+            if not self.check(TokenType.RBRACE) and not self.is_at_end():
+                try:
+                    self._command(frames)
+                except ParserError as e:
+                    self.errors.append(e)
+                    self.synchronize()
+                continue
+
+            # Fim do bloco: um erro aqui é do comando que contém o bloco
+            frames.pop()
+            try:
+                self.consume(TokenType.RBRACE, "Esperado '}'")
+            except ParserError as e:
+                if not frames:
+                    raise
+                self.errors.append(e)
+                self.synchronize()
+                continue
+            block = Block(frame.commands)
+
+            if not frames:
+                # Verifica se há tokens extras após o programa
+                if not self.is_at_end():
+                    raise ParserError("Tokens inesperados após o fim do programa",
+                                      self.peek())
+                return Program(block)
+
+            try:
+                self._close(frame, block, frames)
+            except ParserError as e:
+                self.errors.append(e)
+                self.synchronize()
+
+    def _command(self, frames: List[_Frame]) -> None:
+        """Lê um comando: os simples vão para o bloco do topo; if, while e
+        bloco abrem um novo nível"""
+        commands = frames[-1].commands
+        kind = self.peek().type
+
+        if kind == TokenType.KW_LET:
+            commands.append(self.parse_declaration())
+        elif kind == TokenType.KW_READ:
+            commands.append(self.parse_read())
+        elif kind == TokenType.KW_PRINT:
+            commands.append(self.parse_print())
+        elif kind == TokenType.KW_IF or kind == TokenType.KW_WHILE:
+            token = self.advance()
+            condition = self._relational()
+            self.consume(TokenType.LBRACE, "Esperado '{'")
+            frames.append(_Frame(THEN if kind == TokenType.KW_IF else WHILE,
+                                 condition, token.line, token.column))
+        elif kind == TokenType.LBRACE:
+            self.advance()
+            frames.append(_Frame(PLAIN))
+        elif kind == TokenType.IDENTIFIER:
+            commands.append(self._assignment())
+        else:
+            raise ParserError("Comando inválido", self.peek())
+
+    def _close(self, frame: _Frame, block: Block, frames: List[_Frame]) -> None:
+        """Completa o comando do bloco que acabou de fechar"""
+        commands = frames[-1].commands
+        if frame.kind == PLAIN:
+            commands.append(block)
+        elif frame.kind == WHILE:
+            commands.append(While(frame.condition, block,
+                                  frame.line, frame.column))
+        elif frame.kind == THEN:
+            if self.match(TokenType.KW_ELSE):
+                self.consume(TokenType.LBRACE, "Esperado '{'")
+                frames.append(_Frame(ELSE, frame.condition, frame.line,
+                                     frame.column, block))
+            else:
+                commands.append(Conditional(frame.condition, block, None,
+                                            frame.line, frame.column))
+        else:
+            commands.append(Conditional(frame.condition, frame.then_block,
+                                        block, frame.line, frame.column))
+
+    def _assignment(self) -> Assignment:
+        id_token = self.advance()
+        self.consume(TokenType.ASSIGNMENT, "Esperado '=' após identificador")
+        expr = self._arithmetic()
+        self.consume(TokenType.SEMICOLON, "Esperado ';' após atribuição")
+        return Assignment(id_token.lexeme, expr, id_token.line, id_token.column)
+
+    # -----------------------
+    # Expressões
+    # -----------------------
+
+    def _arithmetic(self, first_group: bool = False):
+        """
+        expressaoAritmetica : termo (('+' | '-') termo)*
+        termo : fator (('*' | '/' | '%') fator)*
+
+        `total`/`add` são a soma parcial e o operador aditivo pendente;
+        `term`/`mul`, o termo parcial e o operador multiplicativo pendente.
+        Um '(' empilha os quatro e recomeça do zero.
+
+        Com first_group (a expressão começa com '('), devolve também o
+        token seguinte ao ')' que fecha esse primeiro grupo e a sua posição.
+        """
+        stack = []
+        total = add = term = mul = None
+        after_group = group_end = None
+        while True:
+            # fator
+            token = self.peek()
+            kind = token.type
+            if kind == TokenType.NUMBER:
+                self.advance()
+                operand = Number(token.literal, token.lexeme)
+            elif kind == TokenType.IDENTIFIER:
+                self.advance()
+                operand = Identifier(token.lexeme)
+            elif kind == TokenType.LPAREN:
+                self.advance()
+                stack.append((total, add, term, mul))
+                total = add = term = mul = None
+                continue
+            else:
+                raise ParserError("Esperado número, identificador ou '('", token)
+
+            while True:
+                term = operand if mul is None else BinaryOp(term, mul, operand)
+                kind = self.peek().type
+                if kind in MULTIPLICATIVE:
+                    mul = self.advance().lexeme
+                    break
+                mul = None
+                total = term if add is None else BinaryOp(total, add, term)
+                if kind in ADDITIVE:
+                    add = self.advance().lexeme
+                    break
+                if not stack:
+                    if first_group:
+                        return total, after_group, group_end
+                    return total
+                self.consume(TokenType.RPAREN, "Esperado ')' após expressão")
+                operand = total
+                total, add, term, mul = stack.pop()
+                if not stack and after_group is None:
+                    after_group, group_end = self.peek(), self.current
+
+    def _relational(self):
+        """
+        expressaoRelacional : termoRelacional (operadorLogico termoRelacional)*
+
+        Como em Parser.parse_parenthesized_condition, após '(' lê-se uma
+        expressão aritmética: seguida de ')', o termo é
+        '(' expressaoAritmetica ')' OP_REL expressaoAritmetica; senão ela
+        inicia o primeiro termo de um grupo relacional, empilhado até o ')'.
+        """
+        stack = []
+        left = logical = None
+        nots = 0
+        while True:
+            # termoRelacional
+            while self.match(TokenType.EXCLAMATION):
+                nots += 1
+
+            if self.check(TokenType.LPAREN):
+                self.advance()
+                if self.check(TokenType.LPAREN):
+                    first, after_group, group_end = self._arithmetic(
+                        first_group=True)
+                else:
+                    first, after_group = self._arithmetic(), None
+                if self.check(TokenType.RPAREN):
+                    self.advance()
+                    if not self.check(TokenType.REL_OPERATOR):
+                        raise ParserError("Esperado operador relacional",
+                                          self.peek())
+                else:
+                    # Grupo relacional: `first` começa o primeiro termo
+                    if (after_group is not None
+                            and after_group.type != TokenType.REL_OPERATOR):
+                        raise self.group_error(after_group, group_end)
+                    if not self.check(TokenType.REL_OPERATOR):
+                        raise ParserError("Esperado operador relacional",
+                                          self.peek())
+                    stack.append((left, logical, nots))
+                    left = logical = None
+                    nots = 0
+                operator = self.advance().lexeme
+                term = RelationalOp(first, operator, self._arithmetic())
+            else:
+                first = self._arithmetic()
+                if not self.match(TokenType.REL_OPERATOR):
+                    raise ParserError("Esperado operador relacional",
+                                      self.peek())
+                operator = self.previous().lexeme
+                term = RelationalOp(first, operator, self._arithmetic())
+
+            while True:
+                for _ in range(nots):
+                    term = LogicalNot(term)
+                left = term if logical is None else LogicalOp(left, logical, term)
+                if self.match(*LOGICAL):
+                    logical = self.previous().lexeme
+                    nots = 0
+                    break
+                if not stack:
+                    return left
+                self.consume(TokenType.RPAREN,
+                             "Esperado ')' após expressão relacional")
+                term = left
+                left, logical, nots = stack.pop()
+
+
+# Parsers selecionáveis na linha de comando (--parser)
+PARSERS: Dict[str, Type[Parser]] = {
+    "recursive": Parser,
+    "stack": StackParser,
+}
@@ -0,0 +1,225 @@
+# token_buffer.py
+"""
+Armazenamento compacto de tokens (struct-of-arrays)
+
+Em vez de um objeto Token por lexema, o TokenBuffer guarda:
+- o tipo de cada token como um inteiro pequeno (array 'B');
+- os offsets de início e fim do lexema no código-fonte;
+- uma tabela lateral apenas para os tokens que têm literal.
+
+O lexema é recortado do código-fonte e a linha/coluna é calculada sob
+demanda por busca binária em um índice de inícios de linha.
+"""
+
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_right
+from typing import Dict, Iterable, Iterator, List, Optional, Any, Tuple
+
+from lexer import Lexer, Token, TokenType
+
+# Código inteiro de cada TokenType (posição na enumeração)
+TOKEN_TYPES: List[TokenType] = list(TokenType)
+TOKEN_CODES: Dict[TokenType, int] = {t: i for i, t in enumerate(TOKEN_TYPES)}
+
+_COMMENT_CODES = (TOKEN_CODES[TokenType.LINE_COMMENT],
+                  TOKEN_CODES[TokenType.BLOCK_COMMENT])
+
+
+def offset_typecode(length: int) -> str:
+    """Menor typecode de array capaz de guardar offsets até `length`"""
+    return "I" if length < 2 ** 32 else "Q"
+
+
+def build_line_starts(source: str) -> array:
+    """Offsets do primeiro caractere de cada linha do código-fonte"""
+    starts = array(offset_typecode(len(source)), [0])
+    find = source.find
+    idx = find("\n")
+    while idx != -1:
+        starts.append(idx + 1)
+        idx = find("\n", idx + 1)
+    return starts
+
+
+class TokenBuffer:
+    """Sequência de tokens em arrays paralelos, indexável como List[Token]"""
+
+    # Tamanho máximo do cache de tokens materializados por __getitem__
+    CACHE_SIZE = 8
+
+    def __init__(self, source: str, types: array, starts: array, ends: array,
+                 literals: Dict[int, Any], keep_comments: bool = False,
+                 line_starts: Optional[array] = None) -> None:
+        self.source = source
+        self.types = types
+        self.starts = starts
+        self.ends = ends
+        self.literals = literals
+        self.keep_comments = keep_comments
+        self._line_starts = line_starts
+        self._cache: Dict[int, Token] = {}
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # O cache de tokens materializados não precisa ser serializado
+        state = self.__dict__.copy()
+        state["_cache"] = {}
+        return state
+
+    # -----------------------
+    # Construção
+    # -----------------------
+
+    @classmethod
+    def from_lexer(cls, lexer: Lexer) -> TokenBuffer:
+        """Executa o lexer até o EOF guardando os tokens de forma compacta"""
+        source = lexer.source
+        typecode = offset_typecode(len(source))
+        types = array("B")
+        starts = array(typecode)
+        ends = array(typecode)
+        literals: Dict[int, Any] = {}
+        codes = TOKEN_CODES
+
+        for i, tok in enumerate(lexer.iter_tokens()):
+            # O lexema é sempre o trecho do código que termina no índice atual
+            end = lexer.index
+            types.append(codes[tok.type])
+            starts.append(end - len(tok.lexeme))
+            ends.append(end)
+            if tok.literal is not None:
+                literals[i] = tok.literal
+
+        return cls(source, types, starts, ends, literals, lexer.keep_comments)
+
+    @classmethod
+    def from_tokens(cls, source: str, tokens: Iterable[Token],
+                    keep_comments: bool = False) -> TokenBuffer:
+        """Converte uma lista de tokens do mesmo código-fonte"""
+        line_starts = build_line_starts(source)
+        typecode = offset_typecode(len(source))
+        types = array("B")
+        starts = array(typecode)
+        ends = array(typecode)
+        literals: Dict[int, Any] = {}
+        codes = TOKEN_CODES
+
+        for i, tok in enumerate(tokens):
+            start = line_starts[tok.line - 1] + tok.column - 1
+            code = codes[tok.type]
+            if code in _COMMENT_CODES:
+                keep_comments = True
+            types.append(code)
+            starts.append(start)
+            ends.append(start + len(tok.lexeme))
+            if tok.literal is not None:
+                literals[i] = tok.literal
+
+        return cls(source, types, starts, ends, literals, keep_comments,
+                   line_starts)
+
+    # -----------------------
+    # Acesso
+    # -----------------------
+
+    def __len__(self) -> int:
+        return len(self.types)
+
+    def __getitem__(self, index: int) -> Token:
+        if index < 0:
+            index += len(self.types)
+        tok = self._cache.get(index)
+        if tok is None:
+            if len(self._cache) >= self.CACHE_SIZE:
+                self._cache.clear()
+            tok = self._materialize(index)
+            self._cache[index] = tok
+        return tok
+
+    def __iter__(self) -> Iterator[Token]:
+        # Percorre em ordem calculando linha/coluna incrementalmente
+        source = self.source
+        line_starts = self.line_starts
+        n_lines = len(line_starts)
+        types = TOKEN_TYPES
+        literals = self.literals
+        line = 1
+        for i, (code, start, end) in enumerate(zip(self.types, self.starts,
+                                                   self.ends)):
+            while line < n_lines and line_starts[line] <= start:
+                line += 1
+            yield Token(types[code], source[start:end], literals.get(i),
+                        line, start - line_starts[line - 1] + 1)
+
+    def _materialize(self, index: int) -> Token:
+        start = self.starts[index]
+        line, column = self.position_of(start)
+        return Token(TOKEN_TYPES[self.types[index]],
+                     self.source[start:self.ends[index]],
+                     self.literals.get(index), line, column)
+
+    def type_at(self, index: int) -> TokenType:
+        return TOKEN_TYPES[self.types[index]]
+
+    def lexeme_at(self, index: int) -> str:
+        return self.source[self.starts[index]:self.ends[index]]
+
+    def literal_at(self, index: int) -> Optional[Any]:
+        return self.literals.get(index)
+
+    # -----------------------
+    # Linha/coluna sob demanda
+    # -----------------------
+
+    @property
+    def line_starts(self) -> array:
+        if self._line_starts is None:
+            self._line_starts = build_line_starts(self.source)
+        return self._line_starts
+
+    def position_of(self, offset: int) -> Tuple[int, int]:
+        """Converte um offset do código-fonte em (linha, coluna)"""
+        line_starts = self.line_starts
+        line = bisect_right(line_starts, offset)
+        return line, offset - line_starts[line - 1] + 1
+
+    def position(self, index: int) -> Tuple[int, int]:
+        """(linha, coluna) do token de índice `index`"""
+        return self.position_of(self.starts[index])
+
+    # -----------------------
+    # Derivados
+    # -----------------------
+
+    def without_comments(self) -> TokenBuffer:
+        """Cópia sem tokens de comentário (o próprio buffer se não os guarda)"""
+        if not self.keep_comments:
+            return self
+
+        comment_codes = _COMMENT_CODES
+        types = self.types
+        typecode = offset_typecode(len(self.source))
+        new_types = array("B")
+        new_starts = array(typecode)
+        new_ends = array(typecode)
+        new_literals: Dict[int, Any] = {}
+        literals = self.literals
+        for i, code in enumerate(types):
+            if code in comment_codes:
+                continue
+            if i in literals:
+                new_literals[len(new_types)] = literals[i]
+            new_types.append(code)
+            new_starts.append(self.starts[i])
+            new_ends.append(self.ends[i])
+
+        return TokenBuffer(self.source, new_types, new_starts, new_ends,
+                           new_literals, False, self._line_starts)
+
+    def nbytes(self) -> int:
+        """Memória aproximada dos arrays (sem o código-fonte e os literais)"""
+        size = 0
+        for arr in (self.types, self.starts, self.ends):
+            size += arr.itemsize * len(arr)
+        return size
@@ -0,0 +1,354 @@
+# token_file.py
+"""
+Arquivo binário de tokens (gravado pelo léxico, lido via mmap)
+
+Permite separar as fases: o léxico grava os tokens de um TokenBuffer em um
+arquivo, e o parser os lê depois (em outro processo ou outra máquina) sem
+analisar o texto de novo. O leitor mapeia o arquivo na memória e entrega
+ao parser um TokenBuffer cujos arrays são memoryviews do mapeamento: nada é
+copiado ou decodificado até o parser pedir um token.
+
+Formato (little-endian; cada seção começa em um múltiplo de 8 bytes):
+
+    cabeçalho   HEADER (mágica b"CTOK", versão, flags, largura dos
+                caracteres, tamanho dos offsets, contagens e o offset de
+                cada seção)
+    types       um byte por token (código de TOKEN_CODES)
+    starts      offset (em caracteres) do início de cada lexema
+    ends        offset do fim de cada lexema
+    lines       offset do início de cada linha (índice de linhas)
+    lit_tokens  índices, em ordem crescente, dos tokens com literal
+    lit_offsets posição de cada literal no pool
+    pool        literais: tag de um byte e o valor (ver encode_literal)
+    source      código-fonte com largura fixa por caractere (latin-1,
+                UTF-16 ou UTF-32, a menor que couber), de modo que o
+                offset em caracteres de um token vira offset em bytes
+"""
+
+from __future__ import annotations
+
+import mmap
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from typing import Any, BinaryIO, Dict, Iterator, List, Tuple
+
+from lexer import Lexer
+from token_buffer import TokenBuffer, offset_typecode
+
+MAGIC = b"CTOK"
+VERSION = 1
+
+# Flags do cabeçalho
+KEEP_COMMENTS = 1
+
+# mágica, versão, flags, largura dos caracteres, bytes por offset, número de
+# tokens, tamanho do código (caracteres), linhas, literais e os offsets das
+# oito seções
+HEADER = struct.Struct("<4sHBBB7xQQQQ8Q")
+SECTIONS = ["types", "starts", "ends", "lines", "lit_tokens", "lit_offsets",
+            "pool", "source"]
+
+# Largura em bytes por caractere -> codificação de largura fixa
+ENCODINGS = {1: "latin-1", 2: "utf-16-le", 4: "utf-32-le"}
+
+# Tags dos literais no pool
+_INT, _BIG_INT, _FLOAT, _STR = b"i", b"n", b"f", b"s"
+_INT64 = struct.Struct("<q")
+_FLOAT64 = struct.Struct("<d")
+_LENGTH = struct.Struct("<I")
+
+_LITTLE = sys.byteorder == "little"
+
+
+class TokenFileError(Exception):
+    """Arquivo de tokens inválido, truncado ou de outra versão"""
+    pass
+
+
+# -----------------------
+# Gravação
+# -----------------------
+
+def _encode_source(source: str) -> Tuple[int, bytes]:
+    """Menor codificação de largura fixa capaz de representar o código"""
+    try:
+        return 1, source.encode("latin-1")
+    except UnicodeEncodeError:
+        pass
+    data = source.encode("utf-16-le", "surrogatepass")
+    if len(data) == 2 * len(source):
+        return 2, data
+    return 4, source.encode("utf-32-le", "surrogatepass")
+
+
+def encode_literal(value: Any) -> bytes:
+    """Literal (int, float ou str) como tag de um byte seguida do valor"""
+    if isinstance(value, bool):
+        raise TokenFileError(f"Literal não suportado: {value!r}")
+    if isinstance(value, int):
+        if -2 ** 63 <= value < 2 ** 63:
+            return _INT + _INT64.pack(value)
+        text = str(value).encode("ascii")
+        return _BIG_INT + _LENGTH.pack(len(text)) + text
+    if isinstance(value, float):
+        return _FLOAT + _FLOAT64.pack(value)
+    if isinstance(value, str):
+        data = value.encode("utf-8", "surrogatepass")
+        return _STR + _LENGTH.pack(len(data)) + data
+    raise TokenFileError(f"Literal não suportado: {value!r}")
+
+
+def decode_literal(data: Any, offset: int) -> Tuple[Any, int]:
+    """Lê um literal gravado por encode_literal; devolve (valor, fim)"""
+    tag = bytes(data[offset:offset + 1])
+    offset += 1
+    if tag == _INT:
+        return _INT64.unpack_from(data, offset)[0], offset + 8
+    if tag == _FLOAT:
+        return _FLOAT64.unpack_from(data, offset)[0], offset + 8
+    if tag not in (_BIG_INT, _STR):
+        raise TokenFileError(f"Tag de literal desconhecida: {tag!r}")
+    length = _LENGTH.unpack_from(data, offset)[0]
+    start = offset + 4
+    text = data[start:start + length]
+    if tag == _BIG_INT:
+        return int(str(text, "ascii")), start + length
+    return str(text, "utf-8", "surrogatepass"), start + length
+
+
+def little_endian(arr: array) -> array:
+    """O próprio array, ou uma cópia com os bytes invertidos (big-endian)"""
+    if _LITTLE:
+        return arr
+    arr = array(arr.typecode, arr)
+    arr.byteswap()
+    return arr
+
+
+def write_tokens(out: BinaryIO, tokens: TokenBuffer) -> int:
+    """Grava o TokenBuffer no arquivo binário aberto; devolve os bytes escritos"""
+    width, source = _encode_source(str(tokens.source))
+    typecode = offset_typecode(len(tokens.source))
+    starts = array(typecode, tokens.starts)
+    ends = array(typecode, tokens.ends)
+    lines = array(typecode, tokens.line_starts)
+
+    literal_items = sorted(tokens.literals.items())
+    lit_tokens = array(typecode, [index for index, _ in literal_items])
+    lit_offsets = array("Q")
+    pool = bytearray()
+    for _, value in literal_items:
+        lit_offsets.append(len(pool))
+        pool += encode_literal(value)
+
+    sections = [bytes(tokens.types), little_endian(starts),
+                little_endian(ends), little_endian(lines),
+                little_endian(lit_tokens), little_endian(lit_offsets),
+                pool, source]
+    offsets = []
+    position = HEADER.size
+    for data in sections:
+        position = (position + 7) & ~7
+        offsets.append(position)
+        position += memoryview(data).nbytes
+
+    flags = KEEP_COMMENTS if tokens.keep_comments else 0
+    out.write(HEADER.pack(MAGIC, VERSION, flags, width, starts.itemsize,
+                          len(tokens), len(tokens.source), len(lines),
+                          len(literal_items), *offsets))
+    written = HEADER.size
+    for offset, data in zip(offsets, sections):
+        out.write(b"\0" * (offset - written))
+        out.write(data)
+        written = offset + memoryview(data).nbytes
+    return written
+
+
+def save_tokens(path: str, tokens: TokenBuffer) -> int:
+    """Grava o TokenBuffer em `path`; devolve o tamanho do arquivo"""
+    with open(path, "wb") as f:
+        return write_tokens(f, tokens)
+
+
+def lex_to_file(lexer: Lexer, path: str) -> TokenBuffer:
+    """Executa o lexer e grava os tokens em `path`"""
+    tokens = TokenBuffer.from_lexer(lexer)
+    save_tokens(path, tokens)
+    return tokens
+
+
+# -----------------------
+# Leitura (mmap)
+# -----------------------
+
+class MappedSource:
+    """
+    Código-fonte dentro do mapeamento, fatiável como str: source[a:b]
+    decodifica só o trecho pedido.
+    """
+
+    def __init__(self, data: memoryview, width: int) -> None:
+        self.data = data
+        self.width = width
+        self.encoding = ENCODINGS[width]
+
+    def __len__(self) -> int:
+        return len(self.data) // self.width
+
+    def __getitem__(self, key: slice) -> str:
+        start, stop, step = key.indices(len(self))
+        if step != 1:
+            return str(self)[key]
+        width = self.width
+        return str(self.data[start * width:stop * width], self.encoding,
+                   "surrogatepass")
+
+    def __str__(self) -> str:
+        return str(self.data, self.encoding, "surrogatepass")
+
+
+class LiteralPool:
+    """
+    Literais dos tokens, lidos do pool sob demanda. Tem a interface de
+    dicionário usada pelo TokenBuffer (get, in, itens).
+    """
+
+    def __init__(self, tokens: Any, offsets: Any, pool: memoryview) -> None:
+        self.tokens = tokens
+        self.offsets = offsets
+        self.pool = pool
+
+    def _find(self, index: int) -> int:
+        position = bisect_left(self.tokens, index)
+        if position < len(self.tokens) and self.tokens[position] == index:
+            return position
+        return -1
+
+    def _decode(self, position: int) -> Any:
+        return decode_literal(self.pool, self.offsets[position])[0]
+
+    def get(self, index: int, default: Any = None) -> Any:
+        position = self._find(index)
+        return default if position < 0 else self._decode(position)
+
+    def __getitem__(self, index: int) -> Any:
+        position = self._find(index)
+        if position < 0:
+            raise KeyError(index)
+        return self._decode(position)
+
+    def __contains__(self, index: object) -> bool:
+        return isinstance(index, int) and self._find(index) >= 0
+
+    def __len__(self) -> int:
+        return len(self.tokens)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.tokens)
+
+    def items(self) -> Iterator[Tuple[int, Any]]:
+        for position, index in enumerate(self.tokens):
+            yield index, self._decode(position)
+
+
+class TokenFile(TokenBuffer):
+    """
+    TokenBuffer sobre um arquivo de tokens mapeado na memória: os arrays são
+    memoryviews do arquivo, os lexemas são decodificados ao serem pedidos e
+    os literais são lidos do pool sob demanda.
+    """
+
+    @classmethod
+    def open(cls, path: str) -> TokenFile:
+        with open(path, "rb") as f:
+            try:
+                mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Arquivo vazio: não pode ser mapeado
+                raise TokenFileError(f"{path}: arquivo de tokens vazio")
+        views: List[memoryview] = []
+        try:
+            return cls._from_mapping(mapping, path, views)
+        except BaseException:
+            for data in reversed(views):
+                data.release()
+            mapping.close()
+            raise
+
+    @classmethod
+    def _from_mapping(cls, mapping: mmap.mmap, path: str,
+                      views: List[memoryview]) -> TokenFile:
+        if len(mapping) < HEADER.size:
+            raise TokenFileError(f"{path}: cabeçalho truncado")
+        (magic, version, flags, width, offset_size, count, length, n_lines,
+         n_literals, *offsets) = HEADER.unpack_from(mapping, 0)
+        if magic != MAGIC:
+            raise TokenFileError(f"{path}: não é um arquivo de tokens")
+        if version != VERSION:
+            raise TokenFileError(f"{path}: versão {version} não suportada "
+                                 f"(esperada {VERSION})")
+        if width not in ENCODINGS or offset_size not in (4, 8):
+            raise TokenFileError(f"{path}: cabeçalho inválido")
+
+        view = memoryview(mapping)
+        views.append(view)
+        typecode = "I" if offset_size == 4 else "Q"
+        sizes = [count, count * offset_size, count * offset_size,
+                 n_lines * offset_size, n_literals * offset_size,
+                 n_literals * 8, None, length * width]
+        section: Dict[str, memoryview] = {}
+        for name, offset, size in zip(SECTIONS, offsets, sizes):
+            end = offsets[SECTIONS.index(name) + 1] if size is None else offset + size
+            if end > len(mapping) or offset > end:
+                raise TokenFileError(f"{path}: arquivo truncado (seção {name})")
+            section[name] = view[offset:end]
+            views.append(section[name])
+
+        def column(name: str, code: str) -> Any:
+            data = section[name].cast(code)
+            views.append(data)
+            if _LITTLE:
+                return data
+            # Máquina big-endian: copia e inverte os bytes
+            arr = array(code, data.tobytes())
+            arr.byteswap()
+            return arr
+
+        literals = LiteralPool(column("lit_tokens", typecode),
+                               column("lit_offsets", "Q"), section["pool"])
+        tokens = cls(MappedSource(section["source"], width),
+                     section["types"], column("starts", typecode),
+                     column("ends", typecode), literals,
+                     bool(flags & KEEP_COMMENTS), column("lines", typecode))
+        tokens.path = path
+        tokens._mapping = mapping
+        tokens._views = views
+        return tokens
+
+    def __getstate__(self) -> Dict[str, Any]:
+        raise TypeError("TokenFile não é serializável; use "
+                        "TokenBuffer.from_tokens(...) para uma cópia")
+
+    def close(self) -> None:
+        """Libera o mapeamento (os tokens já materializados continuam válidos)"""
+        if self._mapping is None:
+            return
+        self._cache.clear()
+        for data in reversed(self._views):
+            data.release()
+        self._views = []
+        self._mapping.close()
+        self._mapping = None
+
+    def __enter__(self) -> TokenFile:
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+def load_tokens(path: str) -> TokenFile:
+    """Abre um arquivo de tokens gravado por save_tokens"""
+    return TokenFile.open(path)
@@ -0,0 +1,467 @@
+# vm.py
+"""
+Compilador de bytecode e máquina virtual de pilha
+
+O compilador percorre a AST uma única vez e gera uma lista de instruções
+(opcode, argumento):
+- as variáveis são acessadas pelos slots atribuídos na análise semântica
+  (índices de um vetor denso), sem procura por nome;
+- os opcodes aritméticos são especializados por tipo (i32/f64), de modo que
+  a VM não precisa inspecionar tipos durante a execução;
+- condições de if/while nunca produzem valores booleanos: são compiladas
+  como saltos condicionais, com avaliação em curto-circuito de && e ||;
+- o while é compilado com o teste no final (um salto por iteração).
+
+A VM é um laço de despacho único com as variáveis do laço em locais e os
+opcodes testados em ordem de frequência.
+"""
+
+from __future__ import annotations
+
+import operator
+import sys
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, TextIO, Tuple
+
+from parser import (Program, Block, Declaration, Assignment, Read, Print,
+                    Conditional, While, BinaryOp, UnaryOp, Number, Identifier,
+                    RelationalOp, LogicalOp, LogicalNot)
+from runtime import (CompileError, ExecutionError, InputReader, OutputWriter,
+                     TYPE_I32, TYPE_F64, wrap_i32, i32_div, i32_rem, f64_div,
+                     f64_rem, to_i32, literal_value, format_value,
+                     unescape_string)
+from semantic import resolve
+
+# -----------------------
+# Opcodes
+# -----------------------
+
+LOAD = 0           # empilha slots[arg]
+CONST = 1          # empilha arg
+STORE = 2          # slots[arg] = desempilha
+ADD_I = 3          # aritmética i32; arg é None (operando na pilha) ou
+SUB_I = 4          # o operando direito constante
+MUL_I = 5
+DIV_I = 6
+REM_I = 7
+ADD_F = 8          # aritmética f64 (mesma convenção de arg)
+SUB_F = 9
+MUL_F = 10
+DIV_F = 11
+REM_F = 12
+NEG_I = 13
+NEG_F = 14
+TO_I32 = 15        # converte o topo da pilha
+TO_F64 = 16
+JUMP = 17          # pc = arg
+JUMP_IF_CMP = 18   # arg = (comparação, alvo): desempilha b, a e salta
+JUMP_UNLESS_CMP = 19  # se comparação(a, b) for verdadeira / falsa
+JUMP_IF_CMP_CONST = 20  # arg = (comparação, alvo, b): b constante
+JUMP_UNLESS_CMP_CONST = 21
+READ_I32 = 22      # lê para slots[arg]
+READ_F64 = 23
+PRINT = 24         # escreve slots[arg]
+PRINT_STR = 25     # escreve o texto arg
+HALT = 26
+
+OPCODE_NAMES = [
+    "LOAD", "CONST", "STORE", "ADD_I", "SUB_I", "MUL_I", "DIV_I", "REM_I",
+    "ADD_F", "SUB_F", "MUL_F", "DIV_F", "REM_F", "NEG_I", "NEG_F", "TO_I32",
+    "TO_F64", "JUMP", "JUMP_IF_CMP", "JUMP_UNLESS_CMP", "JUMP_IF_CMP_CONST",
+    "JUMP_UNLESS_CMP_CONST", "READ_I32", "READ_F64", "PRINT", "PRINT_STR",
+    "HALT",
+]
+
+COMPARISONS: Dict[str, Callable[[Any, Any], bool]] = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+_CONDITIONAL_JUMPS = (JUMP_IF_CMP, JUMP_UNLESS_CMP, JUMP_IF_CMP_CONST,
+                      JUMP_UNLESS_CMP_CONST)
+
+_ARITHMETIC = {
+    TYPE_I32: {"+": ADD_I, "-": SUB_I, "*": MUL_I, "/": DIV_I, "%": REM_I},
+    TYPE_F64: {"+": ADD_F, "-": SUB_F, "*": MUL_F, "/": DIV_F, "%": REM_F},
+}
+
+Instruction = Tuple[int, Any]
+
+
+@dataclass
+class Code:
+    """Programa compilado"""
+    instructions: List[Instruction]
+    lines: List[int]           # linha do comando de origem de cada instrução
+    slot_names: List[str]
+    slot_types: List[str]
+
+    @property
+    def n_slots(self) -> int:
+        return len(self.slot_names)
+
+    def disassemble(self) -> str:
+        """Listagem legível das instruções"""
+        out = []
+        for pc, (op, arg) in enumerate(self.instructions):
+            name = OPCODE_NAMES[op]
+            if op in (LOAD, STORE, READ_I32, READ_F64, PRINT):
+                text = f"{arg} ({self.slot_names[arg]})"
+            elif op in _CONDITIONAL_JUMPS:
+                symbol = next(k for k, v in COMPARISONS.items() if v is arg[0])
+                operand = f" {arg[2]!r}" if len(arg) > 2 else ""
+                text = f"{symbol}{operand} -> {arg[1]}"
+            elif arg is None:
+                text = ""
+            else:
+                text = repr(arg)
+            out.append(f"{pc:5d}  {name:<22}{text}".rstrip())
+        return "\n".join(out)
+
+
+# -----------------------
+# Compilador
+# -----------------------
+
+class _Label:
+    """Destino de salto resolvido ao final da compilação"""
+    __slots__ = ("target",)
+
+    def __init__(self) -> None:
+        self.target = -1
+
+
+class Compiler:
+    """Traduz a AST em bytecode"""
+
+    def __init__(self) -> None:
+        self.instructions: List[list] = []
+        self.lines: List[int] = []
+        # Posição do comando em compilação (para erros e para a VM)
+        self.line = 0
+        self.column = 0
+
+        self._commands = {
+            Declaration: self.compile_declaration,
+            Assignment: self.compile_assignment,
+            Read: self.compile_read,
+            Print: self.compile_print,
+            Conditional: self.compile_conditional,
+            While: self.compile_while,
+            Block: self.compile_block,
+        }
+
+    def compile(self, program: Program) -> Code:
+        symbols = resolve(program)
+        self.compile_block(program.block)
+        self.emit(HALT)
+        return Code(self._resolve(), self.lines,
+                    [s.name for s in symbols], [s.type_name for s in symbols])
+
+    # -----------------------
+    # Emissão
+    # -----------------------
+
+    def emit(self, op: int, arg: Any = None) -> None:
+        self.instructions.append([op, arg])
+        self.lines.append(self.line)
+
+    def place(self, label: _Label) -> None:
+        label.target = len(self.instructions)
+
+    def _resolve(self) -> List[Instruction]:
+        code = []
+        for op, arg in self.instructions:
+            if op == JUMP:
+                arg = arg.target
+            elif op in _CONDITIONAL_JUMPS:
+                arg = (arg[0], arg[1].target) + tuple(arg[2:])
+            code.append((op, arg))
+        return code
+
+    # -----------------------
+    # Comandos
+    # -----------------------
+
+    def compile_command(self, cmd) -> None:
+        if not isinstance(cmd, Block):
+            self.line, self.column = cmd.line, cmd.column
+        handler = self._commands.get(type(cmd))
+        if handler is None:
+            raise CompileError(f"Comando não suportado: {type(cmd).__name__}",
+                               self.line, self.column)
+        handler(cmd)
+
+    def compile_block(self, block: Block) -> None:
+        for cmd in block.commands:
+            self.compile_command(cmd)
+
+    def compile_declaration(self, cmd: Declaration) -> None:
+        # Variáveis começam zeradas (também a cada passagem em um laço)
+        self.emit(CONST, 0.0 if cmd.type_name == TYPE_F64 else 0)
+        self.emit(STORE, cmd.slot)
+
+    def compile_assignment(self, cmd: Assignment) -> None:
+        self.compile_conversion(self.compile_expression(cmd.expression),
+                                cmd.type_name)
+        self.emit(STORE, cmd.slot)
+
+    def compile_read(self, cmd: Read) -> None:
+        self.emit(READ_F64 if cmd.type_name == TYPE_F64 else READ_I32,
+                  cmd.slot)
+
+    def compile_print(self, cmd: Print) -> None:
+        if cmd.is_identifier:
+            self.emit(PRINT, cmd.slot)
+        else:
+            self.emit(PRINT_STR, unescape_string(cmd.value))
+
+    def compile_conditional(self, cmd: Conditional) -> None:
+        else_label = _Label()
+        self.compile_branch(cmd.condition, else_label, False)
+        self.compile_block(cmd.then_block)
+        if cmd.else_block is None:
+            self.place(else_label)
+            return
+        end_label = _Label()
+        self.emit(JUMP, end_label)
+        self.place(else_label)
+        self.compile_block(cmd.else_block)
+        self.place(end_label)
+
+    def compile_while(self, cmd: While) -> None:
+        # Teste no final do laço: JUMP teste; corpo: ...; teste: se cond, corpo
+        body_label = _Label()
+        test_label = _Label()
+        self.emit(JUMP, test_label)
+        self.place(body_label)
+        self.compile_block(cmd.block)
+        self.line, self.column = cmd.line, cmd.column
+        self.place(test_label)
+        self.compile_branch(cmd.condition, body_label, True)
+
+    # -----------------------
+    # Condições
+    # -----------------------
+
+    def compile_branch(self, cond, target: _Label, when: bool) -> None:
+        """Salta para `target` se a condição avaliar para `when`"""
+        if isinstance(cond, RelationalOp):
+            compare = COMPARISONS[cond.operator]
+            self.compile_expression(cond.left)
+            if isinstance(cond.right, Number):
+                self.emit(JUMP_IF_CMP_CONST if when else JUMP_UNLESS_CMP_CONST,
+                          (compare, target, literal_value(cond.right.value)))
+            else:
+                self.compile_expression(cond.right)
+                self.emit(JUMP_IF_CMP if when else JUMP_UNLESS_CMP,
+                          (compare, target))
+        elif isinstance(cond, LogicalNot):
+            self.compile_branch(cond.operand, target, not when)
+        elif isinstance(cond, LogicalOp):
+            # && salta quando ambos são verdadeiros; || quando algum é
+            short_value = cond.operator == "||"
+            if when == short_value:
+                self.compile_branch(cond.left, target, when)
+                self.compile_branch(cond.right, target, when)
+            else:
+                skip = _Label()
+                self.compile_branch(cond.left, skip, not when)
+                self.compile_branch(cond.right, target, when)
+                self.place(skip)
+        else:
+            raise CompileError(
+                f"Condição não suportada: {type(cond).__name__}",
+                self.line, self.column)
+
+    # -----------------------
+    # Expressões
+    # -----------------------
+
+    def compile_conversion(self, source: str, target: str) -> None:
+        if source != target:
+            self.emit(TO_F64 if target == TYPE_F64 else TO_I32)
+
+    def compile_expression(self, expr) -> str:
+        """Emite o código da expressão e devolve o seu tipo"""
+        if isinstance(expr, Identifier):
+            self.emit(LOAD, expr.slot)
+            return expr.type_name
+
+        if isinstance(expr, Number):
+            value = literal_value(expr.value)
+            self.emit(CONST, value)
+            return TYPE_F64 if isinstance(value, float) else TYPE_I32
+
+        if isinstance(expr, BinaryOp):
+            left_type = self.compile_expression(expr.left)
+            if isinstance(expr.right, Number):
+                # Operando direito constante vai no próprio opcode
+                operand = literal_value(expr.right.value)
+                right_type = (TYPE_F64 if isinstance(operand, float)
+                              else TYPE_I32)
+            else:
+                operand = None
+                right_type = self.compile_expression(expr.right)
+            result = (TYPE_F64 if TYPE_F64 in (left_type, right_type)
+                      else TYPE_I32)
+            self.emit(_ARITHMETIC[result][expr.operator], operand)
+            return result
+
+        if isinstance(expr, UnaryOp):
+            operand_type = self.compile_expression(expr.operand)
+            if expr.operator == "-":
+                self.emit(NEG_F if operand_type == TYPE_F64 else NEG_I)
+            return operand_type
+
+        raise CompileError(f"Expressão não suportada: {type(expr).__name__}",
+                           self.line, self.column)
+
+
+def compile_program(program: Program) -> Code:
+    """Compila a AST de um programa para bytecode"""
+    return Compiler().compile(program)
+
+
+# -----------------------
+# Máquina virtual
+# -----------------------
+
+class VM:
+    """Executa um programa compilado"""
+
+    def __init__(self, code: Code, stdin: Optional[TextIO] = None,
+                 stdout: Optional[TextIO] = None) -> None:
+        self.code = code
+        self.input = InputReader(stdin if stdin is not None else sys.stdin)
+        self.output = OutputWriter(stdout if stdout is not None else sys.stdout)
+
+    def run(self) -> None:
+        code = self.code.instructions
+        slots: List[Any] = [0] * self.code.n_slots
+        stack: List[Any] = []
+        push = stack.append
+        pop = stack.pop
+        read_i32 = self.input.read_i32
+        read_f64 = self.input.read_f64
+        write = self.output.write_line
+        pc = 0
+        try:
+            while True:
+                op, arg = code[pc]
+                pc += 1
+                if op == LOAD:
+                    push(slots[arg])
+                elif op == STORE:
+                    slots[arg] = pop()
+                elif op == CONST:
+                    push(arg)
+                elif op == ADD_I:
+                    b = pop() if arg is None else arg
+                    r = stack[-1] + b
+                    if not -2147483648 <= r <= 2147483647:
+                        r = wrap_i32(r)
+                    stack[-1] = r
+                elif op == JUMP_UNLESS_CMP_CONST:
+                    if not arg[0](pop(), arg[2]):
+                        pc = arg[1]
+                elif op == JUMP_IF_CMP_CONST:
+                    if arg[0](pop(), arg[2]):
+                        pc = arg[1]
+                elif op == JUMP_UNLESS_CMP:
+                    b = pop()
+                    if not arg[0](pop(), b):
+                        pc = arg[1]
+                elif op == JUMP_IF_CMP:
+                    b = pop()
+                    if arg[0](pop(), b):
+                        pc = arg[1]
+                elif op == SUB_I:
+                    b = pop() if arg is None else arg
+                    r = stack[-1] - b
+                    if not -2147483648 <= r <= 2147483647:
+                        r = wrap_i32(r)
+                    stack[-1] = r
+                elif op == JUMP:
+                    pc = arg
+                elif op == MUL_I:
+                    b = pop() if arg is None else arg
+                    r = stack[-1] * b
+                    if not -2147483648 <= r <= 2147483647:
+                        r = wrap_i32(r)
+                    stack[-1] = r
+                elif op == REM_I:
+                    b = pop() if arg is None else arg
+                    a = stack[-1]
+                    if a >= 0 and b > 0:
+                        stack[-1] = a % b
+                    else:
+                        stack[-1] = i32_rem(a, b)
+                elif op == DIV_I:
+                    b = pop() if arg is None else arg
+                    a = stack[-1]
+                    if a >= 0 and b > 0:
+                        stack[-1] = a // b
+                    else:
+                        stack[-1] = i32_div(a, b)
+                elif op == ADD_F:
+                    b = pop() if arg is None else arg
+                    stack[-1] = stack[-1] + b
+                elif op == SUB_F:
+                    b = pop() if arg is None else arg
+                    stack[-1] = stack[-1] - b
+                elif op == MUL_F:
+                    b = pop() if arg is None else arg
+                    stack[-1] = stack[-1] * b
+                elif op == DIV_F:
+                    b = pop() if arg is None else arg
+                    stack[-1] = f64_div(stack[-1], b)
+                elif op == REM_F:
+                    b = pop() if arg is None else arg
+                    stack[-1] = f64_rem(stack[-1], b)
+                elif op == TO_F64:
+                    stack[-1] = float(stack[-1])
+                elif op == TO_I32:
+                    stack[-1] = to_i32(stack[-1])
+                elif op == PRINT:
+                    write(format_value(slots[arg]))
+                elif op == PRINT_STR:
+                    write(arg)
+                elif op == READ_I32:
+                    slots[arg] = read_i32()
+                elif op == READ_F64:
+                    slots[arg] = read_f64()
+                elif op == NEG_I:
+                    stack[-1] = wrap_i32(-stack[-1])
+                elif op == NEG_F:
+                    stack[-1] = -stack[-1]
+                elif op == HALT:
+                    return
+                else:
+                    raise ExecutionError(f"Opcode inválido: {op}")
+        except ExecutionError as e:
+            if not e.line:
+                e.line = self.code.lines[pc - 1]
+            raise
+        finally:
+            self.output.flush()
+
+
+def load(program: Program) -> Callable[[TextIO, TextIO], None]:
+    """Compila o programa e devolve uma função run(stdin, stdout)"""
+    code = compile_program(program)
+
+    def run(stdin: TextIO, stdout: TextIO) -> None:
+        VM(code, stdin, stdout).run()
+
+    return run
+
+
+def execute(program: Program, stdin: Optional[TextIO] = None,
+            stdout: Optional[TextIO] = None) -> None:
+    """Compila e executa um programa"""
+    VM(compile_program(program), stdin, stdout).run()